@@ -0,0 +1,475 @@
+# src/analyzer.py
+"""
+Single-pass DOM analyzer.
+
+Instead of every check walking the BeautifulSoup tree with its own find_all(),
+the tree is walked once and every element is handed to all registered check
+visitors. Visitors consume a small event stream:
+
+    start(tag, attrs)   opening tag, attrs is a dict
+    data(text)          text content
+    end(tag)            closing tag
+
+so the same visitors can later be fed by other producers (streaming parsers,
+other tree backends) without change. Each visitor returns exactly what the
+corresponding check_* function in scanner.py returns.
+"""
+import re
+import time
+from html.parser import HTMLParser
+
+from bs4.element import CData, NavigableString, PreformattedString, Tag
+
+from signatures import DEFAULT_ENGINE
+
+# -----------------------
+# Shared patterns (compiled once)
+# -----------------------
+CSRF_RE = re.compile(r"(csrf|token|authenticity_token|_csrf|csrfmiddlewaretoken)", re.I)
+
+# <link rel=...> values that make the browser contact a third party
+RESOURCE_HINT_RELS = ("preconnect", "dns-prefetch", "preload", "prefetch", "modulepreload")
+
+
+def link_is_resource_hint(rel):
+    rel = rel.lower()
+    return any(h in rel for h in RESOURCE_HINT_RELS)
+
+
+def _attr(attrs, key):
+    value = attrs.get(key)
+    if value is None:
+        return ""
+    if isinstance(value, list):  # bs4 multi-valued attributes (class, rel, ...)
+        return " ".join(value)
+    return value
+
+
+# -----------------------
+# Check visitors
+# -----------------------
+
+class DomVisitor:
+    """
+    Base visitor. `tags` lists the tag names whose start/end events the visitor
+    wants; `wants_data` says whether text events must be delivered. A visitor sets
+    `settled = True` once its answer can no longer change, and stops receiving events.
+    """
+    tags = ()
+    wants_data = False
+
+    def __init__(self):
+        self.settled = False
+
+    def start(self, tag, attrs):
+        pass
+
+    def data(self, text):
+        pass
+
+    def end(self, tag):
+        pass
+
+    def result(self):
+        raise NotImplementedError
+
+
+class FormVisitor(DomVisitor):
+    """Same output as check_form_security()."""
+    tags = ("form", "input")
+
+    def __init__(self):
+        super().__init__()
+        self.open_forms = 0
+        self.details = {"forms_count": 0, "password_fields": 0, "csrf_tokens": 0, "form_actions_insecure": 0}
+
+    def start(self, tag, attrs):
+        d = self.details
+        if tag == "form":
+            self.open_forms += 1
+            d["forms_count"] += 1
+            action = _attr(attrs, "action")
+            if action.startswith("http://"):
+                d["form_actions_insecure"] += 1
+        elif self.open_forms:
+            # an input is counted once per enclosing form, like per-form find_all()
+            if attrs.get("type") == "password":
+                d["password_fields"] += self.open_forms
+            if CSRF_RE.search(_attr(attrs, "name") + "\0" + _attr(attrs, "id")):
+                d["csrf_tokens"] += self.open_forms
+
+    def end(self, tag):
+        if tag == "form" and self.open_forms:
+            self.open_forms -= 1
+
+    def result(self):
+        d = self.details
+        if not d["forms_count"]:
+            return False, "⚠ No forms detected", {}
+        summary_msg = f"{d['forms_count']} form(s) detected — password fields: {d['password_fields']}, csrf tokens: {d['csrf_tokens']}, insecure actions: {d['form_actions_insecure']}"
+        return True, summary_msg, dict(d)
+
+
+class PrivacyVisitor(DomVisitor):
+    """Same output as check_privacy_policy(); remembers the matching href."""
+    tags = ("a",)
+    wants_data = True
+
+    def __init__(self):
+        super().__init__()
+        self.open_links = []    # [href, [text parts]] for every open <a>
+        self.href = None
+
+    def start(self, tag, attrs):
+        href = _attr(attrs, "href")
+        if "privacy" in href.lower():
+            self._found(href)
+        else:
+            self.open_links.append([href, []])
+
+    def data(self, text):
+        for link in self.open_links:
+            link[1].append(text)
+
+    def end(self, tag):
+        if self.open_links:
+            href, parts = self.open_links.pop()
+            if "privacy" in "".join(parts).lower():
+                self._found(href)
+
+    def _found(self, href):
+        self.href = href
+        self.open_links = []
+        self.settled = True
+
+    def result(self):
+        if self.settled:
+            return True, "Privacy policy link found"
+        return False, "⚠ Privacy policy link NOT found"
+
+
+class ConsentVisitor(DomVisitor):
+    """Same output as check_consent_checkbox()."""
+    tags = ("input",)
+
+    def start(self, tag, attrs):
+        if _attr(attrs, "type").lower() != "checkbox":
+            return
+        name = _attr(attrs, "name").lower()
+        id_ = _attr(attrs, "id").lower()
+        if "consent" in name or "consent" in id_ or "agree" in name or "agree" in id_:
+            self.settled = True
+
+    def result(self):
+        if self.settled:
+            return True, "Consent checkbox found"
+        return False, "⚠ Consent checkbox NOT found"
+
+
+class TrackerVisitor(DomVisitor):
+    """
+    Same output as detect_js_trackers(): inline scripts, script src URLs,
+    <img>/<iframe> pixels and <link> resource hints run through the compiled
+    signature engine.
+    """
+    tags = ("script", "img", "iframe", "link")
+    wants_data = True
+
+    def __init__(self, engine=None):
+        super().__init__()
+        self.engine = engine or DEFAULT_ENGINE
+        self.found = []
+        self.in_script = False
+        self.parts = []
+
+    def start(self, tag, attrs):
+        if tag == "script":
+            self.engine.scan(_attr(attrs, "src").lower(), self.found)
+            self.in_script = True
+            self.parts = []
+        elif tag == "link":
+            if link_is_resource_hint(_attr(attrs, "rel")):
+                self.engine.scan(_attr(attrs, "href").lower(), self.found)
+        else:
+            self.engine.scan(_attr(attrs, "src").lower(), self.found)
+
+    def data(self, text):
+        if self.in_script:
+            self.parts.append(text)
+
+    def end(self, tag):
+        if tag == "script" and self.in_script:
+            self.engine.scan("".join(self.parts).lower(), self.found)
+            self.in_script = False
+            self.parts = []
+
+    def result(self):
+        if self.found:
+            return True, f"Trackers detected: {', '.join(self.found)}", {"trackers": list(self.found)}
+        return False, "No common trackers auto-detected", {"trackers": []}
+
+
+class LinkVisitor(DomVisitor):
+    """
+    Collects crawlable targets: <a>/<area> hrefs and <form action>s (a form
+    without an action posts to the page itself). Not a compliance check, so it
+    is not in DOM_CHECKS; the crawler adds it to the pass. Honours <base href>.
+    """
+    tags = ("a", "area", "form", "base")
+
+    def __init__(self, limit=10000):
+        super().__init__()
+        self.limit = limit
+        self.base = None
+        self.links = []
+        self.form_actions = []
+
+    def start(self, tag, attrs):
+        if tag == "base":
+            if self.base is None and _attr(attrs, "href"):
+                self.base = _attr(attrs, "href").strip()
+        elif tag == "form":
+            self.form_actions.append(_attr(attrs, "action").strip())
+        elif len(self.links) < self.limit:
+            href = _attr(attrs, "href").strip()
+            if href:
+                self.links.append(href)
+
+    def result(self):
+        return {"base": self.base, "links": self.links, "form_actions": self.form_actions}
+
+
+class ScriptSrcVisitor(DomVisitor):
+    """Collects <script src> URLs for the deep tracker check (see resources.py)."""
+    tags = ("script",)
+
+    def __init__(self):
+        super().__init__()
+        self.srcs = []
+
+    def start(self, tag, attrs):
+        src = _attr(attrs, "src").strip()
+        if src and src not in self.srcs:
+            self.srcs.append(src)
+
+    def result(self):
+        return list(self.srcs)
+
+
+# -----------------------
+# Registry & dispatch
+# -----------------------
+
+# result key in scan_webform()["checks"] -> visitor class
+DOM_CHECKS = {
+    "forms": FormVisitor,
+    "privacy_policy": PrivacyVisitor,
+    "consent": ConsentVisitor,
+    "trackers": TrackerVisitor,
+}
+
+
+def register_dom_check(name, visitor_cls):
+    """Add (or replace) a visitor that runs in the single DOM pass."""
+    DOM_CHECKS[name] = visitor_cls
+
+
+class Dispatcher:
+    """
+    Routes events to visitors by tag name and drops visitors once they settle.
+    Producers call start()/data()/end(); `all_settled` lets them stop early.
+    """
+    def __init__(self, visitors):
+        self.visitors = visitors
+        self.by_tag = {}
+        self.data_visitors = []
+        for v in visitors.values():
+            for t in v.tags:
+                self.by_tag.setdefault(t, []).append(v)
+            if v.wants_data:
+                self.data_visitors.append(v)
+        self.remaining = len(visitors)
+
+    @property
+    def all_settled(self):
+        return self.remaining == 0
+
+    def _prune(self, visitor):
+        self.remaining -= 1
+        for t in visitor.tags:
+            self.by_tag[t].remove(visitor)
+            if not self.by_tag[t]:
+                del self.by_tag[t]
+        if visitor in self.data_visitors:
+            self.data_visitors.remove(visitor)
+
+    def start(self, tag, attrs):
+        handlers = self.by_tag.get(tag)
+        if handlers:
+            for v in list(handlers):
+                v.start(tag, attrs)
+                if v.settled:
+                    self._prune(v)
+
+    def data(self, text):
+        for v in self.data_visitors:
+            v.data(text)
+
+    def end(self, tag):
+        handlers = self.by_tag.get(tag)
+        if handlers:
+            for v in list(handlers):
+                v.end(tag)
+                if v.settled:
+                    self._prune(v)
+
+    def results(self):
+        return {name: v.result() for name, v in self.visitors.items()}
+
+
+class TimedDispatcher(Dispatcher):
+    """
+    Dispatcher that also adds up the time spent inside each visitor
+    (`spent`: {check_name: seconds}). Used only when instrumentation is on.
+    """
+    def __init__(self, visitors):
+        super().__init__(visitors)
+        self.spent = dict.fromkeys(visitors, 0.0)
+        self._names = {id(v): name for name, v in visitors.items()}
+
+    def _timed(self, v, method, *args):
+        start = time.perf_counter()
+        method(*args)
+        self.spent[self._names[id(v)]] += time.perf_counter() - start
+
+    def start(self, tag, attrs):
+        handlers = self.by_tag.get(tag)
+        if handlers:
+            for v in list(handlers):
+                self._timed(v, v.start, tag, attrs)
+                if v.settled:
+                    self._prune(v)
+
+    def data(self, text):
+        for v in self.data_visitors:
+            self._timed(v, v.data, text)
+
+    def end(self, tag):
+        handlers = self.by_tag.get(tag)
+        if handlers:
+            for v in list(handlers):
+                self._timed(v, v.end, tag)
+                if v.settled:
+                    self._prune(v)
+
+
+def new_visitors(names=None):
+    return {name: cls() for name, cls in DOM_CHECKS.items() if names is None or name in names}
+
+
+def _is_text(node):
+    """Text that contributes to get_text() / .string (not comments, doctypes, ...)."""
+    return isinstance(node, NavigableString) and (not isinstance(node, PreformattedString) or isinstance(node, CData))
+
+
+def walk_soup(soup, dispatcher):
+    """Iterative depth-first walk of a BeautifulSoup tree emitting start/data/end events."""
+    stack = [iter(soup.contents)]
+    open_tags = []
+    while stack:
+        for node in stack[-1]:
+            if isinstance(node, Tag):
+                dispatcher.start(node.name, node.attrs)
+                open_tags.append(node.name)
+                stack.append(iter(node.contents))
+                break
+            if _is_text(node):
+                dispatcher.data(str(node))
+        else:
+            stack.pop()
+            if open_tags:
+                dispatcher.end(open_tags.pop())
+
+
+# elements that never have an end tag
+VOID_TAGS = frozenset([
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen",
+    "link", "meta", "param", "source", "track", "wbr",
+])
+
+
+class StreamingParser(HTMLParser):
+    """
+    Incremental producer: feed() it chunks of decoded HTML as they arrive and it
+    emits the same events walk_soup() would, without building a tree. Keeps a
+    stack of open elements so unclosed/misnested tags are closed the way the
+    BeautifulSoup tree builder closes them.
+    """
+    def __init__(self, dispatcher):
+        super().__init__(convert_charrefs=True)
+        self.dispatcher = dispatcher
+        self.open_tags = []
+
+    def handle_starttag(self, tag, attrs):
+        self.dispatcher.start(tag, {k: ("" if v is None else v) for k, v in attrs})
+        if tag in VOID_TAGS:
+            self.dispatcher.end(tag)
+        else:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.dispatcher.start(tag, {k: ("" if v is None else v) for k, v in attrs})
+        self.dispatcher.end(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in self.open_tags:
+            return  # stray end tag
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.dispatcher.end(open_tag)
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        self.dispatcher.data(data)
+
+    def unknown_decl(self, data):
+        if data.startswith("CDATA["):
+            self.dispatcher.data(data[6:])
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.dispatcher.end(self.open_tags.pop())
+
+
+def analyze_html(chunks, names=None, timings=None):
+    """
+    Run the DOM checks over an iterable of HTML text chunks without building a
+    tree, stopping as soon as every visitor has settled.
+    timings: optional dict; receives "dom_checks" ({check_name: seconds in its visitor}).
+    Returns ({check_name: result tuple}, stopped_early).
+    """
+    visitors = new_visitors(names)
+    dispatcher = TimedDispatcher(visitors) if timings is not None else Dispatcher(visitors)
+    parser = StreamingParser(dispatcher)
+    stopped_early = False
+    for chunk in chunks:
+        parser.feed(chunk)
+        if dispatcher.all_settled:
+            stopped_early = True
+            break
+    parser.close()
+    if timings is not None:
+        timings["dom_checks"] = dispatcher.spent
+    return dispatcher.results(), stopped_early
+
+
+def analyze_dom(soup, names=None):
+    """
+    Run all registered DOM checks (or the subset `names`) in one traversal.
+    Returns {check_name: result tuple}.
+    """
+    dispatcher = Dispatcher(new_visitors(names))
+    walk_soup(soup, dispatcher)
+    return dispatcher.results()
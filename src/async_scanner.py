@@ -0,0 +1,173 @@
+# src/async_scanner.py
+"""
+asyncio-native scanner API.
+
+scan_webform_async() runs the same check pipeline as scanner.scan_webform()
+and returns the same result dict. Fetching uses aiohttp when it is installed
+(one connection pool shared by every scan on the loop); without it the
+blocking fetch_url() is pushed to the loop's default executor so the API
+still works, just without the memory/concurrency benefits.
+
+Bodies are read up to max_bytes, like scan_webform(stream=True), and the
+checks run in the loop's default executor, so parsing a large page does
+not stall the other scans on the loop.
+"""
+import asyncio
+from functools import partial
+
+from scanner import (DEFAULT_HEADERS, DEFAULT_MAX_BODY_BYTES, STREAM_CHUNK_SIZE, FetchedResponse,
+                     analyze_response, error_result, fetch_url)
+
+try:
+    import aiohttp
+except ImportError:  # optional dependency
+    aiohttp = None
+
+DEFAULT_CONCURRENCY = 100
+
+
+def _merge_headers(raw_headers):
+    """
+    Collapse a multi-dict of headers into a plain dict, joining repeated
+    headers with ", " the same way requests does, so checks see identical input.
+    """
+    merged = {}
+    for k, v in raw_headers.items():
+        if k in merged:
+            merged[k] = merged[k] + ", " + v
+        else:
+            merged[k] = v
+    return merged
+
+
+def _read_capped(chunks, max_bytes):
+    """Join body chunks up to max_bytes; returns (content, body info as in details["body"])."""
+    info = {"bytes_read": 0, "max_bytes": max_bytes, "truncated": False, "stopped_early": False}
+    out = []
+    for chunk in chunks:
+        room = max_bytes - info["bytes_read"]
+        if len(chunk) > room:
+            chunk = chunk[:room]
+            info["truncated"] = True
+        out.append(chunk)
+        info["bytes_read"] += len(chunk)
+        if info["truncated"]:
+            break
+    return b"".join(out), info
+
+
+def _fetch_capped(url, timeout, max_bytes):
+    """Blocking fallback without aiohttp: streamed fetch_url(), body cut at max_bytes."""
+    r = fetch_url(url, timeout=timeout, stream=True)
+    if r is None:
+        return None
+    try:
+        content, info = _read_capped(r.iter_content(STREAM_CHUNK_SIZE), max_bytes)
+    except Exception:
+        return None
+    finally:
+        r.close()
+    response = FetchedResponse(r.url, r.status_code, r.headers, content, encoding=r.encoding, history=r.history)
+    response.fetch_timing = getattr(r, "fetch_timing", None)
+    response.body_info = info
+    return response
+
+
+async def fetch_url_async(url, timeout=7, session=None, max_bytes=DEFAULT_MAX_BODY_BYTES):
+    """
+    Async counterpart of fetch_url(). Returns a response object (or None on error).
+    session: optional aiohttp.ClientSession to reuse connections across scans.
+    At most max_bytes of the body are read; response.body_info says if it was cut.
+    """
+    if aiohttp is None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, _fetch_capped, url, timeout, max_bytes)
+
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession(headers=DEFAULT_HEADERS)
+    try:
+        async with session.get(url, headers=DEFAULT_HEADERS, allow_redirects=True,
+                               timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+            chunks = []
+            size = 0
+            async for chunk in r.content.iter_chunked(STREAM_CHUNK_SIZE):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > max_bytes:
+                    break
+            body, info = _read_capped(chunks, max_bytes)
+            history = [FetchedResponse(str(h.url), h.status, _merge_headers(h.headers), b"") for h in r.history]
+            response = FetchedResponse(str(r.url), r.status, _merge_headers(r.headers), body, history=history)
+            response.body_info = info
+            return response
+    except Exception:
+        return None
+    finally:
+        if own_session:
+            await session.close()
+
+
+async def scan_webform_async(url, session=None, timeout=7, max_bytes=DEFAULT_MAX_BODY_BYTES):
+    """
+    Runs all checks for a single URL without blocking the event loop: the
+    download is awaited, the analysis runs in the default executor.
+    A body cut at max_bytes is recorded in details["body"].
+    """
+    response = await fetch_url_async(url, timeout=timeout, session=session, max_bytes=max_bytes)
+    info = getattr(response, "body_info", None)
+    body = info if info and info["truncated"] else None
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, partial(analyze_response, url, response, body=body))
+    except Exception as e:
+        return error_result(url, e)
+
+
+async def _aiter_urls(urls):
+    if hasattr(urls, "__aiter__"):
+        async for u in urls:
+            yield u
+    else:
+        for u in urls:
+            yield u
+
+
+async def scan_many_async(urls, concurrency=DEFAULT_CONCURRENCY, timeout=7, max_bytes=DEFAULT_MAX_BODY_BYTES):
+    """
+    Async generator: scans URLs from a (sync or async) iterable and yields each
+    result dict as soon as it finishes. At most `concurrency` scans are in flight;
+    URLs are pulled from the iterable lazily, so memory stays flat for huge inputs.
+
+        async for result in scan_many_async(urls):
+            ...
+    """
+    concurrency = max(1, int(concurrency))
+    session = None
+    if aiohttp is not None:
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        session = aiohttp.ClientSession(connector=connector, headers=DEFAULT_HEADERS)
+
+    source = _aiter_urls(urls)
+    pending = set()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    url = await source.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(
+                    scan_webform_async(url, session=session, timeout=timeout, max_bytes=max_bytes)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if session is not None:
+            await session.close()
@@ -0,0 +1,112 @@
+# src/batch.py
+"""
+Concurrent batch scanning.
+
+scan_webform() spends almost all of its time blocked on the network, so a
+batch of URLs is run through a bounded thread pool. A per-host cap keeps us
+polite towards a single server (e.g. a university portal where every URL
+lives on the same host) while other hosts keep the pool busy.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlparse
+
+from scanner import error_result, scan_webform
+
+# -----------------------
+# Defaults
+# -----------------------
+DEFAULT_WORKERS = 8      # URLs fetched + analyzed at the same time
+DEFAULT_PER_HOST = 2     # max in-flight requests against one host
+LOOKAHEAD_FACTOR = 64    # how far ahead of the pool we read the URL list
+
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+
+def scan_batch(urls, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST,
+               ordered=True, scan=scan_webform):
+    """
+    Scan an iterable of URLs concurrently and yield scan_webform() result dicts.
+
+    workers:  size of the worker pool (global concurrency limit)
+    per_host: max concurrent scans against the same host
+    ordered:  True  -> results are yielded in input order
+              False -> results are yielded as soon as each scan finishes
+    scan:     callable(url) -> result dict (defaults to scan_webform); if it
+              raises, error_result() for that URL is yielded in its place
+    """
+    workers = max(1, int(workers))
+    per_host = max(1, int(per_host))
+    lookahead = workers * LOOKAHEAD_FACTOR
+
+    source = iter(enumerate(urls))
+    exhausted = False
+    waiting = {}        # host -> deque of (index, url) blocked by the per-host cap
+    waiting_count = 0
+    active = {}         # host -> in-flight count
+    futures = {}        # future -> (index, url, host)
+    done_buffer = {}    # index -> result (ordered mode only)
+    next_index = 0
+    read = 0            # URLs taken from the source so far
+
+    def next_ready():
+        """Pick the next (index, url) whose host has capacity, or None."""
+        nonlocal exhausted, waiting_count, read
+        for host, queue in waiting.items():
+            if active.get(host, 0) < per_host:
+                item = queue.popleft()
+                if not queue:
+                    del waiting[host]
+                waiting_count -= 1
+                return item
+        # in ordered mode, stay within `lookahead` URLs of the next result to yield,
+        # so done_buffer cannot grow past that behind one slow scan
+        while not exhausted and waiting_count < lookahead and not (ordered and read >= next_index + lookahead):
+            try:
+                index, url = next(source)
+            except StopIteration:
+                exhausted = True
+                break
+            read += 1
+            host = host_of(url)
+            if active.get(host, 0) < per_host:
+                return index, url
+            waiting.setdefault(host, deque()).append((index, url))
+            waiting_count += 1
+        return None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            while len(futures) < workers:
+                item = next_ready()
+                if item is None:
+                    break
+                index, url = item
+                host = host_of(url)
+                active[host] = active.get(host, 0) + 1
+                futures[pool.submit(scan, url)] = (index, url, host)
+
+            if not futures:
+                break
+
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                index, url, host = futures.pop(fut)
+                active[host] -= 1
+                if not active[host]:
+                    del active[host]
+                try:
+                    result = fut.result()
+                except Exception as e:  # one bad URL must not end the batch
+                    result = error_result(url, e)
+                if ordered:
+                    done_buffer[index] = result
+                else:
+                    yield result
+
+            if ordered:
+                while next_index in done_buffer:
+                    yield done_buffer.pop(next_index)
+                    next_index += 1
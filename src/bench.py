@@ -0,0 +1,786 @@
+# src/bench.py
+"""
+Performance benchmarks for the scanner.
+
+    python src/bench.py dom [--forms N] [--links N] [--scripts N] [--repeat N]
+    python src/bench.py parity
+    python src/bench.py parsers [--repeat N]
+    python src/bench.py signatures [--script-kb N] [--repeat N]
+    python src/bench.py analysis [--pages N] [--processes 1,2,4]
+    python src/bench.py portfolio [--results N]          (requires numpy)
+    python src/bench.py records [--results N]
+    python src/bench.py headers [--requests N] [--concurrency N]
+    python src/bench.py startup [--repeat N]
+    python src/bench.py suite [--urls N] [--workers N] [--output FILE] [--baseline FILE]
+
+Every benchmark prints one JSON document to stdout so numbers can be
+compared between commits.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from bs4 import BeautifulSoup
+
+from analyzer import analyze_dom, analyze_html
+from fixtures import PAGE_KINDS, build_corpus, corpus_urls, make_portal_page, start_fixture_server
+from parsers import DIVERGENT_BACKENDS, PARSER_PREFERENCE, analyze_markup, available_backends, select_backend
+from signatures import DEFAULT_ENGINE, SignatureEngine
+from scanner import check_consent_checkbox, check_form_security, check_privacy_policy, detect_js_trackers
+
+# Parity corpus: every backend "auto" may pick must give identical check
+# results on these documents (well-formed and typical real-world sloppiness).
+PARITY_CORPUS = {
+    "empty": "",
+    "login_form": (
+        '<html><body><form action="/login" method="post">'
+        '<input type="text" name="user"><input type="password" name="pw">'
+        '<input type="hidden" name="csrfmiddlewaretoken" value="x">'
+        '<input type="checkbox" name="agree_terms"> I agree</form></body></html>'
+    ),
+    "insecure_action": (
+        '<form action="http://example.com/post"><input type=password id=pass>'
+        '<input name=authenticity_token></form><form action="//cdn.example.com/x"></form>'
+    ),
+    "no_forms_links": (
+        '<nav><a href="/about">About</a><a href="/legal">Privacy &amp; Cookies</a></nav>'
+        '<p>Contact us <a>here</a></p>'
+    ),
+    "privacy_in_href": '<footer><a href="/Privacy-Policy"><img src="x.png"></a></footer>',
+    "privacy_nested_text": '<a href="/p">Our <b>priv</b><i>acy</i> notice</a>',
+    "consent_variants": (
+        '<form><input type="CHECKBOX" ID="Consent_Marketing"><input type="checkbox" name="newsletter"></form>'
+    ),
+    "unquoted_and_void": (
+        '<form action=/s><input type=checkbox name=agree /><input type=password name=p/>'
+        '<br><img src=a.png><input name=_csrf></form>'
+    ),
+    "unclosed_tags": '<div><form action="/a"><p>Name <input name="n"><p>Mail <input type=password name=m></div>',
+    "trackers_inline": (
+        "<head><script>window.dataLayer=[];function gtag(){dataLayer.push(arguments)}"
+        "gtag('js', new Date());</script><script>!function(f,b,e,v,n,t,s){fbq('init','1')}</script></head>"
+    ),
+    "trackers_src": (
+        '<script src="https://www.googletagmanager.com/gtag/js?id=G-1" async></script>'
+        '<script src="https://static.hotjar.com/c/hotjar-1.js"></script>'
+        '<script src="https://analytics.tiktok.com/i18n/pixel/events.js"></script>'
+        '<script type="text/javascript" src="//pagead2.googlesyndication.com/x.js"></script>'
+    ),
+    "tracker_pixels": (
+        '<img src="https://www.facebook.com/tr?id=1&ev=PageView" height="1" width="1">'
+        '<iframe src="https://www.googletagmanager.com/ns.html?id=GTM-1"></iframe>'
+        '<link rel="preconnect" href="https://static.hotjar.com"><link rel="dns-prefetch" href="//bat.bing.com">'
+        '<link rel="stylesheet" href="https://cdn.segment.com/not-a-hint.css">'
+    ),
+    "tracker_lookalikes": "<script>function omega(x){return x} omega(1); mega(2); window.ga('send');</script>",
+    "script_with_markup": '<script>if (a < b && c > d) { document.write("<a href=privacy>p</a>"); }</script>',
+    "comments_and_cdata": '<!-- <a href="/privacy">old</a> --><a href="/x"><!-- privacy -->Home</a>',
+    "entities": '<a href="/x">Priv&#97;cy</a><input type="checkbox" name="i&#97;gree">',
+    "doctype_page": '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>T</title></head>'
+                    '<body><form><input type="submit"></form></body></html>',
+    # HTML5 tree construction (selectolax, lxml) disagrees with bs4 on these
+    "form_in_table": "<table><form><tr><td><input type=password></td></tr></form></table>",
+    "nested_forms": "<form><form><input name=token></form></form>",
+    "link_in_title": "<title><a href=/privacy>Privacy</a></title>",
+    "checkbox_in_textarea": "<textarea><input type=checkbox name=agree></textarea>",
+}
+
+
+def check_parity(backends=None):
+    """
+    Run the corpus through every backend (default: all installed except the
+    opt-in DIVERGENT_BACKENDS) and compare against the bs4 reference.
+    Returns a list of mismatches (empty when all backends agree).
+    """
+    backends = backends or [b for b in available_backends() if b not in DIVERGENT_BACKENDS]
+    mismatches = []
+    for name, html in PARITY_CORPUS.items():
+        expected = analyze_markup(html, backend="bs4")
+        for backend in backends:
+            got = analyze_markup(html, backend=backend)
+            if got != expected:
+                mismatches.append({"document": name, "backend": backend, "expected": expected, "got": got})
+    return mismatches
+
+
+def bench_parsers(repeat=5):
+    html = make_portal_page()
+    report = {
+        "benchmark": "parsers",
+        "page_bytes": len(html.encode("utf-8")),
+        "auto": select_backend("auto"),
+        "preference": list(PARSER_PREFERENCE),
+        "backends": {},
+    }
+    reference = analyze_markup(html, backend="bs4")
+    for backend in available_backends():
+        if analyze_markup(html, backend=backend) != reference:
+            raise AssertionError(f"backend {backend} disagrees with bs4 on the benchmark page")
+        elapsed = _best_of(lambda: analyze_markup(html, backend=backend), repeat)
+        report["backends"][backend] = {
+            "parse_and_analyze_s": round(elapsed, 5),
+            "mb_per_s": round(report["page_bytes"] / elapsed / 1e6, 2),
+        }
+    return report
+
+
+def make_script_corpus(kb=512, seed=2):
+    """Minified-looking JavaScript with no tracker signatures in it."""
+    rnd = random.Random(seed)
+    words = ["var", "function", "return", "this", "window", "document", "push", "length",
+             "prototype", "callback", "options", "element", "config", "value", "state"]
+    out = []
+    size = 0
+    while size < kb * 1024:
+        piece = "%s%d(%s.%s,%d);" % (rnd.choice(words), rnd.randint(0, 999), rnd.choice(words),
+                                     rnd.choice(words), rnd.randint(0, 99999))
+        out.append(piece)
+        size += len(piece)
+    return "".join(out).lower()
+
+
+def _synthetic_vendors(count, seed=3):
+    """The real signature set, padded with random vendors up to `count`."""
+    rnd = random.Random(seed)
+    vendors = {k: dict(v) for k, v in DEFAULT_ENGINE.vendors.items()}
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    i = 0
+    while len(vendors) < count:
+        host = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(5, 12)))
+        vendors[f"Synthetic{i}"] = {"category": "synthetic", "patterns": [f"{host}.com", f"{host}q("]}
+        i += 1
+    return dict(list(vendors.items())[:count])
+
+
+def _naive_scan(vendors, text):
+    """The old approach: every vendor x every pattern as a substring test."""
+    found = []
+    for name, spec in vendors.items():
+        for pat in spec["patterns"]:
+            if pat in text:
+                found.append(name)
+                break
+    return found
+
+
+def bench_signatures(counts=(10, 50, 100, 226, 500, 1000, 2000), script_kb=512, repeat=3):
+    text = make_script_corpus(script_kb)
+    size = len(text)
+    report = {"benchmark": "signatures", "script_bytes": size, "runs": []}
+    for count in counts:
+        vendors = _synthetic_vendors(count)
+        start = time.perf_counter()
+        engine = SignatureEngine(vendors)
+        compile_s = time.perf_counter() - start
+        engine_s = _best_of(lambda: engine.scan(text), repeat)
+        naive_s = _best_of(lambda: _naive_scan(vendors, text), repeat)
+        report["runs"].append({
+            "vendors": len(vendors),
+            "patterns": len(engine),
+            "compile_s": round(compile_s, 4),
+            "engine_ns_per_byte": round(engine_s / size * 1e9, 2),
+            "naive_ns_per_byte": round(naive_s / size * 1e9, 2),
+        })
+    return report
+
+
+def multi_pass(soup):
+    """The original path: every check does its own find_all() traversal."""
+    return {
+        "forms": check_form_security(soup),
+        "privacy_policy": check_privacy_policy(soup),
+        "consent": check_consent_checkbox(soup),
+        "trackers": detect_js_trackers(soup),
+    }
+
+
+def _best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_dom(forms=40, links=800, scripts=60, repeat=5):
+    html = make_portal_page(forms=forms, links=links, scripts=scripts)
+    soup = BeautifulSoup(html, "html.parser")
+
+    multi = multi_pass(soup)
+    single = analyze_dom(soup)
+    if multi != single:
+        raise AssertionError(f"single-pass results differ from multi-pass:\n{multi}\n{single}")
+    streamed, _ = analyze_html([html])
+    if streamed != single:
+        raise AssertionError(f"streaming results differ from tree walk:\n{streamed}\n{single}")
+
+    parse_s = _best_of(lambda: BeautifulSoup(html, "html.parser"), repeat)
+    multi_s = _best_of(lambda: multi_pass(soup), repeat)
+    single_s = _best_of(lambda: analyze_dom(soup), repeat)
+    # streaming parser: parse + analyze with no tree at all
+    stream_s = _best_of(lambda: analyze_html([html]), repeat)
+    return {
+        "benchmark": "dom",
+        "page_bytes": len(html.encode("utf-8")),
+        "elements": sum(1 for _ in soup.find_all(True)),
+        "parse_s": round(parse_s, 5),
+        "multi_pass_s": round(multi_s, 5),
+        "single_pass_s": round(single_s, 5),
+        "speedup": round(multi_s / single_s, 2) if single_s else None,
+        "streaming_parse_and_analyze_s": round(stream_s, 5),
+        "results_identical": True,
+    }
+
+
+def bench_analysis(pages=64, processes=None):
+    """
+    Analysis-stage throughput of the multi-process pipeline (no network): the
+    same portal page is analyzed `pages` times per pool size, bodies passed
+    through shared memory exactly as scan_pipeline() does.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import resource_tracker
+    from pipeline import analyze_job, make_job, release_job
+
+    body = make_portal_page().encode("utf-8")
+    headers = {"Content-Type": "text/html; charset=utf-8"}
+    cores = os.cpu_count() or 1
+    if not processes:
+        processes = sorted({1, 2, 4, 8, 16, 32, cores} & set(range(1, cores + 1)))
+    resource_tracker.ensure_running()
+    runs = []
+    for n in processes:
+        jobs = [make_job("https://portal.example/", 200, headers, body) for _ in range(pages)]
+        try:
+            with ProcessPoolExecutor(max_workers=n) as pool:
+                list(pool.map(analyze_job, jobs[:n]))  # warm up the workers
+                start = time.perf_counter()
+                results = list(pool.map(analyze_job, jobs))
+                elapsed = time.perf_counter() - start
+        finally:
+            for job in jobs:
+                release_job(job)
+        assert all(r == results[0] for r in results)
+        runs.append({"processes": n, "seconds": round(elapsed, 4), "pages_per_s": round(pages / elapsed, 1)})
+    base = runs[0]["pages_per_s"]
+    for run in runs:
+        run["speedup"] = round(run["pages_per_s"] / base, 2)
+    return {"benchmark": "analysis", "cpu_count": cores, "page_bytes": len(body), "pages": pages, "runs": runs}
+
+
+def bench_portfolio(results=1000000, hosts=5000, seed=4):
+    """
+    What-if re-scoring of `results` synthetic scan results under a new rating
+    table: vectorized Portfolio.what_if() vs compute_risk() per result
+    (the latter timed on a sample and extrapolated).
+    """
+    import numpy as np
+    from portfolio import Portfolio
+    from scanner import DEFAULT_ISSUE_RATINGS, compute_risk
+
+    rng = np.random.default_rng(seed)
+    names = list(DEFAULT_ISSUE_RATINGS)
+    issues = rng.random((results, len(names))) < 0.4
+    base = Portfolio([f"https://h{i % hosts}.example/{i}" for i in range(results)],
+                     rng.integers(0, hosts, results).astype(np.int32), [f"h{i}.example" for i in range(hosts)],
+                     issues, names, np.zeros(results, dtype=np.int16), np.zeros(results, dtype=np.int8))
+    current = base.score()
+    base.scores, base.levels = current["normalized_score"], current["level"]
+    ratings = {"No HTTPS": {"likelihood": 5, "impact": 5}, "Trackers Detected": {"impact": 4}}
+
+    start = time.perf_counter()
+    what_if = base.what_if(ratings)
+    vector_s = time.perf_counter() - start
+
+    sample = min(results, 20000)
+    rows = [[names[k] for k in np.flatnonzero(issues[i])] for i in range(sample)]
+    loop_s = _best_of(lambda: [compute_risk(r) for r in rows], 1) * results / sample
+    return {
+        "benchmark": "portfolio",
+        "results": results,
+        "vectorized_what_if_s": round(vector_s, 3),
+        "per_result_compute_risk_s_estimated": round(loop_s, 1),
+        "speedup": round(loop_s / vector_s, 1) if vector_s else None,
+        "levels_after": what_if["levels"],
+        "changed": what_if["changed"],
+    }
+
+
+def _offline_results(count):
+    """
+    `count` scan results made without a network: the fixture corpus analyzed
+    under every header and cookie profile, cycled with distinct URLs and
+    session cookie values. Every result is its own object, as if it came
+    from a separate scan.
+    """
+    from fixtures import COOKIE_PROFILES, HEADER_PROFILES
+    from scanner import FetchedResponse, analyze_response
+
+    templates = []
+    for kind, body in build_corpus().items():
+        for headers in HEADER_PROFILES.values():
+            for cookies in COOKIE_PROFILES.values():
+                response_headers = dict(headers, **{"Content-Type": "text/html; charset=utf-8"})
+                if cookies:
+                    response_headers["Set-Cookie"] = ", ".join(cookies)
+                url = f"https://h.example/{kind}"
+                templates.append(json.dumps(analyze_response(url, FetchedResponse(url, 200, response_headers, body))))
+    out = []
+    for i in range(count):
+        r = json.loads(templates[i % len(templates)].replace("s3cr3t", f"s3cr3t{i}"))
+        r["url"] = f"https://h{i % 500}.example/page/{i}"
+        out.append(r)
+    return out
+
+
+def bench_records(results=20000):
+    """
+    Memory, size and encode/decode time of `results` scan results kept as
+    plain dicts / JSON Lines vs slotted ScanRecords / the binary .wfr format
+    (results from _offline_results()).
+    """
+    import io
+    import tempfile
+    import tracemalloc
+    from records import RecordSet, RecordWriter, iter_results
+
+    def measure(build):
+        tracemalloc.start()
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return kept, size
+
+    dicts, dict_bytes = measure(lambda: _offline_results(results))
+    records, record_bytes = measure(lambda: _fill_records(RecordSet(), _offline_results(results)))
+
+    start = time.perf_counter()
+    jsonl = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in dicts).encode("utf-8")
+    jsonl_encode_s = time.perf_counter() - start
+    buf = io.BytesIO()
+    start = time.perf_counter()
+    writer = RecordWriter(buf)
+    for r in dicts:
+        writer.write(r)
+    wfr = buf.getvalue()
+    wfr_encode_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for line in jsonl.splitlines():
+        json.loads(line)
+    jsonl_decode_s = time.perf_counter() - start
+    with tempfile.NamedTemporaryFile(suffix=".wfr", delete=False) as f:
+        f.write(wfr)
+    try:
+        start = time.perf_counter()
+        decoded = sum(1 for _ in iter_results(f.name))
+        wfr_decode_s = time.perf_counter() - start
+    finally:
+        os.unlink(f.name)
+    return {
+        "benchmark": "records",
+        "results": results,
+        "table_strings": len(records.table),
+        "memory_mb": {"dicts": round(dict_bytes / 1e6, 1), "records": round(record_bytes / 1e6, 1)},
+        "file_mb": {"jsonl": round(len(jsonl) / 1e6, 2), "wfr": round(len(wfr) / 1e6, 2)},
+        "encode_s": {"jsonl": round(jsonl_encode_s, 3), "wfr": round(wfr_encode_s, 3)},
+        "decode_s": {"jsonl": round(jsonl_decode_s, 3), "wfr": round(wfr_decode_s, 3)},
+        "decoded": decoded,
+    }
+
+
+def _fill_records(record_set, results):
+    for r in results:
+        record_set.add(r)
+    return record_set
+
+
+def bench_headers(requests=400, concurrency=8):
+    """
+    Requests per second of the headers-only fast lane (HEAD, and GET closed
+    after the headers) against full scans, on a local fixture server.
+    """
+    from batch import scan_batch
+    from scanner import analyze_response, fetch_headers, scan_webform
+    from transport import make_session
+
+    page = make_portal_page().encode("utf-8")
+    server, base = start_fixture_server({"page": page})
+    modes = {
+        "full_scan": lambda session: (lambda url: scan_webform(url, session=session)),
+        "headers_head": lambda session: (lambda url: scan_webform(url, session=session, plan="headers")),
+        "headers_get": lambda session: (lambda url: analyze_response(
+            url, fetch_headers(url, session=session, method="GET"), plan="headers")),
+        "headers_head_fallback": lambda session: (lambda url: scan_webform(url, session=session, plan="headers")),
+    }
+    runs = {}
+    try:
+        for name, make_scan in modes.items():
+            path = "/nohead/page" if name == "headers_head_fallback" else "/page"
+            urls = [f"{base}{path}?i={i}&cookies=secure" for i in range(requests)]
+            session = make_session(pool_size=concurrency)
+            scan = make_scan(session)
+            start = time.perf_counter()
+            results = list(scan_batch(urls, workers=concurrency, per_host=concurrency, scan=scan))
+            elapsed = time.perf_counter() - start
+            methods = {}
+            for r in results:
+                m = r["details"].get("fetch", {}).get("method", "GET")
+                methods[m] = methods.get(m, 0) + 1
+            runs[name] = {"seconds": round(elapsed, 3), "requests_per_s": round(requests / elapsed, 1),
+                          "methods": methods, "checks": list(results[0]["checks"])}
+            session.close()
+    finally:
+        server.shutdown()
+    full = runs["full_scan"]["requests_per_s"]
+    for run in runs.values():
+        run["speedup"] = round(run["requests_per_s"] / full, 2)
+    return {"benchmark": "headers", "page_bytes": len(page), "requests": requests,
+            "concurrency": concurrency, "runs": runs}
+
+
+# -----------------------
+# End-to-end suite
+# -----------------------
+
+SUITE_MODES = ("sequential", "batch", "batch_stream", "headers")
+REGRESSION_TOLERANCE = 0.10
+
+
+def _percentiles(values):
+    """Nearest-rank p50/p95/p99 (+ mean and max) of `values` seconds, in milliseconds."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered) + 0.5)) - 1))]
+
+    return {"p50": round(rank(50) * 1000, 2), "p95": round(rank(95) * 1000, 2), "p99": round(rank(99) * 1000, 2),
+            "mean": round(sum(ordered) / len(ordered) * 1000, 2), "max": round(ordered[-1] * 1000, 2)}
+
+
+def _peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)  # bytes on macOS, KiB elsewhere
+
+
+def _run_suite_mode(mode, urls, workers):
+    """One end-to-end run; executed in a fresh process so peak RSS belongs to this mode alone."""
+    from batch import scan_batch
+    from incremental import scan_failed
+    from scanner import scan_webform
+
+    latencies = []
+
+    def timed(url, **options):
+        start = time.perf_counter()
+        result = scan_webform(url, **options)
+        latencies.append(time.perf_counter() - start)
+        return result
+
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    if mode == "sequential":
+        results = [timed(url) for url in urls]
+    else:
+        scan = {"batch": timed, "batch_stream": partial(timed, stream=True),
+                "headers": partial(timed, plan="headers")}[mode]
+        # every fixture URL is on one host, so the per-host cap is lifted to measure the pool
+        results = list(scan_batch(urls, workers=workers, per_host=workers, scan=scan))
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "urls": len(urls),
+        "workers": 1 if mode == "sequential" else workers,
+        "seconds": round(elapsed, 3),
+        "urls_per_s": round(len(urls) / elapsed, 1),
+        "latency_ms": _percentiles(latencies),
+        "cpu_s": round(time.process_time() - cpu_start, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+        "failed": sum(1 for r in results if scan_failed(r)),
+    }
+
+
+def _best_cpu(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def check_cpu_profile(corpus, repeat=3):
+    """
+    CPU milliseconds per page for parsing and for every rule, per page kind.
+    A DOM rule's cost is parse + its visitor minus the bare parse; header and
+    URL rules are timed on their own.
+    """
+    from parsers import analyze_markup, select_backend
+    from scanner import RULES, FetchedResponse
+
+    backend = select_backend()
+    headers = {"Content-Type": "text/html", "Set-Cookie": "sid=1; Path=/; Secure; HttpOnly",
+               "X-Frame-Options": "DENY"}
+    profile = {}
+    for kind, body in corpus.items():
+        html = body.decode("utf-8")
+        response = FetchedResponse("https://fixture.example/", 200, headers, body)
+        parse_s = _best_cpu(lambda: analyze_markup(html, backend=backend, names=()), repeat)
+        costs = {"parse": round(parse_s * 1000, 3)}
+        for name, rule in RULES.items():
+            if rule["needs"] == "dom":
+                with_check = _best_cpu(lambda: analyze_markup(html, backend=backend, names=(rule["dom_check"],)),
+                                       repeat)
+                costs[name] = round(max(with_check - parse_s, 0.0) * 1000, 3)
+            else:
+                loops = 200
+                spent = _best_cpu(lambda: [rule["evaluate"](response.url, response, None) for _ in range(loops)],
+                                  repeat)
+                costs[name] = round(spent / loops * 1000, 4)
+        profile[kind] = costs
+    return profile
+
+
+STARTUP_HEAVY_MODULES = ("requests", "urllib3", "bs4", "lxml", "selectolax", "aiohttp", "numpy", "pyarrow", "scanner")
+
+
+def _startup_commands(workdir, results=200):
+    """Command lines timed by bench_startup(), relative to the src directory."""
+    results_file = os.path.join(workdir, "results.jsonl")
+    with open(results_file, "w", encoding="utf-8") as f:
+        for r in _offline_results(results):
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    return {
+        "interpreter": ["-c", "pass"],
+        "help": ["main.py", "--help"],
+        "report": ["main.py", "report", results_file, "--quiet",
+                   "--markdown", os.path.join(workdir, "report.md")],
+        "import_scanner": ["-c", "import scanner"],
+    }
+
+
+def _imported_modules(args, cwd):
+    """Top-level package names a command imports, from -X importtime (failed imports are listed too)."""
+    out = subprocess.run([sys.executable, "-X", "importtime"] + args, cwd=cwd, capture_output=True, text=True)
+    names = set()
+    for line in out.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            names.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return names
+
+
+def _installed(name):
+    import importlib.util
+    return importlib.util.find_spec(name) is not None
+
+
+def bench_startup(repeat=5):
+    """
+    Cold start: wall time of fresh interpreters running the CLI (--help,
+    report over saved results) and a bare `import scanner`, plus the heavy
+    packages each of them loads. `report` should load none of them.
+    """
+    import tempfile
+
+    src = os.path.dirname(os.path.abspath(__file__))
+    commands = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, args in _startup_commands(workdir).items():
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run([sys.executable] + args, cwd=src, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL, check=True)
+                times.append(time.perf_counter() - start)
+            times.sort()
+            loaded = _imported_modules(args, src)
+            commands[name] = {"ms_best": round(times[0] * 1000, 1),
+                              "ms_median": round(times[len(times) // 2] * 1000, 1),
+                              "heavy_modules": [m for m in STARTUP_HEAVY_MODULES if m in loaded and _installed(m)]}
+    return {"benchmark": "startup", "repeat": repeat, "commands": commands}
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare_reports(baseline, report, tolerance=REGRESSION_TOLERANCE):
+    """
+    Regressions of `report` against a previous suite report: throughput down,
+    p95 latency up, per-check CPU or cold start time up by more than
+    `tolerance`, or a CLI command that now loads heavy packages.
+    """
+    regressions = []
+    old_modes = {m["mode"]: m for m in baseline.get("modes", [])}
+    for mode in report["modes"]:
+        old = old_modes.get(mode["mode"])
+        if not old:
+            continue
+        if mode["urls_per_s"] < old["urls_per_s"] * (1 - tolerance):
+            regressions.append({"mode": mode["mode"], "metric": "urls_per_s",
+                                "baseline": old["urls_per_s"], "current": mode["urls_per_s"]})
+        if mode["latency_ms"].get("p95", 0) > old["latency_ms"].get("p95", 0) * (1 + tolerance):
+            regressions.append({"mode": mode["mode"], "metric": "latency_p95_ms",
+                                "baseline": old["latency_ms"]["p95"], "current": mode["latency_ms"]["p95"]})
+    for kind, costs in report.get("check_cpu_ms", {}).items():
+        for check, ms in costs.items():
+            old = baseline.get("check_cpu_ms", {}).get(kind, {}).get(check)
+            # sub-0.1 ms costs are timer noise
+            if old is not None and ms > 0.1 and ms > old * (1 + tolerance):
+                regressions.append({"page": kind, "metric": f"cpu_ms.{check}", "baseline": old, "current": ms})
+    for name, now in report.get("cold_start", {}).items():
+        old = baseline.get("cold_start", {}).get(name)
+        if not old:
+            continue
+        # process start-up jitter is ~10 ms; pulling in requests/bs4 again costs ~300 ms
+        if now["ms_best"] > old["ms_best"] * (1 + tolerance) and now["ms_best"] - old["ms_best"] > 20:
+            regressions.append({"command": name, "metric": "cold_start_ms",
+                                "baseline": old["ms_best"], "current": now["ms_best"]})
+        added = sorted(set(now["heavy_modules"]) - set(old["heavy_modules"]))
+        if added:
+            regressions.append({"command": name, "metric": "heavy_modules",
+                                "baseline": old["heavy_modules"], "current": now["heavy_modules"]})
+    return regressions
+
+
+def bench_suite(urls=100, workers=8, modes=SUITE_MODES, cpu_repeat=3):
+    """
+    End-to-end benchmark against the local fixture server: every mode scans
+    the same generated URL list (all page kinds, header and cookie variety).
+    """
+    from parsers import select_backend
+
+    corpus = build_corpus()
+    server, base = start_fixture_server(corpus)
+    url_list = corpus_urls(base, urls)
+    runs = []
+    try:
+        for mode in modes:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                runs.append(pool.submit(_run_suite_mode, mode, url_list, workers).result())
+    finally:
+        server.shutdown()
+    return {
+        "benchmark": "suite",
+        "git_commit": _git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "parser": select_backend(),
+        "corpus_bytes": {kind: len(corpus[kind]) for kind in PAGE_KINDS},
+        "modes": runs,
+        "check_cpu_ms": check_cpu_profile({k: v for k, v in corpus.items() if k != "slow"}, repeat=cpu_repeat),
+        "cold_start": bench_startup()["commands"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="WebForm scanner benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p_dom = sub.add_parser("dom", help="single-pass DOM analyzer vs multi-pass checks")
+    p_dom.add_argument("--forms", type=int, default=40)
+    p_dom.add_argument("--links", type=int, default=800)
+    p_dom.add_argument("--scripts", type=int, default=60)
+    p_dom.add_argument("--repeat", type=int, default=5)
+
+    sub.add_parser("parity", help="assert identical check results across parser backends")
+
+    p_parsers = sub.add_parser("parsers", help="per-backend parse + analyze throughput")
+    p_parsers.add_argument("--repeat", type=int, default=5)
+
+    p_sigs = sub.add_parser("signatures", help="tracker engine cost per script byte vs signature count")
+    p_sigs.add_argument("--script-kb", type=int, default=512)
+    p_sigs.add_argument("--repeat", type=int, default=3)
+
+    p_analysis = sub.add_parser("analysis", help="multi-process analysis throughput vs pool size")
+    p_analysis.add_argument("--pages", type=int, default=64)
+    p_analysis.add_argument("--processes", help="comma-separated pool sizes (default: powers of two up to cores)")
+
+    p_portfolio = sub.add_parser("portfolio", help="vectorized what-if re-scoring vs per-result compute_risk")
+    p_portfolio.add_argument("--results", type=int, default=1000000)
+
+    p_records = sub.add_parser("records", help="memory and size of compact result records vs dicts / JSON Lines")
+    p_records.add_argument("--results", type=int, default=20000)
+
+    p_headers = sub.add_parser("headers", help="headers-only fast lane requests/s vs full scans")
+    p_headers.add_argument("--requests", type=int, default=400)
+    p_headers.add_argument("--concurrency", type=int, default=8)
+
+    p_startup = sub.add_parser("startup", help="cold start time of the CLI and the heavy packages it loads")
+    p_startup.add_argument("--repeat", type=int, default=5)
+
+    p_suite = sub.add_parser("suite", help="end-to-end scans against a local fixture server")
+    p_suite.add_argument("--urls", type=int, default=100)
+    p_suite.add_argument("--workers", type=int, default=8)
+    p_suite.add_argument("--modes", default=",".join(SUITE_MODES), help="comma-separated subset of modes")
+    p_suite.add_argument("--output", help="also write the report to this file")
+    p_suite.add_argument("--baseline", help="previous suite report; regressions make the exit status 1")
+
+    args = parser.parse_args(argv)
+    if args.bench == "dom":
+        report = bench_dom(forms=args.forms, links=args.links, scripts=args.scripts, repeat=args.repeat)
+    elif args.bench == "parity":
+        mismatches = check_parity()
+        divergent = [b for b in available_backends() if b in DIVERGENT_BACKENDS]
+        report = {"benchmark": "parity", "backends": [b for b in available_backends() if b not in divergent],
+                  "documents": len(PARITY_CORPUS), "mismatches": mismatches,
+                  # opt-in backends: their differences are listed, not failed on
+                  "divergent": sorted({m["document"] + ": " + m["backend"] for m in check_parity(divergent)})
+                  if divergent else []}
+        if mismatches:
+            json.dump(report, sys.stdout, indent=2)
+            sys.stdout.write("\n")
+            sys.exit(1)
+    elif args.bench == "parsers":
+        report = bench_parsers(repeat=args.repeat)
+    elif args.bench == "signatures":
+        report = bench_signatures(script_kb=args.script_kb, repeat=args.repeat)
+    elif args.bench == "analysis":
+        sizes = [int(n) for n in args.processes.split(",")] if args.processes else None
+        report = bench_analysis(pages=args.pages, processes=sizes)
+    elif args.bench == "portfolio":
+        report = bench_portfolio(results=args.results)
+    elif args.bench == "records":
+        report = bench_records(results=args.results)
+    elif args.bench == "headers":
+        report = bench_headers(requests=args.requests, concurrency=args.concurrency)
+    elif args.bench == "startup":
+        report = bench_startup(repeat=args.repeat)
+    elif args.bench == "suite":
+        report = bench_suite(urls=args.urls, workers=args.workers, modes=args.modes.split(","))
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        if args.baseline:
+            with open(args.baseline, "r", encoding="utf-8") as fh:
+                report["regressions"] = compare_reports(json.load(fh), report)
+            if report["regressions"]:
+                json.dump(report, sys.stdout, indent=2)
+                sys.stdout.write("\n")
+                sys.exit(1)
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# src/cache.py
+"""
+Persistent response cache for nightly rescans.
+
+One SQLite file keyed by URL stores the validators (ETag / Last-Modified),
+response headers, a content fingerprint and the scan_webform() result. The
+body itself is not kept; the fingerprint is all a rescan compares. On the
+next run the scanner sends a conditional request; when the server answers
+304 or the fingerprint is unchanged the stored result is reused and no
+parsing or checks run.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from scanner import SECURITY_HEADERS
+
+DEFAULT_CACHE_PATH = "scan_cache.sqlite"
+DEFAULT_TTL = 30 * 24 * 3600            # entries unused for 30 days are dropped
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024   # stored headers + results
+EVICT_EVERY = 200                       # run eviction every N stores
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url           TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    fingerprint   TEXT NOT NULL,
+    chain         TEXT,
+    status        INTEGER,
+    headers       TEXT NOT NULL,
+    result        TEXT NOT NULL,
+    size          INTEGER NOT NULL,
+    stored_at     REAL NOT NULL,
+    accessed_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at);
+"""
+
+
+def _hash_headers(h, headers):
+    """Feed the security headers and the Set-Cookie attributes into hash `h`."""
+    for name in SECURITY_HEADERS:
+        h.update(b"\0" + (headers.get(name) or "").encode("utf-8", "replace"))
+    for part in (headers.get("Set-Cookie") or "").split(";"):
+        key, _, _ = part.partition("=")
+        key = key.strip().lower()
+        if key in ("expires", "max-age"):
+            continue  # moves with the clock
+        if key in ("samesite", "path", "domain"):
+            key = part.strip().lower()
+        h.update(b"\0" + key.encode("utf-8", "replace"))
+
+
+def chain_fingerprint(response):
+    """
+    Hash of the redirect chain the checks look at: every hop's URL, status,
+    security headers and Set-Cookie attributes, and the final URL. "" when
+    the fetch was not redirected.
+    """
+    history = getattr(response, "history", None) or ()
+    if not history:
+        return ""
+    h = hashlib.sha256()
+    for hop in history:
+        h.update(f"\0{hop.url}\0{hop.status_code}".encode("utf-8", "replace"))
+        _hash_headers(h, hop.headers)
+    h.update(b"\0" + response.url.encode("utf-8", "replace"))
+    return h.hexdigest()
+
+
+def response_fingerprint(response):
+    """
+    Hash of everything the checks look at: the body, the security headers and
+    the Set-Cookie attributes (cookie values are dropped, session IDs change
+    on every request without changing compliance), and the redirect chain.
+    """
+    h = hashlib.sha256()
+    h.update(response.content or b"")
+    _hash_headers(h, response.headers)
+    h.update(b"\0" + chain_fingerprint(response).encode("ascii"))
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe (one connection + lock) so it can be shared by batch workers.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(responses)")}
+        if "chain" not in columns:  # cache files written before redirect chains were checked
+            self._conn.execute("ALTER TABLE responses ADD COLUMN chain TEXT")
+        self._stores_since_evict = 0
+        self.counters = {"revalidated": 0, "unchanged": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    # -----------------------
+    # Lookup / store
+    # -----------------------
+
+    def get(self, url):
+        """Returns the cached entry dict for url (or None if missing/expired)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, fingerprint, status, headers, result, accessed_at, chain "
+                "FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl and time.time() - row[6] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._conn.commit()
+                self.counters["evictions"] += 1
+                return None
+        return {
+            "etag": row[0], "last_modified": row[1], "fingerprint": row[2],
+            "status": row[3], "headers": json.loads(row[4]), "result": json.loads(row[5]),
+            "chain": row[7] or "",
+        }
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url, response, result, fingerprint=None):
+        headers = json.dumps(dict(response.headers))
+        stored = json.dumps(result, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, etag, last_modified, fingerprint, chain, status, headers, result, size, stored_at, "
+                "accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                 fingerprint or response_fingerprint(response), chain_fingerprint(response),
+                 response.status_code, headers, stored, len(stored) + len(headers), now, now))
+            self._conn.commit()
+            self.counters["stores"] += 1
+            self._stores_since_evict += 1
+            due = self._stores_since_evict >= EVICT_EVERY
+        if due:
+            self.evict()
+
+    def record(self, outcome):
+        """Count a lookup outcome: "revalidated" (304), "unchanged" (same fingerprint) or "miss"."""
+        with self._lock:
+            self.counters["misses" if outcome == "miss" else outcome] += 1
+
+    def touch(self, url):
+        with self._lock:
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    # -----------------------
+    # Eviction & stats
+    # -----------------------
+
+    def evict(self):
+        """Drop entries older than ttl, then least recently used ones until under max_bytes."""
+        removed = 0
+        with self._lock:
+            if self.ttl:
+                cur = self._conn.execute("DELETE FROM responses WHERE accessed_at < ?", (time.time() - self.ttl,))
+                removed += cur.rowcount
+            if self.max_bytes:
+                total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > self.max_bytes:
+                    for url, size in self._conn.execute(
+                            "SELECT url, size FROM responses ORDER BY accessed_at").fetchall():
+                        if total <= self.max_bytes:
+                            break
+                        self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                        total -= size
+                        removed += 1
+            self._conn.commit()
+            self._stores_since_evict = 0
+            self.counters["evictions"] += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        stats = dict(self.counters)
+        hits = stats["revalidated"] + stats["unchanged"]
+        lookups = hits + stats["misses"]
+        stats.update({"hits": hits, "hit_rate": (hits / lookups) if lookups else 0.0,
+                      "entries": entries, "bytes": size})
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,426 @@
+# src/crawl.py
+"""
+Site crawl mode.
+
+Starting from a seed URL, pages on the same origin are discovered through
+<a>/<area> links and <form action> targets and every page gets the full
+scan_webform() checks. Links are collected by analyzer.LinkVisitor in the
+same parse as the checks, so discovery costs no extra pass.
+
+The frontier is a FIFO queue (breadth first, so depth limits are exact)
+plus a set of 64-bit URL hashes for deduplication. The hashes cost well under
+100 bytes per seen URL, whatever the URL's length, so sites with 100k+ links fit
+easily. Crawling stops at
+max_depth / max_pages (links beyond what max_pages can still fetch are not
+queued), honours robots.txt (including Crawl-delay) and rate-limits requests
+per host.
+
+    python src/crawl.py https://portal.example.edu/ [--max-pages N] [--max-depth N] [--rate R]
+"""
+import argparse
+import hashlib
+import heapq
+import json
+import posixpath
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import lru_cache
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+
+import instrument
+from analyzer import LinkVisitor
+from incremental import scan_failed
+from parsers import analyze_markup
+from scanner import DEFAULT_HEADERS, analyze_response, compute_risk, fetch_url
+
+DEFAULT_MAX_DEPTH = 3
+DEFAULT_MAX_PAGES = 200
+DEFAULT_CRAWL_WORKERS = 4
+DEFAULT_RATE = 2.0          # requests per second per host
+MAX_LISTED_PAGES = 20       # pages named per list in the site roll-up
+
+# links to these are never HTML pages, so they are not fetched
+SKIP_EXTENSIONS = frozenset([
+    ".7z", ".avi", ".bmp", ".css", ".csv", ".doc", ".docx", ".eot", ".exe", ".gif", ".gz", ".ico",
+    ".jpeg", ".jpg", ".js", ".json", ".mov", ".mp3", ".mp4", ".pdf", ".png", ".ppt", ".pptx",
+    ".rar", ".rss", ".svg", ".tar", ".tgz", ".ttf", ".txt", ".wav", ".webm", ".webp", ".woff",
+    ".woff2", ".xls", ".xlsx", ".xml", ".zip",
+])
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+# -----------------------
+# URLs & frontier
+# -----------------------
+
+@lru_cache(maxsize=65536)  # navigation links repeat on every page of a site
+def normalize_url(url, base=None):
+    """
+    Absolute, canonical form used for dedup: fragment dropped, scheme/host
+    lower-cased, default port removed, empty path -> "/". Returns None for
+    non-HTTP(S) links (mailto:, javascript:, ...) and obvious non-HTML files.
+    """
+    if base:
+        url = urljoin(base, url)
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    netloc = parts.hostname.lower()
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    path = parts.path or "/"
+    if posixpath.splitext(path)[1].lower() in SKIP_EXTENSIONS:
+        return None
+    return urlunsplit((scheme, netloc, path, parts.query, ""))
+
+
+def origin_of(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def url_key(url):
+    """64-bit hash of a normalized URL; collisions are negligible below billions of URLs."""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class Frontier:
+    """FIFO of (url, depth, referrer) with hash-based dedup of everything ever added."""
+    def __init__(self):
+        self.queue = deque()
+        self.seen = set()
+
+    def add(self, url, depth, referrer=None):
+        key = url_key(url)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        self.queue.append((url, depth, referrer))
+        return True
+
+    def mark_seen(self, url):
+        """Record a URL (e.g. a redirect target); True if it was new."""
+        key = url_key(url)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+    def pop(self):
+        return self.queue.popleft()
+
+    def __len__(self):
+        return len(self.queue)
+
+
+# -----------------------
+# Politeness
+# -----------------------
+
+class RateLimiter:
+    """Spaces request starts to the same host at least `interval` seconds apart."""
+    def __init__(self, rate=DEFAULT_RATE):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, host, interval=None):
+        interval = self.interval if interval is None else max(interval, self.interval)
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class RobotsCache:
+    """
+    robots.txt per origin, fetched once through the scanner's session. The
+    lock only guards the table: the first caller for an origin leaves a
+    future there and fetches outside the lock, later callers for that origin
+    wait on the future, and other origins are not held up.
+    """
+    def __init__(self, user_agent=DEFAULT_HEADERS["User-Agent"], session=None):
+        self.user_agent = user_agent
+        self.session = session
+        self.parsers = {}       # origin -> Future of its RobotFileParser
+        self.lock = threading.Lock()
+
+    def _parser(self, url):
+        origin = origin_of(url)
+        with self.lock:
+            fut = self.parsers.get(origin)
+            fetch = fut is None
+            if fetch:
+                fut = self.parsers[origin] = Future()
+        if fetch:
+            try:
+                fut.set_result(self._fetch(origin))
+            except BaseException as e:
+                with self.lock:
+                    del self.parsers[origin]  # let a later call try again
+                fut.set_exception(e)
+                raise
+        return fut.result()
+
+    def _fetch(self, origin):
+        rp = RobotFileParser(origin + "/robots.txt")
+        r = fetch_url(origin + "/robots.txt", session=self.session)
+        if r is not None and r.status_code in (401, 403):
+            rp.disallow_all = True
+        elif r is not None and r.ok:
+            rp.parse(r.text.splitlines())
+        else:
+            rp.allow_all = True  # missing or unreachable robots.txt
+        return rp
+
+    def allowed(self, url):
+        return self._parser(url).can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url):
+        return self._parser(url).crawl_delay(self.user_agent)
+
+
+# -----------------------
+# Crawler
+# -----------------------
+
+def is_html(response):
+    ctype = (response.headers.get("Content-Type") or "").lower()
+    return not ctype or "html" in ctype
+
+
+def crawl_page(url, session=None, parser="auto"):
+    """
+    Fetch and scan one page. Returns (result or None for non-HTML, final URL,
+    [absolute link targets]).
+    """
+    response = fetch_url(url, session=session)
+    if response is None or not response:
+        return analyze_response(url, response, parser=parser), url, []
+    final_url = normalize_url(response.url) or url
+    if not is_html(response):
+        return None, final_url, []
+    html = response.text
+    dom = None
+    links = []
+    timings = {} if instrument.ENABLED else None
+    if html:
+        link_visitor = LinkVisitor()
+        dom = analyze_markup(html, backend=parser, extra={"links": link_visitor}, timings=timings)
+        found = dom.pop("links")
+        base = urljoin(final_url, found["base"]) if found["base"] else final_url
+        # a form without an action submits to the page itself
+        links = dict.fromkeys(found["links"] + [a for a in found["form_actions"] if a])
+        links = [u for u in (normalize_url(link, base) for link in links) if u]
+    return analyze_response(url, response, dom=dom, parser=parser, timings=timings), final_url, links
+
+
+class Crawler:
+    """
+    Breadth-first same-origin crawl. Iterate run() for per-page results;
+    `stats` counts what was fetched, skipped and blocked.
+    allow_hosts: extra hosts (e.g. a separate login host) treated as in scope.
+    """
+    def __init__(self, seed, max_depth=DEFAULT_MAX_DEPTH, max_pages=DEFAULT_MAX_PAGES,
+                 workers=DEFAULT_CRAWL_WORKERS, rate=DEFAULT_RATE, respect_robots=True,
+                 allow_hosts=(), parser="auto", session=None):
+        self.seed = normalize_url(seed)
+        if self.seed is None:
+            raise ValueError(f"Not a crawlable http(s) URL: {seed}")
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.workers = max(1, int(workers))
+        self.parser = parser
+        self.session = session
+        self.scope = {urlsplit(self.seed).netloc} | {h.lower() for h in allow_hosts}
+        self.limiter = RateLimiter(rate)
+        self.robots = RobotsCache(session=session) if respect_robots else None
+        self.frontier = Frontier()
+        self.stats = {"scanned": 0, "failed": 0, "non_html": 0, "duplicates": 0,
+                      "robots_blocked": 0, "discovered": 0, "out_of_scope": 0}
+
+    def in_scope(self, url):
+        return urlsplit(url).netloc in self.scope
+
+    def _visit(self, url):
+        host = urlsplit(url).netloc
+        self.limiter.wait(host, self.robots.crawl_delay(url) if self.robots else None)
+        return crawl_page(url, session=self.session, parser=self.parser)
+
+    def run(self):
+        """Yield one scan result per crawled HTML page (details["crawl"] has depth and referrer)."""
+        self.frontier.add(self.seed, 0)
+        self.stats["discovered"] = 1
+        submitted = 0
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                while len(futures) < self.workers and self.frontier and submitted < self.max_pages:
+                    url, depth, referrer = self.frontier.pop()
+                    if self.robots is not None and not self.robots.allowed(url):
+                        self.stats["robots_blocked"] += 1
+                        continue
+                    futures[pool.submit(self._visit, url)] = (url, depth, referrer)
+                    submitted += 1
+                if not futures:
+                    break
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    url, depth, referrer = futures.pop(fut)
+                    result, final_url, links = fut.result()
+                    if final_url != url and not self.frontier.mark_seen(final_url):
+                        self.stats["duplicates"] += 1  # redirected to a page we already have
+                        continue
+                    if depth == 0:
+                        self.scope.add(urlsplit(final_url).netloc)  # seed redirected (e.g. to www.)
+                    if result is None:
+                        self.stats["non_html"] += 1
+                        continue
+                    if depth < self.max_depth and self.in_scope(final_url):
+                        for link in links:
+                            if submitted + len(self.frontier) >= self.max_pages:
+                                break  # enough pages lined up; the rest are not even hashed
+                            if not self.in_scope(link):
+                                self.stats["out_of_scope"] += 1
+                            elif self.frontier.add(link, depth + 1, final_url):
+                                self.stats["discovered"] += 1
+                    self.stats["failed" if scan_failed(result) else "scanned"] += 1
+                    result["details"]["crawl"] = {"depth": depth, "referrer": referrer}
+                    if final_url != url:
+                        result["details"]["crawl"]["final_url"] = final_url
+                    yield result
+
+
+# -----------------------
+# Site roll-up
+# -----------------------
+
+class SiteRollup:
+    """
+    Aggregates page results in constant memory (apart from the short page lists):
+    the site risk is compute_risk() over every issue found on any page.
+    """
+    def __init__(self, seed):
+        self.seed = seed
+        self.pages = 0
+        self.failed = 0
+        self.issue_pages = {}      # issue -> pages with it (insertion order = first seen)
+        self.levels = {"LOW": 0, "MEDIUM": 0, "HIGH": 0}
+        self.form_pages = 0
+        self.password_pages = 0
+        self.trackers = {}
+        self.worst = []            # min-heap of (score, url)
+        self.forms = []            # first MAX_LISTED_PAGES pages with forms
+
+    def add(self, result):
+        if scan_failed(result):
+            self.failed += 1
+            return
+        self.pages += 1
+        for issue in result["issues"]:
+            self.issue_pages[issue] = self.issue_pages.get(issue, 0) + 1
+        self.levels[result["risk"]["level"]] = self.levels.get(result["risk"]["level"], 0) + 1
+        forms = result["checks"]["forms"].get("meta") or {}
+        if forms.get("forms_count"):
+            self.form_pages += 1
+            if forms.get("password_fields"):
+                self.password_pages += 1
+            if len(self.forms) < MAX_LISTED_PAGES:
+                self.forms.append({"url": result["url"], "forms": forms["forms_count"],
+                                   "password_fields": forms.get("password_fields", 0)})
+        for name in result["checks"]["trackers"].get("meta", {}).get("trackers", []):
+            self.trackers[name] = self.trackers.get(name, 0) + 1
+        entry = (result["risk"]["normalized_score"], result["url"])
+        if len(self.worst) < MAX_LISTED_PAGES:
+            heapq.heappush(self.worst, entry)
+        elif entry > self.worst[0]:
+            heapq.heapreplace(self.worst, entry)
+
+    def summary(self):
+        risk = compute_risk(list(self.issue_pages))
+        risk.pop("level_color", None)
+        return {
+            "seed": self.seed,
+            "pages_scanned": self.pages,
+            "pages_failed": self.failed,
+            "site_risk": risk,
+            "issue_pages": self.issue_pages,
+            "page_levels": self.levels,
+            "pages_with_forms": self.form_pages,
+            "pages_with_password_fields": self.password_pages,
+            "trackers": self.trackers,
+            "highest_risk_pages": [{"url": u, "normalized_score": s} for s, u in sorted(self.worst, reverse=True)],
+            "form_pages": self.forms,
+        }
+
+
+def crawl_summary_filename(seed):
+    parts = urlsplit(seed)
+    safe = re.sub(r"[^a-zA-Z0-9_\-\.]", "_", parts.netloc + parts.path).strip("_")
+    return f"crawl_summary_{safe}.json"
+
+
+def crawl_site(seed, sink=None, **options):
+    """
+    Crawl `seed` (options as for Crawler) and return the site summary dict.
+    sink: optional object with write(result) (see sinks.py) receiving every page result.
+    """
+    crawler = Crawler(seed, **options)
+    rollup = SiteRollup(crawler.seed)
+    for result in crawler.run():
+        rollup.add(result)
+        if sink is not None:
+            sink.write(result)
+    summary = rollup.summary()
+    summary["crawl"] = dict(crawler.stats, frontier_left=len(crawler.frontier))
+    return summary
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Crawl a site and scan every page found")
+    ap.add_argument("seed", help="start URL")
+    ap.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH)
+    ap.add_argument("--max-pages", type=int, default=DEFAULT_MAX_PAGES)
+    ap.add_argument("--workers", type=int, default=DEFAULT_CRAWL_WORKERS)
+    ap.add_argument("--rate", type=float, default=DEFAULT_RATE, help="max requests per second per host")
+    ap.add_argument("--allow-host", action="append", default=[], help="extra host to crawl (repeatable)")
+    ap.add_argument("--ignore-robots", action="store_true")
+    ap.add_argument("--parser", default="auto")
+    ap.add_argument("--jsonl", help="also write every page result to this JSON Lines file")
+    ap.add_argument("--output", help="site summary file (default: crawl_summary_<site>.json)")
+    args = ap.parse_args(argv)
+
+    sink = None
+    if args.jsonl:
+        from sinks import JsonlSink
+        sink = JsonlSink(args.jsonl)
+    try:
+        summary = crawl_site(args.seed, sink=sink, max_depth=args.max_depth, max_pages=args.max_pages,
+                             workers=args.workers, rate=args.rate, respect_robots=not args.ignore_robots,
+                             allow_hosts=args.allow_host, parser=args.parser)
+    finally:
+        if sink is not None:
+            sink.close()
+    filename = args.output or crawl_summary_filename(summary["seed"])
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    risk = summary["site_risk"]
+    print(f"Crawled {summary['pages_scanned']} page(s) ({summary['pages_failed']} failed), "
+          f"{summary['pages_with_forms']} with forms")
+    print(f"Site risk: {risk['level']} ({risk['normalized_score']}/25)")
+    print(f"Site summary written to {filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# src/fixtures.py
+"""
+Synthetic page corpus and local fixture server for the benchmarks.
+
+The corpus is deterministic (seeded), so numbers can be compared between
+commits. Page kinds:
+
+    small     a plain contact page with one form
+    huge      ~2 MB of navigation, tables and text
+    forms     "university portal": dozens of forms with hundreds of inputs
+    scripts   many inline and external scripts, tracker snippets included
+    slow      a small page served after an injected delay
+
+The server speaks HTTP/1.1 with keep-alive and serves GET and HEAD:
+
+    /<kind>/<n>?delay=MS&headers=PROFILE&cookies=PROFILE
+
+headers: none | partial | strict    (which security headers are sent)
+cookies: none | secure | insecure | many   (Set-Cookie variety)
+Paths under /nohead/ answer HEAD with 405, like servers that mishandle it.
+/redirect/<path> answers 302 to /<path> (repeat the prefix for longer chains);
+rcookies=PROFILE sets cookies on the redirect responses.
+"""
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PAGE_KINDS = ("small", "huge", "forms", "scripts", "slow")
+SLOW_DELAY_MS = 200
+
+HEADER_PROFILES = {
+    "none": {},
+    "partial": {
+        "X-Frame-Options": "DENY",
+        "Strict-Transport-Security": "max-age=63072000",
+    },
+    "strict": {
+        "Content-Security-Policy": "default-src 'self'",
+        "Strict-Transport-Security": "max-age=63072000; includeSubDomains",
+        "X-Frame-Options": "DENY",
+        "X-Content-Type-Options": "nosniff",
+        "Referrer-Policy": "no-referrer",
+        "Permissions-Policy": "geolocation=()",
+    },
+}
+
+COOKIE_PROFILES = {
+    "none": [],
+    "secure": ["sid=s3cr3t; Path=/; Secure; HttpOnly; SameSite=Lax"],
+    "insecure": ["track=1; Path=/"],
+    "many": [
+        "sid=s3cr3t; Path=/; Secure; HttpOnly; SameSite=Strict",
+        "csrftoken=abc; Path=/; Secure; SameSite=Lax",
+        "_ga=GA1.2.1; Path=/; Domain=.example.edu; Max-Age=63072000",
+        "lang=en; Path=/",
+        "consent=0; Path=/; Expires=Wed, 21 Oct 2037 07:28:00 GMT; HttpOnly",
+    ],
+}
+
+
+# -----------------------
+# Pages
+# -----------------------
+
+def make_portal_page(forms=40, inputs_per_form=12, links=800, scripts=60, seed=1):
+    """
+    Build a large "university portal" style page: many forms, a long
+    navigation, lots of inline/external scripts and a privacy link near the end.
+    """
+    rnd = random.Random(seed)
+    out = ["<!DOCTYPE html><html><head><title>Portal</title>"]
+    for i in range(scripts):
+        if i % 3 == 0:
+            out.append(f'<script src="/static/js/bundle{i}.js"></script>')
+        else:
+            out.append("<script>var x%d = %d; function f%d(a){return a*%d;}</script>" % (i, i, i, rnd.randint(1, 99)))
+    if scripts:
+        out.append('<script src="https://www.googletagmanager.com/gtm.js?id=GTM-X"></script>')
+    out.append("</head><body><nav><ul>")
+    for i in range(links):
+        out.append(f'<li><a href="/page/{i}">Section <b>{i}</b></a></li>')
+    out.append("</ul></nav><main>")
+    for i in range(forms):
+        action = "http://legacy.example.edu/submit" if i % 7 == 0 else f"/submit/{i}"
+        out.append(f'<form action="{action}" method="post"><fieldset>')
+        for j in range(inputs_per_form):
+            kind = rnd.choice(["text", "email", "password", "hidden", "checkbox"])
+            name = "csrfmiddlewaretoken" if (kind == "hidden" and j % 2) else f"field_{i}_{j}"
+            out.append(f'<label for="f{i}_{j}">Field {j}</label><input type="{kind}" name="{name}" id="f{i}_{j}">')
+        out.append("</fieldset><button>Send</button></form>")
+    out.append('</main><footer><a href="/legal">Privacy &amp; Terms</a></footer></body></html>')
+    return "".join(out)
+
+
+def make_small_page():
+    return ('<!DOCTYPE html><html><head><title>Contact</title></head><body>'
+            '<h1>Contact us</h1><form action="/contact" method="post">'
+            '<input name="email" type="email"><input type="hidden" name="csrf_token" value="t">'
+            '<input type="checkbox" name="consent"> I agree</form>'
+            '<footer><a href="/privacy">Privacy policy</a></footer></body></html>')
+
+
+def make_huge_page(target_bytes=2 * 1024 * 1024, seed=5):
+    rnd = random.Random(seed)
+    words = ["student", "course", "library", "research", "campus", "admission", "faculty", "event"]
+    out = ["<!DOCTYPE html><html><head><title>Archive</title></head><body><nav>"]
+    size = 0
+    i = 0
+    while size < target_bytes:
+        text = " ".join(rnd.choice(words) for _ in range(40))
+        chunk = (f'<section><h2>Item {i}</h2><p>{text}</p><table><tr><td>{i}</td><td>{text[:60]}</td></tr>'
+                 f'</table><a href="/archive/{i}">more</a></section>')
+        out.append(chunk)
+        size += len(chunk)
+        i += 1
+    out.append('</nav><footer><a href="/privacy">Privacy</a></footer></body></html>')
+    return "".join(out)
+
+
+def make_script_page(scripts=150, seed=6):
+    rnd = random.Random(seed)
+    snippets = [
+        "window.dataLayer=window.dataLayer||[];function gtag(){dataLayer.push(arguments)}gtag('js',new Date());",
+        "!function(f,b,e,v,n,t,s){if(f.fbq)return;n=f.fbq=function(){}}(window,document);fbq('init','1');",
+        "(function(h,o,t,j,a,r){h.hj=h.hj||function(){};})(window,document,'https://static.hotjar.com/c/hotjar-','.js?sv=');",
+        "var app = {init: function(){ return [1,2,3].map(function(x){ return x * 2; }); }}; app.init();",
+    ]
+    out = ["<!DOCTYPE html><html><head><title>Landing</title>"]
+    for i in range(scripts):
+        if i % 4 == 0:
+            out.append(f'<script src="/assets/vendor{i}.js" async></script>')
+        else:
+            body = " ".join(rnd.choice(snippets) for _ in range(8))
+            out.append(f"<script>{body}</script>")
+    out.append('<script src="https://www.googletagmanager.com/gtag/js?id=G-1"></script>'
+               '<link rel="preconnect" href="https://connect.facebook.net"></head><body>'
+               '<form action="/newsletter"><input name="email"></form></body></html>')
+    return "".join(out)
+
+
+def build_corpus():
+    """{kind: page bytes} for every PAGE_KINDS entry."""
+    small = make_small_page().encode("utf-8")
+    return {
+        "small": small,
+        "huge": make_huge_page().encode("utf-8"),
+        "forms": make_portal_page().encode("utf-8"),
+        "scripts": make_script_page().encode("utf-8"),
+        "slow": small,
+    }
+
+
+def corpus_urls(base, count, kinds=PAGE_KINDS, seed=7):
+    """
+    `count` fixture URLs cycling through the page kinds, with header and
+    cookie profiles rotated so every combination shows up.
+    """
+    rnd = random.Random(seed)
+    headers = list(HEADER_PROFILES)
+    cookies = list(COOKIE_PROFILES)
+    urls = []
+    for i in range(count):
+        kind = kinds[i % len(kinds)]
+        query = f"headers={headers[i % len(headers)]}&cookies={cookies[rnd.randrange(len(cookies))]}"
+        if kind == "slow":
+            query += f"&delay={SLOW_DELAY_MS}"
+        urls.append(f"{base}/{kind}/{i}?{query}")
+    return urls
+
+
+# -----------------------
+# Server
+# -----------------------
+
+def start_fixture_server(pages=None):
+    """
+    Serve the corpus (or `pages`: {kind: bytes}) from a local HTTP/1.1
+    keep-alive server in a daemon thread. Returns (server, base_url); call
+    server.shutdown() when done.
+    """
+    pages = build_corpus() if pages is None else pages
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self, with_body):
+            parts = urlsplit(self.path)
+            segments = [p for p in parts.path.split("/") if p]
+            query = parse_qs(parts.query)
+            if segments and segments[0] == "redirect":
+                self.send_response(302)
+                self.send_header("Location", "/" + "/".join(segments[1:]) + ("?" + parts.query if parts.query else ""))
+                for cookie in COOKIE_PROFILES.get(query.get("rcookies", ["none"])[0], []):
+                    self.send_header("Set-Cookie", cookie)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if segments and segments[0] == "nohead":
+                segments = segments[1:]
+                if not with_body:
+                    self.send_response(405)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+            page = pages.get(segments[0]) if segments else None
+            if page is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            delay = int(query.get("delay", ["0"])[0])
+            if delay:
+                time.sleep(delay / 1000.0)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(page)))
+            for name, value in HEADER_PROFILES.get(query.get("headers", ["partial"])[0], {}).items():
+                self.send_header(name, value)
+            for cookie in COOKIE_PROFILES.get(query.get("cookies", ["none"])[0], []):
+                self.send_header("Set-Cookie", cookie)
+            self.end_headers()
+            if with_body:
+                self.wfile.write(page)
+
+        def do_GET(self):
+            self._respond(True)
+
+        def do_HEAD(self):
+            self._respond(False)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+
+        def handle_error(self, request, client_address):
+            pass  # clients that close after the headers reset the connection mid-body
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,258 @@
+# src/incremental.py
+"""
+Incremental rescans against the previous compliance_summary_*.json files.
+
+The existing per-URL summaries are loaded as a baseline index. URLs that are
+new, due (summary older than max_age) or failed last time get a full rescan.
+The fresh ones are checked for changes cheaply, and rescanned only if they
+changed:
+
+    with a response cache   a conditional GET (ETag / Last-Modified) per URL,
+                            which sees any change to the page
+    without one             a HEAD probe (scanner.fetch_headers): a status or
+                            header-derived check that differs from the summary,
+                            or a Last-Modified newer than the summary, counts as
+                            changed. A body-only change on a server that sends
+                            no Last-Modified shows up once the URL is due.
+
+The run writes fresh summaries plus one compact delta file with new issues,
+resolved issues and risk-level transitions.
+
+    python src/incremental.py [--dir DIR] [--max-age-hours H] [--cache FILE] [--no-probe] [urls.txt]
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from email.utils import parsedate_to_datetime
+from functools import partial
+
+from batch import DEFAULT_PER_HOST, DEFAULT_WORKERS, scan_batch
+from scanner import (NO_RESPONSE_MSG, analyze_response, fetch_headers, generate_json_report, json_report_filename,
+                     scan_webform)
+
+DEFAULT_MAX_AGE = 24 * 3600
+LEVEL_ORDER = {"LOW": 0, "MEDIUM": 1, "HIGH": 2}
+
+
+def load_baseline(directory="."):
+    """
+    Returns {url: {"result": dict, "scanned_at": epoch seconds, "path": str}}.
+    The summary file's mtime is taken as the time of that scan.
+    """
+    baseline = {}
+    for path in glob.glob(os.path.join(directory, "compliance_summary_*.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                result = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        url = result.get("url")
+        if not url:
+            continue
+        scanned_at = os.path.getmtime(path)
+        if url not in baseline or scanned_at > baseline[url]["scanned_at"]:
+            baseline[url] = {"result": result, "scanned_at": scanned_at, "path": path}
+    return baseline
+
+
+def scan_failed(result):
+    """
+    True when the scan got no usable answer: it raised, got no response or an
+    HTTP error status. Read from details["status"], so it holds for every rule
+    plan; summaries written before the status was recorded fall back to the
+    forms check message.
+    """
+    if "error" in result:
+        return True
+    details = result.get("details", {})
+    if "status" not in details:
+        return result.get("checks", {}).get("forms", {}).get("msg") == NO_RESPONSE_MSG
+    return details["status"] is None or details["status"] >= 400
+
+
+def plan_rescan(urls, baseline, max_age=DEFAULT_MAX_AGE, now=None):
+    """
+    Split URLs into those needing a full rescan and the rest.
+    Returns (to_scan: [(url, reason)], fresh: [url]) with reason in new / due / failed.
+    """
+    now = time.time() if now is None else now
+    to_scan, fresh = [], []
+    for url in urls:
+        entry = baseline.get(url)
+        if entry is None:
+            to_scan.append((url, "new"))
+        elif scan_failed(entry["result"]):
+            to_scan.append((url, "failed"))
+        elif now - entry["scanned_at"] >= max_age:
+            to_scan.append((url, "due"))
+        else:
+            fresh.append(url)
+    return to_scan, fresh
+
+
+def probe_headers(url):
+    """
+    Headers-only scan of `url` (HEAD, or a GET closed after the headers), with
+    the page's Last-Modified kept in details["last_modified"]: the cheap change
+    check for fresh URLs when there is no response cache.
+    """
+    response = fetch_headers(url)
+    result = analyze_response(url, response, plan="headers")
+    last_modified = response.headers.get("Last-Modified") if response is not None else None
+    if last_modified:
+        result["details"]["last_modified"] = last_modified
+    return result
+
+
+def probe_changed(entry, probe):
+    """
+    True when a probe_headers() result says the page changed since the baseline
+    `entry` ({"result", "scanned_at"}): the fetch failed, Last-Modified is newer
+    than the summary, or a header-derived check reads differently.
+    """
+    status = probe["details"].get("status")
+    if status is None or status >= 400:
+        return True
+    try:
+        modified = parsedate_to_datetime(probe["details"]["last_modified"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        modified = None
+    if modified is not None and modified > entry["scanned_at"]:
+        return True
+    old = entry["result"].get("checks", {})
+    # ok + message, not meta: cookie values change on every response
+    return any((check["ok"], check["msg"]) != (old.get(name, {}).get("ok"), old.get(name, {}).get("msg"))
+               for name, check in probe["checks"].items())
+
+
+def diff_results(old, new):
+    """
+    Compact per-URL delta, or None when issues and risk level are unchanged.
+    """
+    old_issues = set(old.get("issues", [])) if old else set()
+    new_issues = set(new.get("issues", []))
+    old_level = old["risk"]["level"] if old else None
+    new_level = new["risk"]["level"]
+    added = [i for i in new.get("issues", []) if i not in old_issues]
+    resolved = [i for i in (old.get("issues", []) if old else []) if i not in new_issues]
+    if old and not added and not resolved and old_level == new_level:
+        return None
+    delta = {"url": new["url"], "new_issues": added, "resolved_issues": resolved}
+    if old_level != new_level:
+        delta["risk"] = {
+            "from": old_level, "to": new_level,
+            "score_from": old["risk"]["normalized_score"] if old else None,
+            "score_to": new["risk"]["normalized_score"],
+        }
+    # first sightings are reported but never counted as regressions
+    delta["regression"] = old is not None and (
+        bool(added) or LEVEL_ORDER.get(new_level, 0) > LEVEL_ORDER.get(old_level, 0))
+    return delta
+
+
+def run_incremental(urls=None, directory=".", max_age=DEFAULT_MAX_AGE, cache=None,
+                    workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, delta_filename=None,
+                    baseline=None, scan=None, on_result=None, probe=probe_headers):
+    """
+    Rescan what is due or changed, refresh summaries in `directory` and write the delta file.
+    urls: URLs to consider (defaults to every URL in the baseline).
+    cache: optional cache.ResponseCache; when given, fresh URLs are revalidated with it.
+    baseline: {url: {"result", "scanned_at"}} to compare against instead of the summaries in `directory`.
+    scan: scan callable (default scan_webform, with `cache`); it must use `cache` itself when given.
+    on_result: called with every scanned result instead of writing summaries to `directory`.
+    probe: without a cache, the change check for fresh URLs (see probe_changed());
+    None skips it, and fresh URLs are then only rescanned once due.
+    Returns the delta dict (also written to `delta_filename`).
+    """
+    if baseline is None:
+        baseline = load_baseline(directory)
+    urls = list(baseline) if urls is None else list(dict.fromkeys(urls))
+    to_scan, fresh = plan_rescan(urls, baseline, max_age=max_age)
+    reasons = {url: reason for url, reason in to_scan}
+    counts = {}
+    probed_unchanged = 0
+    if cache is not None:
+        for url in fresh:
+            reasons[url] = "revalidate"
+    elif probe is not None and fresh:
+        for result in scan_batch(fresh, workers=workers, per_host=per_host, ordered=False, scan=probe):
+            if probe_changed(baseline[result["url"]], result):
+                reasons[result["url"]] = "changed"
+            else:
+                probed_unchanged += 1
+        if probed_unchanged:
+            counts["unchanged"] = probed_unchanged
+
+    if scan is None:
+        scan = partial(scan_webform, cache=cache) if cache is not None else scan_webform
+    changes = []
+    for result in scan_batch(list(reasons), workers=workers, per_host=per_host, scan=scan):
+        url = result["url"]
+        reason = reasons[url]
+        if reason == "revalidate" and result["details"].get("cache") in ("revalidated", "unchanged"):
+            reason = "unchanged"
+        elif reason == "revalidate":
+            reason = "changed"
+        counts[reason] = counts.get(reason, 0) + 1
+        if on_result is not None:
+            on_result(result)
+        elif reason != "unchanged":
+            generate_json_report(result, filename=os.path.join(directory, json_report_filename(url)))
+        old = baseline.get(url, {}).get("result")
+        delta = diff_results(old, result)
+        if delta:
+            delta["reason"] = reason
+            changes.append(delta)
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "baseline_urls": len(baseline),
+        "considered": len(urls),
+        "rescanned": sum(v for k, v in counts.items() if k != "unchanged"),
+        "skipped": len(urls) - len(reasons) - probed_unchanged,
+        "reasons": counts,
+        "regressions": [d["url"] for d in changes if d["regression"]],
+        "changes": changes,
+    }
+    if delta_filename is None:
+        delta_filename = os.path.join(directory, f"compliance_delta_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(delta_filename, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False)
+    report["delta_file"] = delta_filename
+    return report
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Incremental rescan against previous compliance summaries")
+    ap.add_argument("urls_file", nargs="?", help="URLs to consider (one per line); default: baseline URLs")
+    ap.add_argument("--dir", default=".", help="directory holding compliance_summary_*.json")
+    ap.add_argument("--max-age-hours", type=float, default=DEFAULT_MAX_AGE / 3600)
+    ap.add_argument("--cache", help="response cache file; fresh URLs are revalidated with conditional GETs")
+    ap.add_argument("--no-probe", action="store_true",
+                    help="without --cache, do not HEAD-probe fresh URLs for changes (rescan them once due)")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    ap.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+    args = ap.parse_args(argv)
+
+    urls = None
+    if args.urls_file:
+        with open(args.urls_file, "r", encoding="utf-8") as fh:
+            urls = [line.strip() for line in fh if line.strip()]
+    cache = None
+    if args.cache:
+        from cache import ResponseCache
+        cache = ResponseCache(args.cache)
+    report = run_incremental(urls, directory=args.dir, max_age=args.max_age_hours * 3600, cache=cache,
+                             workers=args.workers, per_host=args.per_host,
+                             probe=None if args.no_probe else probe_headers)
+    print(f"Rescanned {report['rescanned']} URL(s), skipped {report['skipped']}, "
+          f"{len(report['changes'])} change(s), {len(report['regressions'])} regression(s)")
+    print(f"Delta written to {report['delta_file']}")
+    if cache is not None:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+# src/instrument.py
+"""
+Optional scan instrumentation: where did the time (and the bytes) go?
+
+Off by default. With SCAN_TIMINGS=1 in the environment, or enable() before
+scanning, every result dict gets a "timings" entry:
+
+    {
+      "total_s": 0.412,
+      "stages": {"fetch.dns_tcp": .., "fetch.tls": .., "fetch.wait": .., "fetch.transfer": ..,
+                 "parse": .., "resources": .., "checks": .., "score": ..},
+      "checks": {"forms": .., "cookies": .., ...},     # visitor time + rule evaluation
+      "bytes": {"body": 88611, "headers": 412},
+      "hops": 1
+    }
+
+fetch.wait is the time from request sent to response headers (server think
+time plus one round trip); fetch.transfer is the body download. In streaming
+scans parsing happens while the body downloads and is counted in
+fetch.transfer. Stages a scan did not go through are left out.
+
+Across a batch, Histograms aggregates the timings and renders them in the
+Prometheus text format; otel_spans()/SpanWriter turn a result into
+OpenTelemetry-style spans (OTLP JSON, one request per line).
+
+When disabled the hot paths only test ENABLED, so the overhead is a module
+attribute lookup per fetch and per analysis.
+"""
+import json
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("SCAN_TIMINGS", "").strip().lower() not in ("", "0", "false", "no")
+
+# seconds; Prometheus-style cumulative upper bounds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FETCH_STAGES = ("fetch.dns_tcp", "fetch.tls", "fetch.wait", "fetch.transfer")
+ANALYSIS_STAGES = ("parse", "resources", "checks", "score")
+SERVICE_NAME = "webform-privacy-compliance-checker"
+
+
+def enable(on=True):
+    """Switch instrumentation on or off for this process and the processes it starts."""
+    global ENABLED
+    ENABLED = bool(on)
+    if on:
+        os.environ["SCAN_TIMINGS"] = "1"  # inherited by process pools (pipeline.py)
+    else:
+        os.environ.pop("SCAN_TIMINGS", None)
+
+
+def enabled():
+    return ENABLED
+
+
+# -----------------------
+# Recording
+# -----------------------
+
+def fetch_details(response, connect_s, socket_s, stream):
+    """
+    Extra fetch_timing fields recorded while instrumentation is on: DNS+TCP
+    vs TLS split of the connect time, time to response headers and byte counts.
+    """
+    hops = list(getattr(response, "history", None) or []) + [response]
+    headers_s = sum(h.elapsed.total_seconds() for h in hops if getattr(h, "elapsed", None) is not None)
+    header_bytes = sum(len(k) + len(v) + 4 for h in hops for k, v in h.headers.items())
+    details = {
+        "dns_tcp_s": round(socket_s, 6),
+        "tls_s": round(max(connect_s - socket_s, 0.0), 6),
+        "wait_s": round(max(headers_s - connect_s, 0.0), 6),
+        "header_bytes": header_bytes,
+        "hops": len(hops),
+    }
+    if not stream:
+        details["body_bytes"] = len(response.content)
+    return details
+
+
+class ScanTimer:
+    """
+    Collects the analysis-side timings of one scan; finish() merges them with
+    the response's fetch_timing into the result's "timings" dict.
+
+    dom: the timings dict handed to analyze_markup()/analyze_html() (parse_s,
+    dom_checks, markup_s), filled here or by the caller that parsed the page.
+    """
+    __slots__ = ("dom", "stages", "checks", "start", "mark", "parsed_here")
+
+    def __init__(self, dom=None):
+        self.dom = {} if dom is None else dom
+        self.stages = {}
+        self.checks = {}
+        self.start = self.mark = time.perf_counter()
+        self.parsed_here = False
+
+    def lap(self, stage):
+        """Record the time since the previous lap (or the start) under `stage`."""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + now - self.mark
+        self.mark = now
+
+    def check(self, name, seconds, dom_check=None):
+        visitor = self.dom.get("dom_checks", {}).get(dom_check, 0.0) if dom_check else 0.0
+        self.checks[name] = self.checks.get(name, 0.0) + seconds + visitor
+
+    def finish(self, response=None, body=None):
+        analysis = time.perf_counter() - self.start
+        stages = {}
+        fetch = getattr(response, "fetch_timing", None) or {}
+        dom_checks = self.dom.get("dom_checks", {})
+        visitors = sum(dom_checks.values())
+        if fetch:
+            wait = fetch.get("wait_s", 0.0)
+            transfer = fetch.get("transfer_s", 0.0) - wait
+            if dom_checks and "markup_s" not in self.dom:
+                transfer -= visitors  # streamed: the visitors ran during the download
+            stages["fetch.dns_tcp"] = fetch.get("dns_tcp_s", 0.0)
+            stages["fetch.tls"] = fetch.get("tls_s", 0.0)
+            stages["fetch.wait"] = wait
+            stages["fetch.transfer"] = max(transfer, 0.0)
+        if "parse_s" in self.dom:
+            stages["parse"] = self.dom["parse_s"]
+        if "resources_s" in self.dom:
+            stages["resources"] = self.dom["resources_s"]
+        stages["checks"] = visitors + self.stages.get("rules", 0.0)
+        stages["score"] = self.stages.get("score", 0.0)
+
+        total = fetch.get("total_s", 0.0) + analysis
+        if not self.parsed_here:
+            # the page was parsed before analyze_response() (crawler, deep checks)
+            total += self.dom.get("markup_s", 0.0) + self.dom.get("resources_s", 0.0)
+        body_bytes = fetch.get("body_bytes")
+        if body is not None:
+            body_bytes = body.get("bytes_read", 0)
+        return {
+            "total_s": round(total, 6),
+            "stages": {k: round(v, 6) for k, v in stages.items()},
+            "checks": {k: round(v, 6) for k, v in self.checks.items()},
+            "bytes": {"body": body_bytes or 0, "headers": fetch.get("header_bytes", 0)},
+            "hops": fetch.get("hops", 1 if fetch else 0),
+        }
+
+
+# -----------------------
+# Batch aggregation
+# -----------------------
+
+class Histograms:
+    """
+    Thread-safe aggregate of result timings: one histogram per stage, per
+    check and for the scan total, plus byte counters.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.series = {}     # (family, label) -> [bucket counts..., +Inf count], sum
+        self.bytes = {"body": 0, "headers": 0}
+        self.scans = 0
+
+    def _observe(self, family, label, seconds):
+        key = (family, label)
+        entry = self.series.get(key)
+        if entry is None:
+            entry = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        counts = entry[0]
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        entry[1] += seconds
+
+    def observe(self, result):
+        """Add one result; results without a "timings" entry are ignored."""
+        timings = result.get("timings")
+        if not timings:
+            return
+        with self._lock:
+            self.scans += 1
+            self._observe("scan", "", timings["total_s"])
+            for stage, seconds in timings["stages"].items():
+                self._observe("stage", stage, seconds)
+            for check, seconds in timings["checks"].items():
+                self._observe("check", check, seconds)
+            for part, n in timings.get("bytes", {}).items():
+                self.bytes[part] = self.bytes.get(part, 0) + n
+
+    def _cumulative(self, counts):
+        out, running = [], 0
+        for n in counts:
+            running += n
+            out.append(running)
+        return out
+
+    def quantile(self, family, label, q):
+        """Upper bucket bound below which a fraction q of the observations fall (None if empty)."""
+        entry = self.series.get((family, label))
+        if entry is None:
+            return None
+        cumulative = self._cumulative(entry[0])
+        target = q * cumulative[-1]
+        for bound, running in zip(self.buckets, cumulative):
+            if running >= target:
+                return bound
+        return float("inf")
+
+    def as_dict(self):
+        with self._lock:
+            out = {"scans": self.scans, "bytes": dict(self.bytes), "stage": {}, "check": {}, "scan": {}}
+            for (family, label), (counts, total) in sorted(self.series.items()):
+                n = sum(counts)
+                out[family][label or "total"] = {
+                    "count": n,
+                    "sum_s": round(total, 6),
+                    "mean_s": round(total / n, 6) if n else 0.0,
+                    "p50_le": self.quantile(family, label, 0.50),
+                    "p95_le": self.quantile(family, label, 0.95),
+                }
+            return out
+
+    def to_prometheus(self, prefix="webform_scan"):
+        """Prometheus text exposition format (version 0.0.4)."""
+        families = (
+            ("scan", f"{prefix}_seconds", None, "Total time per scan (fetch and analysis)."),
+            ("stage", f"{prefix}_stage_seconds", "stage", "Time per scan stage."),
+            ("check", f"{prefix}_check_seconds", "check", "Time per check (DOM visitor and rule evaluation)."),
+        )
+        lines = []
+        with self._lock:
+            for family, metric, label_name, help_text in families:
+                keys = sorted(k for k in self.series if k[0] == family)
+                if not keys:
+                    continue
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} histogram")
+                for key in keys:
+                    counts, total = self.series[key]
+                    label = f'{label_name}="{key[1]}",' if label_name else ""
+                    cumulative = self._cumulative(counts)
+                    for bound, running in zip(self.buckets, cumulative):
+                        lines.append(f'{metric}_bucket{{{label}le="{bound:g}"}} {running}')
+                    lines.append(f'{metric}_bucket{{{label}le="+Inf"}} {cumulative[-1]}')
+                    plain = f"{{{label.rstrip(',')}}}" if label else ""
+                    lines.append(f"{metric}_sum{plain} {total:.6f}")
+                    lines.append(f"{metric}_count{plain} {cumulative[-1]}")
+            lines.append(f"# HELP {prefix}_bytes_total Bytes received, by part of the response.")
+            lines.append(f"# TYPE {prefix}_bytes_total counter")
+            for part, n in sorted(self.bytes.items()):
+                lines.append(f'{prefix}_bytes_total{{part="{part}"}} {n}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, prefix="webform_scan"):
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(self.to_prometheus(prefix))
+        return path
+
+
+# -----------------------
+# OpenTelemetry-style spans
+# -----------------------
+
+def _attr(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def otel_spans(result, end_ns=None, trace_id=None):
+    """
+    OTLP/JSON span dicts for one result: a root "scan" span with the fetch and
+    analysis stages as children laid end to end. Check spans are the summed
+    time of each check (visitors run interleaved during the parse) and carry
+    the attribute scan.aggregated=true. Returns [] if the result has no timings.
+    """
+    timings = result.get("timings")
+    if not timings:
+        return []
+    end_ns = time.time_ns() if end_ns is None else end_ns
+    trace_id = trace_id or os.urandom(16).hex()
+    start_ns = end_ns - int(timings["total_s"] * 1e9)
+    root_id = os.urandom(8).hex()
+    spans = [{
+        "traceId": trace_id, "spanId": root_id, "name": "scan", "kind": 1,
+        "startTimeUnixNano": str(start_ns), "endTimeUnixNano": str(end_ns),
+        "attributes": [_attr("url.full", result.get("url", "")),
+                       _attr("http.response.body.size", timings["bytes"]["body"]),
+                       _attr("scan.hops", timings.get("hops", 0)),
+                       _attr("scan.risk_level", result.get("risk", {}).get("level", ""))],
+    }]
+
+    def child(name, offset_ns, seconds, parent, attributes=()):
+        duration = int(seconds * 1e9)
+        spans.append({
+            "traceId": trace_id, "spanId": os.urandom(8).hex(), "parentSpanId": parent, "name": name, "kind": 1,
+            "startTimeUnixNano": str(offset_ns), "endTimeUnixNano": str(offset_ns + duration),
+            "attributes": list(attributes),
+        })
+        return spans[-1]["spanId"], offset_ns + duration
+
+    cursor = start_ns
+    for stage in FETCH_STAGES + ANALYSIS_STAGES:
+        if stage not in timings["stages"]:
+            continue
+        span_id, next_cursor = child(stage, cursor, timings["stages"][stage], root_id)
+        if stage == "checks":
+            sub = cursor
+            for check, seconds in timings["checks"].items():
+                _, sub = child(f"check.{check}", sub, seconds, span_id, [_attr("scan.aggregated", True)])
+        cursor = next_cursor
+    return spans
+
+
+def otlp_request(results, service=SERVICE_NAME):
+    """Wrap the spans of `results` in an OTLP/JSON ExportTraceServiceRequest."""
+    spans = [span for r in results for span in otel_spans(r)]
+    return {"resourceSpans": [{
+        "resource": {"attributes": [_attr("service.name", service)]},
+        "scopeSpans": [{"scope": {"name": "webform-scanner.instrument"}, "spans": spans}],
+    }]}
+
+
+class SpanWriter:
+    """Append each result's spans to a file as one OTLP/JSON request per line."""
+    def __init__(self, path, service=SERVICE_NAME):
+        self.path = path
+        self.service = service
+        self._lock = threading.Lock()
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def write(self, result):
+        if not result.get("timings"):
+            return
+        line = json.dumps(otlp_request([result], self.service), separators=(",", ":"))
+        with self._lock:
+            self._fh.write(line + "\n")
+            self._fh.flush()
+
+    def close(self):
+        self._fh.close()
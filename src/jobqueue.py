@@ -0,0 +1,345 @@
+# src/jobqueue.py
+"""
+Durable, resumable scan jobs.
+
+A SQLite file holds one row per URL with its state:
+
+    pending    waiting to be scanned (possibly not before a backoff time)
+    in-flight  claimed by a worker; the claim is a lease that expires
+    done       scanned, scan_webform() result stored
+    failed     gave up after max_attempts
+
+Claims happen inside an IMMEDIATE transaction, so several worker processes
+on the same machine can drain one queue without scanning a URL twice. An
+interrupted run hands its in-flight URLs back on exit. A killed run leaves
+them leased until the lease expires, and then any worker picks them up
+again. Scans that raised, got no response or a 5xx/429 go back to pending
+with an exponential backoff; other HTTP errors (a 404) are done at once.
+
+    python src/jobqueue.py add urls.txt        # enqueue (duplicates ignored)
+    python src/jobqueue.py run                 # drain; start several for more processes
+    python src/jobqueue.py status
+    python src/jobqueue.py export --jsonl results.jsonl --markdown report.md
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from functools import partial
+
+from batch import DEFAULT_PER_HOST, DEFAULT_WORKERS, scan_batch
+from scanner import scan_webform
+
+DEFAULT_QUEUE_PATH = "scan_jobs.sqlite"
+DEFAULT_LEASE = 300          # seconds a claim stays valid without completion
+DEFAULT_MAX_ATTEMPTS = 4     # scans per URL before it is marked failed
+DEFAULT_BACKOFF = 30         # first retry delay, doubled per attempt
+DEFAULT_BACKOFF_MAX = 3600
+
+STATES = ("pending", "in-flight", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          INTEGER PRIMARY KEY,
+    url         TEXT NOT NULL UNIQUE,
+    state       TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    not_before  REAL NOT NULL DEFAULT 0,
+    lease_until REAL,
+    worker      TEXT,
+    result      TEXT,
+    error       TEXT,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state, not_before);
+"""
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def transient_failure(result):
+    """
+    Why a scan that returned should be tried again, or None when it is final.
+    Only "no response" (network errors), 5xx and 429 are retried: any other
+    HTTP status, a 404 say, is the page's answer and will not change on retry.
+    """
+    status = result.get("details", {}).get("status")
+    if status is None:
+        return "No response"
+    if status >= 500 or status == 429:
+        return f"HTTP {status}"
+    return None
+
+
+def retry_delay(attempts, backoff=DEFAULT_BACKOFF, backoff_max=DEFAULT_BACKOFF_MAX):
+    """Delay before the next try after `attempts` failed ones."""
+    return min(backoff * (2 ** max(attempts - 1, 0)), backoff_max)
+
+
+class JobQueue:
+    """
+    One connection per process (plus a lock for threads). WAL mode lets
+    readers and the single writer of the moment work side by side.
+    """
+    def __init__(self, path=DEFAULT_QUEUE_PATH, lease=DEFAULT_LEASE, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 backoff=DEFAULT_BACKOFF, backoff_max=DEFAULT_BACKOFF_MAX, worker=None):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.worker = worker or worker_id()
+        self._lock = threading.Lock()
+        # autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _write(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    # -----------------------
+    # Producer side
+    # -----------------------
+
+    def enqueue(self, urls):
+        """Add URLs as pending; URLs already in the queue (any state) are left alone. Returns #added."""
+        now = time.time()
+        rows = [(u, now) for u in dict.fromkeys(u.strip() for u in urls) if u]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("INSERT OR IGNORE INTO jobs (url, updated_at) VALUES (?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return self._conn.total_changes - before
+
+    def retry_failed(self):
+        """Give every failed URL a fresh set of attempts."""
+        return self._write("UPDATE jobs SET state = 'pending', attempts = 0, not_before = 0, updated_at = ? "
+                           "WHERE state = 'failed'", (time.time(),))
+
+    # -----------------------
+    # Worker side
+    # -----------------------
+
+    def claim(self, limit=1):
+        """
+        Atomically lease up to `limit` URLs that are due (pending past their
+        backoff, or in-flight with an expired lease). Returns [url, ...].
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, url FROM jobs "
+                    "WHERE (state = 'pending' AND not_before <= ?) OR (state = 'in-flight' AND lease_until < ?) "
+                    "ORDER BY id LIMIT ?", (now, now, limit)).fetchall()
+                self._conn.executemany(
+                    "UPDATE jobs SET state = 'in-flight', worker = ?, lease_until = ?, updated_at = ? WHERE id = ?",
+                    [(self.worker, now + self.lease, now, job_id) for job_id, _ in rows])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [url for _, url in rows]
+
+    def complete(self, url, result):
+        """Store the result. Returns False if our lease was lost to another worker meanwhile."""
+        return self._write(
+            "UPDATE jobs SET state = 'done', result = ?, error = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE url = ? AND state = 'in-flight' AND worker = ?",
+            (json.dumps(result, ensure_ascii=False), time.time(), url, self.worker)) == 1
+
+    def fail(self, url, error, result=None):
+        """
+        Count a failed attempt: back to pending after a backoff, or failed
+        once max_attempts is reached (the last result is kept).
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT attempts FROM jobs WHERE url = ? AND state = 'in-flight' AND worker = ?",
+                                     (url, self.worker)).fetchone()
+            if row is None:
+                return None
+            attempts = row[0] + 1
+            state = "failed" if attempts >= self.max_attempts else "pending"
+            not_before = now + retry_delay(attempts, self.backoff, self.backoff_max) if state == "pending" else 0
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, attempts = ?, not_before = ?, error = ?, result = ?, "
+                "lease_until = NULL, updated_at = ? WHERE url = ? AND worker = ?",
+                (state, attempts, not_before, str(error),
+                 json.dumps(result, ensure_ascii=False) if result is not None else None, now, url, self.worker))
+            return state
+
+    def release(self, worker=None):
+        """Hand in-flight URLs of `worker` (default: this one; "*" = all) back as pending."""
+        worker = worker or self.worker
+        if worker == "*":
+            return self._write("UPDATE jobs SET state = 'pending', lease_until = NULL, updated_at = ? "
+                               "WHERE state = 'in-flight'", (time.time(),))
+        return self._write("UPDATE jobs SET state = 'pending', lease_until = NULL, updated_at = ? "
+                           "WHERE state = 'in-flight' AND worker = ?", (time.time(), worker))
+
+    # -----------------------
+    # Inspection
+    # -----------------------
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {s: 0 for s in STATES}
+        counts.update(dict(rows))
+        return counts
+
+    def next_due(self):
+        """Seconds until the next pending URL becomes claimable (None if nothing is pending)."""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(not_before) FROM jobs WHERE state = 'pending'").fetchone()
+        if row[0] is None:
+            return None
+        return max(row[0] - time.time(), 0.0)
+
+    def results(self, states=("done", "failed")):
+        """Yield stored results in enqueue order."""
+        marks = ",".join("?" * len(states))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT result FROM jobs WHERE state IN ({marks}) AND result IS NOT NULL ORDER BY id",
+                tuple(states)).fetchall()
+        for (result,) in rows:
+            yield json.loads(result)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# -----------------------
+# Worker loop
+# -----------------------
+
+def run_jobs(queue, scan=scan_webform, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST,
+             wait_for_retries=True, on_result=None):
+    """
+    Drain `queue` with a thread pool (see batch.scan_batch) until nothing is
+    left to claim. URLs whose scan raised, got no response or a 5xx/429 are
+    retried with backoff (see transient_failure); other HTTP errors complete
+    on the first attempt. wait_for_retries=False returns instead of sleeping.
+    on_result(result) is called for each URL this worker finished.
+    Returns {"done": n, "retried": n, "failed": n} for this worker.
+    """
+    stats = {"done": 0, "retried": 0, "failed": 0}
+    errors = {}
+
+    def guarded(url):
+        try:
+            return scan(url)
+        except Exception as e:  # keep the batch going; the URL is retried
+            errors[url] = f"{type(e).__name__}: {e}"
+            return {"url": url}
+
+    try:
+        while True:
+            urls = queue.claim(limit=workers * 2)
+            if not urls:
+                wait = queue.next_due()
+                if wait is None or not wait_for_retries:
+                    break
+                time.sleep(min(wait, queue.lease) + 0.01)
+                continue
+            for result in scan_batch(urls, workers=workers, per_host=per_host, ordered=False, scan=guarded):
+                url = result["url"]
+                error = errors.pop(url, None)
+                if error is None:
+                    error = transient_failure(result)
+                if error is None:
+                    if queue.complete(url, result):
+                        stats["done"] += 1
+                        if on_result is not None:
+                            on_result(result)
+                    continue
+                state = queue.fail(url, error, result=result if "checks" in result else None)
+                if state == "failed":
+                    stats["failed"] += 1
+                    if on_result is not None and "checks" in result:
+                        on_result(result)
+                elif state == "pending":
+                    stats["retried"] += 1
+    finally:
+        queue.release()
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Durable scan job queue")
+    ap.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="queue database file")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("add", help="enqueue URLs from a file (one per line)")
+    p.add_argument("urls_file")
+
+    p = sub.add_parser("run", help="scan queued URLs until the queue is drained")
+    p.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    p.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+    p.add_argument("--cache", help="response cache file (see cache.py)")
+    p.add_argument("--no-wait", action="store_true", help="exit instead of waiting for retry backoffs")
+
+    sub.add_parser("status", help="count URLs per state")
+    sub.add_parser("retry-failed", help="reset failed URLs to pending")
+    sub.add_parser("recover", help="release every in-flight URL (after a crashed worker)")
+
+    p = sub.add_parser("export", help="write stored results to report files")
+    p.add_argument("--jsonl")
+    p.add_argument("--markdown")
+    p.add_argument("--csv")
+    args = ap.parse_args(argv)
+
+    queue = JobQueue(args.queue)
+    try:
+        if args.command == "add":
+            with open(args.urls_file, "r", encoding="utf-8") as fh:
+                added = queue.enqueue(line for line in fh)
+            print(f"Enqueued {added} new URL(s)")
+        elif args.command == "run":
+            scan = scan_webform
+            cache = None
+            if args.cache:
+                from cache import ResponseCache
+                cache = ResponseCache(args.cache)
+                scan = partial(scan_webform, cache=cache)
+            try:
+                stats = run_jobs(queue, scan=scan, workers=args.workers, per_host=args.per_host,
+                                 wait_for_retries=not args.no_wait)
+            finally:
+                if cache is not None:
+                    cache.close()
+            print(f"Done {stats['done']}, retried {stats['retried']}, failed {stats['failed']}")
+        elif args.command == "retry-failed":
+            print(f"Reset {queue.retry_failed()} failed URL(s)")
+        elif args.command == "recover":
+            print(f"Released {queue.release('*')} in-flight URL(s)")
+        elif args.command == "export":
+            from sinks import open_sinks
+            with open_sinks(markdown=args.markdown, jsonl=args.jsonl, csv_file=args.csv) as out:
+                for result in queue.results():
+                    out.write(result)
+        if args.command != "export":
+            print(json.dumps(queue.counts()))
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,29 @@
 # src/main.py
-from scanner import (
-    scan_webform, generate_json_report, generate_markdown_report,
-    CYAN, GREEN, YELLOW, RED, MAGENTA, BLUE, WHITE, BOLD, RESET
-)
+"""
+Command line entry point.
+
+Without arguments the checker asks for URLs interactively. Subcommands run
+without prompts, so they fit scripts, cron jobs and pipes:
+
+    python src/main.py scan https://example.com urls.txt 'lists/*.txt'
+    cat urls.txt | python src/main.py scan --jsonl results.jsonl --quiet
+    python src/main.py rescan results.jsonl --level HIGH
+    python src/main.py report results.jsonl --markdown report.md
+    python src/main.py bench suite --urls 50
+
+Only the subcommands that scan import requests, bs4 and the parsers;
+`report` and `--help` get by with the standard library.
+"""
+import argparse
+import glob
+import json
 import os
+import sys
+
+from reporting import CYAN, GREEN, YELLOW, RED, MAGENTA, BLUE, WHITE, BOLD, RESET
+
+LEVELS = ("LOW", "MEDIUM", "HIGH")
+
 
 def print_header():
     print("""
@@ -91,25 +111,435 @@ def pretty_print_result(r):
     print(BLUE + ("-"*70) + RESET)
     print()
 
-def main():
-    print_header()
-    urls = get_urls_from_user()
-    if not urls:
-        print(RED + "No URLs provided. Exiting." + RESET)
-        return
+def print_result_line(r):
+    """One line per result, for --quiet runs."""
+    risk = r["risk"]
+    print(f"{risk['level_color']}{risk['level']:<6}{RESET} {risk['normalized_score']:>2}/25  {r['url']}"
+          + (f"  ({', '.join(r['issues'])})" if r["issues"] else ""))
+
+
+# -----------------------
+# Inputs
+# -----------------------
+
+def _expand(source):
+    """Paths matching `source` (a file name or a glob pattern); exits if there are none."""
+    paths = sorted(glob.glob(source)) if glob.has_magic(source) else [source]
+    paths = [p for p in paths if os.path.isfile(p)]
+    if not paths:
+        sys.exit(f"error: no such file: {source}")
+    return paths
+
+
+def iter_urls(sources):
+    """
+    URLs from the command line: each source is a URL, "-" (one URL per line
+    on stdin) or a file / glob pattern of files with one URL per line.
+    Blank lines and # comments are skipped.
+    """
+    def lines(fh, origin):
+        for n, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith(("http://", "https://")):
+                yield line
+            else:
+                print(YELLOW + f"[!] {origin}:{n}: skipping {line!r} (not an http:// or https:// URL)" + RESET,
+                      file=sys.stderr)
+
+    for source in sources:
+        if source == "-":
+            yield from lines(sys.stdin, "<stdin>")
+        elif source.startswith(("http://", "https://")):
+            yield source
+        else:
+            for path in _expand(source):
+                with open(path, "r", encoding="utf-8") as fh:
+                    yield from lines(fh, path)
+
+
+def iter_saved_results(sources):
+    """
+    Results saved by earlier runs: JSON Lines logs, .wfr record files,
+    compliance_summary_*.json reports, glob patterns of these, or "-" for
+    JSON Lines on stdin.
+    """
+    for source in sources:
+        if source == "-":
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+            continue
+        for path in _expand(source):
+            if path.endswith(".wfr"):
+                from records import iter_results
+                yield from iter_results(path)
+            elif path.endswith(".json"):
+                with open(path, "r", encoding="utf-8") as fh:
+                    data = json.load(fh)
+                yield from data if isinstance(data, list) else [data]
+            else:
+                from sinks import iter_jsonl
+                yield from iter_jsonl(path)
+
+
+def load_saved_baseline(sources, store=None, limit=100000):
+    """
+    The latest saved result per URL, as an incremental.run_incremental()
+    baseline: {url: {"result": dict, "scanned_at": epoch seconds}}. A file's
+    results date from its mtime, stored results from their scan time, and
+    results on stdin count as never scanned (always due).
+    """
+    baseline = {}
+
+    def add(result, scanned_at):
+        url = result.get("url")
+        if url and (url not in baseline or scanned_at >= baseline[url]["scanned_at"]):
+            baseline[url] = {"result": result, "scanned_at": scanned_at}
+
+    for source in sources:
+        for path in ["-"] if source == "-" else _expand(source):
+            scanned_at = 0 if path == "-" else os.path.getmtime(path)
+            for result in iter_saved_results([path]):
+                add(result, scanned_at)
+    if store:
+        from store import ResultStore
+        results = ResultStore(store)
+        try:
+            for row in results.query(latest=True, limit=limit):
+                add(row["result"], row["scanned_at"])
+        finally:
+            results.close()
+    return baseline
+
+
+def filter_results(results, levels=None, issues=None):
+    """Results at one of `levels` (LOW/MEDIUM/HIGH) that have at least one of `issues`."""
+    for r in results:
+        if levels and r.get("risk", {}).get("level") not in levels:
+            continue
+        if issues and not set(issues).intersection(r.get("issues", [])):
+            continue
+        yield r
+
+
+# -----------------------
+# Scanning
+# -----------------------
+
+def _setting(opts, name, env):
+    """Command line option, else environment variable, else None."""
+    value = getattr(opts, name, None)
+    return value if value is not None else os.environ.get(env)
+
+
+def run_scan(urls, opts=None, baseline=None):
+    """
+    Scan `urls` and write the reports. Options come from `opts` (the scan
+    subcommand's arguments) and fall back to the SCAN_* environment
+    variables, which is all the interactive mode uses. With a `baseline`
+    (see load_saved_baseline()) only the URLs that are due are rescanned,
+    and a delta file lists what changed (see incremental.py).
+    """
+    from functools import partial
+    from batch import scan_batch, DEFAULT_WORKERS, DEFAULT_PER_HOST
+    from scanner import scan_webform, compile_plan
+    from sinks import JsonlSink, JsonSummarySink, MarkdownSink, MultiSink, completed_urls
+
+    processes = _setting(opts, "processes", "SCAN_PROCESSES")
+    if processes:
+        # the process pool runs the default scan only: the cache, the shared resources
+        # and the job queue live in this process, and the profiles skip the parsing it speeds up
+        clashes = [f"--{name} ({env})" for name, env in (("cache", "SCAN_CACHE"), ("deep", "SCAN_DEEP"),
+                                                         ("profile", "SCAN_PROFILE"), ("disable", "SCAN_DISABLE"),
+                                                         ("queue", "SCAN_QUEUE"))
+                   if _setting(opts, name, env)]
+        if clashes:
+            sys.exit(f"error: --processes (SCAN_PROCESSES) cannot be combined with {', '.join(clashes)}")
 
-    all_results = []
-    for url in urls:
-        print(CYAN + f"\nScanning {url} ..." + RESET)
-        r = scan_webform(url)
-        all_results.append(r)
-        pretty_print_result(r)
-        json_file = generate_json_report(r)
-        print(GREEN + f"[+] JSON summary saved to: {json_file}" + RESET)
+    quiet = getattr(opts, "quiet", False)
+    workers = int(_setting(opts, "workers", "SCAN_WORKERS") or DEFAULT_WORKERS)
+    per_host = int(_setting(opts, "per_host", "SCAN_PER_HOST") or DEFAULT_PER_HOST)
+    print(CYAN + f"\nScanning {len(urls)} URL(s) with {workers} worker(s), max {per_host} per host ..." + RESET)
+
+    scan = scan_webform
+    cache = None
+    resources = None
+    if _setting(opts, "cache", "SCAN_CACHE"):
+        from cache import ResponseCache
+        cache = ResponseCache(_setting(opts, "cache", "SCAN_CACHE"))
+    if _setting(opts, "deep", "SCAN_DEEP"):
+        # fetch linked privacy policies and external scripts, once per resource per run
+        from resources import ResourceCache
+        resources = ResourceCache()
+    plan = None
+    profile = _setting(opts, "profile", "SCAN_PROFILE")
+    disable = _setting(opts, "disable", "SCAN_DISABLE")
+    if profile or disable:
+        # e.g. SCAN_PROFILE=headers (no body download) or SCAN_DISABLE=trackers,consent
+        disable = [n.strip() for n in (disable or "").split(",") if n.strip()]
+        plan = compile_plan(profile or "full", disable=disable)
+    if cache is not None or resources is not None or plan is not None:
+        scan = partial(scan_webform, cache=cache, resources=resources, plan=plan)
+    histograms = None
+    spans = None
+    if _setting(opts, "timings", "SCAN_TIMINGS"):
+        # per-stage timings in every result, aggregated into Prometheus histograms;
+        # SCAN_TRACES=spans.jsonl also writes OpenTelemetry-style spans
+        import instrument
+        instrument.enable()
+        histograms = instrument.Histograms()
+        if _setting(opts, "traces", "SCAN_TRACES"):
+            spans = instrument.SpanWriter(_setting(opts, "traces", "SCAN_TRACES"))
+
+    # Results are written and flushed one by one. With SCAN_JSONL set, the JSONL file
+    # doubles as a resume log: URLs already in it are skipped and the reports appended to.
+    md_file = getattr(opts, "markdown", None) or "report.md"
+    jsonl_file = _setting(opts, "jsonl", "SCAN_JSONL")
+    resume = False
+    sinks = []
+    if jsonl_file:
+        done = completed_urls(jsonl_file)
+        if done:
+            resume = True
+            urls = [u for u in urls if u not in done]
+            print(YELLOW + f"[i] Resuming: {len(done)} URL(s) already in {jsonl_file}, {len(urls)} left." + RESET)
+        sinks.append(JsonlSink(jsonl_file, resume=resume))
+    sinks.append(MarkdownSink(md_file, resume=resume))
+    records_file = _setting(opts, "records", "SCAN_RECORDS")
+    if records_file:
+        # compact binary copy of the results (see records.py); always a new file
+        from records import RecordWriter
+        sinks.append(RecordWriter(open(records_file, "wb")))
+    # per-URL compliance_summary_*.json files: on (pretty, in the working directory) in interactive mode,
+    # off for the subcommands unless --summaries names a directory; "off" turns them off either way
+    summaries_dir = _setting(opts, "summaries", "SCAN_SUMMARIES") or ("." if opts is None else "off")
+    summaries = None
+    if summaries_dir.lower() not in ("off", "0", "none"):
+        indent = _setting(opts, "summary_indent", "SCAN_SUMMARY_INDENT") or ("2" if opts is None else "none")
+        summaries = JsonSummarySink(summaries_dir, indent=None if indent.lower() == "none" else int(indent))
+        sinks.append(summaries)
+
+    def report(r):
+        if quiet:
+            print_result_line(r)
+        else:
+            pretty_print_result(r)
+        out.write(r)
+        if summaries is not None and not quiet:
+            print(GREEN + f"[+] JSON summary saved to: {summaries.last_filename}" + RESET)
+        if histograms is not None:
+            histograms.observe(r)
+        if spans is not None:
+            spans.write(r)
+
+    queue_file = _setting(opts, "queue", "SCAN_QUEUE")
+    with MultiSink(sinks) as out:
+        if baseline is not None:
+            from incremental import probe_headers, run_incremental
+            delta = run_incremental(urls, max_age=(getattr(opts, "max_age_hours", None) or 0) * 3600,
+                                    cache=cache, workers=workers, per_host=per_host,
+                                    delta_filename=getattr(opts, "delta", None),
+                                    baseline=baseline, scan=scan, on_result=report,
+                                    probe=None if getattr(opts, "no_probe", False) else probe_headers)
+            print(CYAN + f"[i] Rescanned {delta['rescanned']} URL(s), skipped {delta['skipped']}, "
+                  f"{len(delta['changes'])} change(s), {len(delta['regressions'])} regression(s)" + RESET)
+            print(GREEN + f"[+] Delta saved to: {delta['delta_file']}" + RESET)
+        elif queue_file:
+            # Job mode: URLs go through a durable queue (see jobqueue.py), so an
+            # interrupted run resumes where it stopped and failures are retried.
+            from jobqueue import JobQueue, run_jobs
+            queue = JobQueue(queue_file)
+            added = queue.enqueue(urls)
+            print(YELLOW + f"[i] Job queue {queue.path}: {added} new URL(s), {queue.counts()}" + RESET)
+            try:
+                stats = run_jobs(queue, scan=scan, workers=workers, per_host=per_host, on_result=report)
+            finally:
+                queue.close()
+            print(CYAN + f"[i] Jobs: {stats['done']} done, {stats['failed']} failed" + RESET)
+        elif processes:
+            # Fetch in threads, analyze in a process pool (see pipeline.py); "auto" = one per core.
+            from pipeline import scan_pipeline
+            processes = None if processes == "auto" else int(processes)
+            for r in scan_pipeline(urls, processes=processes, fetch_workers=workers, per_host=per_host):
+                report(r)
+        else:
+            for r in scan_batch(urls, workers=workers, per_host=per_host, scan=scan):
+                report(r)
 
-    md_file = generate_markdown_report(all_results)
     print(GREEN + f"\n[+] Combined markdown report saved to: {md_file}" + RESET)
+    if cache is not None:
+        st = cache.stats()
+        print(CYAN + f"[i] Cache: {st['hits']} hit(s) ({st['revalidated']} revalidated, {st['unchanged']} unchanged), {st['misses']} miss(es)" + RESET)
+        cache.close()
+    if resources is not None:
+        st = resources.stats()
+        print(CYAN + f"[i] Shared resources: {st['resources']} fetched once, reused {st['hits'] + st['inflight_waits']} time(s)" + RESET)
+        resources.close()
+    if histograms is not None:
+        metrics_file = histograms.write_prometheus(_setting(opts, "metrics", "SCAN_METRICS") or "scan_metrics.prom")
+        stages = histograms.as_dict()["stage"]
+        slowest = sorted(stages.items(), key=lambda kv: -kv[1]["sum_s"])[:3]
+        print(CYAN + "[i] Time by stage: " + ", ".join(f"{name} {st['sum_s']:.2f}s" for name, st in slowest) + RESET)
+        print(GREEN + f"[+] Timing histograms saved to: {metrics_file}" + RESET)
+    if spans is not None:
+        spans.close()
+        print(GREEN + f"[+] Trace spans saved to: {spans.path}" + RESET)
     print(GREEN + "\nAll scans complete." + RESET)
 
+
+# -----------------------
+# Subcommands
+# -----------------------
+
+def cmd_scan(args):
+    sources = args.sources or (["-"] if not sys.stdin.isatty() else [])
+    if not sources:
+        sys.exit("error: no URLs given (pass URLs, files, glob patterns or - for stdin)")
+    urls = list(dict.fromkeys(iter_urls(sources)))
+    if not urls:
+        sys.exit("error: no valid URLs found")
+    run_scan(urls, args)
+
+
+def cmd_rescan(args):
+    if not args.sources and not args.store:
+        sys.exit("error: pass result files or --store")
+    if _setting(args, "queue", "SCAN_QUEUE") or _setting(args, "processes", "SCAN_PROCESSES"):
+        sys.exit("error: rescan does not support --queue / --processes (SCAN_QUEUE / SCAN_PROCESSES)")
+    # writing the rescan into one of its inputs would make the resume logic skip
+    # every URL (JSON Lines), or truncate the input before it is read (records)
+    inputs = [path for source in args.sources if source != "-" for path in _expand(source)]
+    for name, env in (("jsonl", "SCAN_JSONL"), ("records", "SCAN_RECORDS")):
+        output = _setting(args, name, env)
+        if output and os.path.exists(output) and any(os.path.samefile(output, path) for path in inputs):
+            sys.exit(f"error: --{name} / {env} is one of the inputs ({output}); write the rescan to another file")
+    baseline = load_saved_baseline(args.sources, args.store, args.limit)
+    matching = filter_results((entry["result"] for entry in baseline.values()), args.level, args.issue)
+    urls = [r["url"] for r in matching]
+    if not urls:
+        print(YELLOW + "[i] No matching results to rescan." + RESET)
+        return
+    run_scan(urls, args, baseline=baseline)
+
+
+def cmd_report(args):
+    from sinks import open_sinks
+
+    results = filter_results(iter_saved_results(args.sources), args.level, args.issue)
+    counts = dict.fromkeys(LEVELS, 0)
+    with open_sinks(markdown=args.markdown, jsonl=args.jsonl, csv_file=args.csv, records=args.records,
+                    summaries_dir=args.summaries) as out:
+        for r in results:
+            if not args.quiet:
+                print_result_line(r)
+            out.write(r)
+            counts[r["risk"]["level"]] = counts.get(r["risk"]["level"], 0) + 1
+    print(CYAN + f"[i] {sum(counts.values())} result(s): "
+          + ", ".join(f"{n} {level}" for level, n in counts.items()) + RESET, file=sys.stderr)
+    for name in ("markdown", "jsonl", "csv", "records"):
+        if getattr(args, name):
+            print(GREEN + f"[+] Saved {name} report to: {getattr(args, name)}" + RESET, file=sys.stderr)
+
+
+def _add_scan_options(p):
+    g = p.add_argument_group("scan options (default to the SCAN_* environment variables)")
+    g.add_argument("--workers", type=int, help="URLs scanned at once (SCAN_WORKERS)")
+    g.add_argument("--per-host", type=int, help="concurrent requests per host (SCAN_PER_HOST)")
+    g.add_argument("--profile", help="rule profile, e.g. headers (SCAN_PROFILE)")
+    g.add_argument("--disable", help="comma-separated checks to skip (SCAN_DISABLE)")
+    g.add_argument("--deep", action="store_true", default=None,
+                   help="fetch privacy policies and external scripts (SCAN_DEEP)")
+    g.add_argument("--cache", help="response cache file (SCAN_CACHE)")
+    g.add_argument("--processes", help="analysis processes, or auto (SCAN_PROCESSES)")
+    g.add_argument("--queue", help="durable job queue file (SCAN_QUEUE)")
+    g.add_argument("--jsonl", help="JSON Lines results / resume log (SCAN_JSONL)")
+    g.add_argument("--records", help="binary .wfr results file (SCAN_RECORDS)")
+    g.add_argument("--markdown", default="report.md", help="combined Markdown report (default: report.md)")
+    g.add_argument("--summaries", metavar="DIR",
+                   help="write a compliance_summary_*.json per URL into DIR, or off (SCAN_SUMMARIES)")
+    g.add_argument("--summary-indent", help="indent of the summaries; compact by default (SCAN_SUMMARY_INDENT)")
+    g.add_argument("--timings", action="store_true", default=None,
+                   help="per-stage timings and histograms (SCAN_TIMINGS)")
+    g.add_argument("--metrics", help="Prometheus histogram file (SCAN_METRICS)")
+    g.add_argument("--traces", help="OTLP JSON span file, with --timings (SCAN_TRACES)")
+    g.add_argument("-q", "--quiet", action="store_true", help="one line per URL instead of the full result")
+
+
+def _add_filters(p):
+    p.add_argument("--level", action="append", choices=LEVELS, help="only results at this risk level (repeatable)")
+    p.add_argument("--issue", action="append", help='only results with this issue, e.g. "Insecure Cookies" (repeatable)')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py", description="WebForm privacy compliance checker. Run without arguments for interactive mode.")
+    sub = parser.add_subparsers(dest="command", metavar="{scan,rescan,report,crawl,bench}")
+
+    p = sub.add_parser("scan", help="scan URLs without prompts")
+    p.add_argument("sources", nargs="*",
+                   help="URLs, files with one URL per line, glob patterns, or - for stdin (default when piped)")
+    _add_scan_options(p)
+    p.set_defaults(func=cmd_scan)
+
+    p = sub.add_parser("rescan", help="scan again the URLs of saved results")
+    p.add_argument("sources", nargs="*", help="JSON Lines, .wfr or compliance_summary_*.json files / globs, or -")
+    p.add_argument("--store", help="also take the latest results from this result store (see store.py)")
+    p.add_argument("--limit", type=int, default=100000, help="max results taken from --store")
+    _add_filters(p)
+    p.add_argument("--max-age-hours", type=float, default=0,
+                   help="fully rescan results older than this; newer ones are checked for changes with a "
+                        "conditional GET (--cache) or a HEAD probe (default: 0, all)")
+    p.add_argument("--no-probe", action="store_true",
+                   help="without --cache, rescan results newer than --max-age-hours only once they are due")
+    p.add_argument("--delta", help="delta file of new/resolved issues and level changes "
+                                   "(default: compliance_delta_<time>.json)")
+    _add_scan_options(p)
+    p.set_defaults(func=cmd_rescan)
+
+    p = sub.add_parser("report", help="re-render saved results without scanning")
+    p.add_argument("sources", nargs="+", help="JSON Lines, .wfr or compliance_summary_*.json files / globs, or -")
+    _add_filters(p)
+    p.add_argument("--markdown", help="write a combined Markdown report")
+    p.add_argument("--jsonl", help="write JSON Lines")
+    p.add_argument("--csv", help="write one CSV row per URL")
+    p.add_argument("--records", help="write a binary .wfr records file")
+    p.add_argument("--summaries", metavar="DIR", help="write compliance_summary_*.json files to DIR")
+    p.add_argument("-q", "--quiet", action="store_true", help="no per-result lines on stdout")
+    p.set_defaults(func=cmd_report)
+
+    # listed for --help only; main() hands the arguments straight to crawl.py / bench.py
+    sub.add_parser("crawl", help="crawl a site and scan every page found (see crawl.py)", add_help=False)
+    sub.add_parser("bench", help="run a benchmark (see bench.py)", add_help=False)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print_header()
+        urls = get_urls_from_user()
+        if not urls:
+            print(RED + "No URLs provided. Exiting." + RESET)
+            return
+        run_scan(urls)
+        return
+    if argv[0] == "crawl":
+        import crawl
+        crawl.main(argv[1:])
+        return
+    if argv[0] == "bench":
+        import bench
+        bench.main(argv[1:])
+        return
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return
+    args.func(args)
+
 if __name__ == "__main__":
     main()
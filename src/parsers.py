@@ -0,0 +1,177 @@
+# src/parsers.py
+"""
+Pluggable HTML parser backends for the DOM checks.
+
+Every backend turns markup into the start/data/end event stream consumed by
+the visitors in analyzer.py, so check results do not depend on which parser
+produced them. Backends:
+
+    selectolax   lexbor C parser, tree walked via node links   (optional)
+    lxml         libxml2 parser with a streaming target        (optional)
+    html.parser  stdlib HTMLParser, no tree built              (always available)
+    bs4          BeautifulSoup("html.parser") tree + walk      (reference path)
+
+"auto" picks the first installed backend from PARSER_PREFERENCE. Only
+backends that give the same results as the bs4 reference are listed there.
+selectolax and lxml build the tree by HTML5 rules and disagree with it:
+<title> and <textarea> contents are text to them, a <form> inside a <table>
+loses its fields, and a nested <form> is dropped. They can still be chosen
+by name (parser="lxml") where the speed is worth those differences.
+"""
+import time
+
+from analyzer import Dispatcher, StreamingParser, TimedDispatcher, new_visitors, walk_soup
+
+try:
+    from lxml import etree
+except ImportError:  # optional dependency
+    etree = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # optional dependency
+    LexborHTMLParser = None
+
+PARSER_PREFERENCE = ["html.parser"]
+# installed on request only: results differ from bs4 on some markup (see above)
+DIVERGENT_BACKENDS = ("selectolax", "lxml")
+
+
+# -----------------------
+# Event producers
+# -----------------------
+
+def _feed_html_parser(html, dispatcher):
+    parser = StreamingParser(dispatcher)
+    parser.feed(html)
+    parser.close()
+
+
+def _feed_bs4(html, dispatcher):
+    from bs4 import BeautifulSoup
+    walk_soup(BeautifulSoup(html, "html.parser"), dispatcher)
+
+
+class _LxmlTarget:
+    """lxml parser target forwarding callbacks to the dispatcher."""
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+
+    def start(self, tag, attrib):
+        self.dispatcher.start(tag, dict(attrib))
+
+    def end(self, tag):
+        self.dispatcher.end(tag)
+
+    def data(self, data):
+        self.dispatcher.data(data)
+
+    def close(self):
+        return None
+
+
+def _feed_lxml(html, dispatcher):
+    if not html.strip():
+        return
+    parser = etree.HTMLParser(target=_LxmlTarget(dispatcher))
+    parser.feed(html)
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        pass  # libxml2 recovers from broken markup; events already emitted
+
+
+def _feed_selectolax(html, dispatcher):
+    if not html.strip():
+        return
+    node = LexborHTMLParser(html).root
+    stack = []
+    while node is not None:
+        tag = node.tag
+        if tag == "-text":
+            dispatcher.data(node.text_content or "")
+        elif tag[0] not in "-_#!":
+            dispatcher.start(tag, {k: ("" if v is None else v) for k, v in node.attributes.items()})
+            if node.child is not None:
+                stack.append(node)
+                node = node.child
+                continue
+            dispatcher.end(tag)
+        # no children left: move to the next sibling, closing parents on the way up
+        while node is not None and node.next is None:
+            if not stack:
+                node = None
+                break
+            node = stack.pop()
+            dispatcher.end(node.tag)
+        if node is not None:
+            node = node.next
+
+
+# -----------------------
+# Registry
+# -----------------------
+
+# name -> (feed(html, dispatcher), installed?)
+PARSER_BACKENDS = {
+    "selectolax": (_feed_selectolax, LexborHTMLParser is not None),
+    "lxml": (_feed_lxml, etree is not None),
+    "html.parser": (_feed_html_parser, True),
+    "bs4": (_feed_bs4, True),
+}
+
+
+def register_backend(name, feed, available=True, preferred=False):
+    """Add a parser backend; preferred=True puts it first in auto-selection."""
+    PARSER_BACKENDS[name] = (feed, available)
+    if name in PARSER_PREFERENCE:
+        PARSER_PREFERENCE.remove(name)
+    if preferred:
+        PARSER_PREFERENCE.insert(0, name)
+    else:
+        PARSER_PREFERENCE.append(name)
+
+
+def available_backends():
+    return [name for name, (_, ok) in PARSER_BACKENDS.items() if ok]
+
+
+def select_backend(name="auto"):
+    """Resolve a backend name ("auto" -> first of PARSER_PREFERENCE installed). Raises ValueError if unusable."""
+    if name in (None, "auto"):
+        for candidate in PARSER_PREFERENCE:
+            if PARSER_BACKENDS.get(candidate, (None, False))[1]:
+                return candidate
+        return "html.parser"
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend: {name} (choose from {', '.join(PARSER_BACKENDS)})")
+    if not PARSER_BACKENDS[name][1]:
+        raise ValueError(f"Parser backend not installed: {name}")
+    return name
+
+
+def analyze_markup(html, backend="auto", names=None, extra=None, timings=None):
+    """
+    Parse `html` with the chosen backend and run the DOM checks (or the subset `names`).
+    extra: {name: visitor instance} run in the same pass (e.g. analyzer.LinkVisitor).
+    timings: optional dict; receives "markup_s" (the whole call), "parse_s" (parser
+    time, visitors excluded), "dom_checks" ({name: seconds in its visitor}) and "html_chars".
+    Returns {check_name: result tuple}.
+    """
+    feed, _ = PARSER_BACKENDS[select_backend(backend)]
+    visitors = new_visitors(names)
+    if extra:
+        visitors.update(extra)
+    if timings is None:
+        dispatcher = Dispatcher(visitors)
+        feed(html, dispatcher)
+        return dispatcher.results()
+    dispatcher = TimedDispatcher(visitors)
+    start = time.perf_counter()
+    feed(html, dispatcher)
+    elapsed = time.perf_counter() - start
+    timings["markup_s"] = elapsed
+    timings["parse_s"] = max(elapsed - sum(dispatcher.spent.values()), 0.0)
+    timings["dom_checks"] = dispatcher.spent
+    timings["html_chars"] = len(html)
+    return dispatcher.results()
@@ -0,0 +1,201 @@
+# src/pipeline.py
+"""
+Two-stage scan pipeline: threaded I/O fetch, multi-process analysis.
+
+With concurrent fetching, parsing and the checks become the bottleneck, and
+they are bound to one core by the GIL. scan_pipeline() keeps fetching in a
+thread pool (batch.scan_batch, with the same per-host cap) and sends every
+downloaded page to a process pool (one process per core by default). Each
+process rebuilds a FetchedResponse and runs analyze_response(), so results
+are the same as from scan_webform().
+
+Bodies travel through multiprocessing.shared_memory instead of being pickled
+through the pool's pipe. Only the segment name, headers and fetch timing are
+pickled. Pages smaller than SHM_MIN_BYTES go inline, because for them the
+shared memory setup costs more than the copy.
+
+    for result in scan_pipeline(urls, processes=None):   # None -> os.cpu_count()
+        ...
+"""
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import resource_tracker, shared_memory
+
+from batch import DEFAULT_PER_HOST, DEFAULT_WORKERS, scan_batch
+from scanner import FetchedResponse, analyze_response, error_result, fetch_url
+
+SHM_MIN_BYTES = 32 * 1024    # smaller bodies are pickled inline
+QUEUE_FACTOR = 2             # analysis jobs queued per process before fetching pauses
+
+
+def default_processes():
+    return os.cpu_count() or 1
+
+
+# -----------------------
+# Stage 1: fetch (threads)
+# -----------------------
+
+def fetch_stage(url, session=None):
+    """
+    Download `url` and package it for the analysis stage (see make_job).
+    "response" is False when the fetch failed.
+    """
+    response = fetch_url(url, session=session)
+    if response is None:
+        return {"url": url, "response": False}
+    history = [(h.url, h.status_code, dict(h.headers)) for h in response.history]
+    return make_job(url, response.status_code, dict(response.headers), response.content,
+                    encoding=response.encoding, timing=getattr(response, "fetch_timing", None),
+                    final_url=response.url, history=history)
+
+
+def make_job(url, status, headers, content, encoding=None, timing=None, final_url=None, history=None):
+    """
+    A downloaded page as a dict that is cheap to pickle: the body is placed in
+    a shared memory segment (its name under "shm") unless it is small or empty
+    ("body" then holds the bytes). release_job() frees the segment.
+    history: [(url, status, headers)] of the redirects that led to final_url.
+    """
+    content = content or b""
+    job = {
+        "url": url,
+        "response": True,
+        "status": status,
+        "headers": headers,
+        "encoding": encoding,
+        "timing": timing,
+        "final_url": final_url or url,
+        "history": history or [],
+        "size": len(content),
+        "shm": None,
+        "body": None,
+    }
+    if len(content) >= SHM_MIN_BYTES:
+        shm = shared_memory.SharedMemory(create=True, size=len(content))
+        shm.buf[:len(content)] = content
+        job["shm"] = shm.name
+        shm.close()  # the segment lives on until release_job() unlinks it
+    else:
+        job["body"] = content
+    return job
+
+
+def release_job(job):
+    """Free the shared memory segment of a fetched job (no-op for inline bodies)."""
+    if job.get("shm"):
+        try:
+            shm = shared_memory.SharedMemory(name=job["shm"])
+        except FileNotFoundError:
+            return
+        shm.close()
+        shm.unlink()
+        job["shm"] = None
+
+
+# -----------------------
+# Stage 2: analyze (processes)
+# -----------------------
+
+def analyze_job(job, parser="auto"):
+    """Runs in a pool process: rebuild the response from the job and run every check."""
+    try:
+        return _analyze_job(job, parser)
+    except Exception as e:
+        return error_result(job["url"], e)
+
+
+def _analyze_job(job, parser):
+    if "checks" in job:
+        return job  # the fetch raised and scan_batch already made its error result
+    if not job["response"]:
+        return analyze_response(job["url"], None, parser=parser)
+    if job["shm"]:
+        shm = shared_memory.SharedMemory(name=job["shm"])
+        try:
+            content = bytes(shm.buf[:job["size"]])
+        finally:
+            shm.close()
+    else:
+        content = job["body"]
+    history = [FetchedResponse(u, status, headers, b"") for u, status, headers in job["history"]]
+    response = FetchedResponse(job["final_url"], job["status"], job["headers"], content, encoding=job["encoding"],
+                               history=history)
+    if job["timing"]:
+        response.fetch_timing = job["timing"]
+    return analyze_response(job["url"], response, parser=parser)
+
+
+def scan_pipeline(urls, processes=None, fetch_workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST,
+                  ordered=True, parser="auto", session=None):
+    """
+    Scan URLs with fetching and analysis overlapped; yields scan_webform()-style result dicts.
+
+    processes:     analysis processes (None -> one per core)
+    fetch_workers: concurrent downloads (global), per_host: concurrent downloads per host
+    ordered:       True  -> results in input order
+                   False -> results as soon as each analysis finishes
+    """
+    processes = processes or default_processes()
+    max_queued = processes * QUEUE_FACTOR
+    pending = deque()   # (future, job) in submission order
+    live = {}           # id(job) -> job for every segment not yet released
+    lock = threading.Lock()
+    closed = False
+
+    def fetch(url):
+        job = fetch_stage(url, session=session)
+        with lock:
+            if not closed:
+                live[id(job)] = job
+                return job
+        release_job(job)  # pipeline already shut down
+        return job
+
+    def finish(fut, job):
+        try:
+            return fut.result()
+        except Exception as e:  # e.g. a worker process died
+            return error_result(job["url"], e)
+        finally:
+            release_job(job)
+            with lock:
+                live.pop(id(job), None)
+
+    def collect(keep):
+        """Yield finished results until at most `keep` analyses are outstanding."""
+        while len(pending) > keep:
+            if ordered:
+                yield finish(*pending.popleft())
+                continue
+            wait([fut for fut, _ in pending], return_when=FIRST_COMPLETED)
+            for item in [item for item in pending if item[0].done()]:
+                pending.remove(item)
+                yield finish(*item)
+
+    # start the tracker before the workers so they share it: a worker attaching to a
+    # segment must not get its own tracker, which would "clean up" segments at exit
+    resource_tracker.ensure_running()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        try:
+            for job in scan_batch(urls, workers=fetch_workers, per_host=per_host, ordered=ordered, scan=fetch):
+                pending.append((pool.submit(analyze_job, job, parser), job))
+                # keep the pool fed, but stop fetching ahead once it is backed up
+                yield from collect(max_queued - 1)
+                while pending and pending[0][0].done():
+                    yield finish(*pending.popleft())
+            yield from collect(0)
+        finally:
+            # consumer stopped early or a job raised: free every segment still around,
+            # including pages scan_batch fetched but had not handed over yet
+            for fut, _ in pending:
+                fut.cancel()
+            wait([fut for fut, _ in pending if not fut.cancelled()])
+            with lock:
+                closed = True
+                leftover = list(live.values())
+                live.clear()
+            for job in leftover:
+                release_job(job)
@@ -0,0 +1,249 @@
+# src/portfolio.py
+"""
+Portfolio analytics over many scan results (requires numpy).
+
+Results from compliance_summary_*.json files or JSON Lines logs are loaded
+into columnar arrays: one boolean issue matrix (results x issues), host
+codes, and the stored risk scores and levels. Aggregates and what-if
+re-scoring then run as a few vectorized operations rather than one
+compute_risk() call per URL. Re-scoring a million results under a new
+likelihood/impact table is a matrix-vector product.
+
+    python src/portfolio.py [--dir DIR] [--jsonl FILE ...] [--records FILE ...] [--ratings ratings.json] [--hosts N]
+
+ratings.json has the DEFAULT_ISSUE_RATINGS shape: {"No HTTPS": {"likelihood": 5, "impact": 5}, ...}.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+from urllib.parse import urlparse
+
+from reporting import DEFAULT_ISSUE_RATINGS, LAW_MAPPING
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+LEVELS = ("LOW", "MEDIUM", "HIGH")
+LEVEL_CODES = {name: code for code, name in enumerate(LEVELS)}
+MAX_ISSUE_SCORE = 5 * 5
+
+
+class Portfolio:
+    """
+    Columnar view of a set of scan results.
+
+    urls:        list of URLs (row order)
+    host_names:  host vocabulary; hosts[i] indexes it
+    issue_names: issue vocabulary; issues[i, k] is True when result i has issue k
+    scores, levels: the stored normalized score (0-25) and level code per result
+    """
+    def __init__(self, urls, hosts, host_names, issues, issue_names, scores, levels):
+        self.urls = urls
+        self.hosts = hosts
+        self.host_names = host_names
+        self.issues = issues
+        self.issue_names = issue_names
+        self.scores = scores
+        self.levels = levels
+
+    def __len__(self):
+        return len(self.urls)
+
+    # -----------------------
+    # Loading
+    # -----------------------
+
+    @classmethod
+    def from_results(cls, results):
+        """Build from an iterable of scan_webform() result dicts (later duplicates of a URL win)."""
+        if np is None:
+            raise RuntimeError("portfolio analytics require numpy (pip install numpy)")
+        issue_names = list(DEFAULT_ISSUE_RATINGS)
+        issue_index = {name: k for k, name in enumerate(issue_names)}
+        host_index = {}
+        rows = {}    # url -> (host code, [issue codes], score, level code)
+        for r in results:
+            url = r.get("url")
+            risk = r.get("risk")
+            if not url or not risk:
+                continue
+            host = host_index.setdefault(urlparse(url).netloc.lower(), len(host_index))
+            codes = []
+            for issue in r.get("issues", []):
+                if issue not in issue_index:
+                    issue_index[issue] = len(issue_names)
+                    issue_names.append(issue)
+                codes.append(issue_index[issue])
+            rows[url] = (host, codes, risk["normalized_score"], LEVEL_CODES.get(risk["level"], 0))
+
+        n = len(rows)
+        issues = np.zeros((n, len(issue_names)), dtype=bool)
+        hosts = np.empty(n, dtype=np.int32)
+        scores = np.empty(n, dtype=np.int16)
+        levels = np.empty(n, dtype=np.int8)
+        row_idx, col_idx = [], []
+        for i, (host, codes, score, level) in enumerate(rows.values()):
+            hosts[i] = host
+            scores[i] = score
+            levels[i] = level
+            row_idx.extend([i] * len(codes))
+            col_idx.extend(codes)
+        issues[row_idx, col_idx] = True
+        return cls(list(rows), hosts, list(host_index), issues, issue_names, scores, levels)
+
+    @classmethod
+    def load(cls, directory=None, jsonl_files=(), record_files=()):
+        """Load compliance_summary_*.json files from `directory`, JSON Lines result logs and/or .wfr record files."""
+        def results():
+            if directory is not None:
+                for path in sorted(glob.glob(os.path.join(directory, "compliance_summary_*.json"))):
+                    try:
+                        with open(path, "r", encoding="utf-8") as fh:
+                            yield json.load(fh)
+                    except (OSError, ValueError):
+                        continue
+            if jsonl_files:
+                from sinks import iter_jsonl
+                for path in jsonl_files:
+                    yield from iter_jsonl(path)
+            if record_files:
+                from records import iter_results
+                for path in record_files:
+                    yield from iter_results(path)
+        return cls.from_results(results())
+
+    # -----------------------
+    # Scoring
+    # -----------------------
+
+    def rating_vector(self, ratings=None):
+        """likelihood * impact per issue column; issues missing from `ratings` keep the defaults."""
+        ratings = ratings or {}
+        out = np.empty(len(self.issue_names), dtype=np.int32)
+        for k, name in enumerate(self.issue_names):
+            base = DEFAULT_ISSUE_RATINGS.get(name, {"likelihood": 3, "impact": 3})
+            rating = ratings.get(name, {})
+            out[k] = rating.get("likelihood", base["likelihood"]) * rating.get("impact", base["impact"])
+        return out
+
+    def score(self, ratings=None):
+        """
+        Vectorized compute_risk() for every result. Returns a dict of arrays:
+        raw_total, max_total, percent, normalized_score, level (codes into LEVELS).
+        """
+        raw = self.issues.astype(np.int32) @ self.rating_vector(ratings)
+        max_total = self.issues.sum(axis=1, dtype=np.int32) * MAX_ISSUE_SCORE
+        percent = np.divide(raw, max_total, out=np.zeros(len(raw)), where=max_total > 0)
+        # np.rint rounds halves to even, like the built-in round() in compute_risk()
+        normalized = np.rint(percent * 25).astype(np.int16)
+        level = np.where(percent >= 0.66, 2, np.where(percent >= 0.33, 1, 0)).astype(np.int8)
+        return {"raw_total": raw, "max_total": max_total, "percent": percent,
+                "normalized_score": normalized, "level": level}
+
+    # -----------------------
+    # Aggregates
+    # -----------------------
+
+    def level_distribution(self, levels=None):
+        levels = self.levels if levels is None else levels
+        counts = np.bincount(levels, minlength=len(LEVELS))
+        return {name: int(counts[code]) for code, name in enumerate(LEVELS)}
+
+    def issue_prevalence(self):
+        """{issue: {"count": results with it, "share": fraction of results}}, most common first."""
+        counts = self.issues.sum(axis=0)
+        n = max(len(self), 1)
+        order = np.argsort(-counts, kind="stable")
+        return {self.issue_names[k]: {"count": int(counts[k]), "share": round(float(counts[k]) / n, 4)}
+                for k in order if counts[k]}
+
+    def law_prevalence(self):
+        """Share of results implicating each law (via LAW_MAPPING of their issues)."""
+        laws = sorted({law for spec in LAW_MAPPING.values() for law in spec.get("laws", [])})
+        incidence = np.zeros((len(self.issue_names), len(laws)), dtype=np.int32)
+        law_index = {law: j for j, law in enumerate(laws)}
+        for k, name in enumerate(self.issue_names):
+            for law in LAW_MAPPING.get(name, {}).get("laws", []):
+                incidence[k, law_index[law]] = 1
+        hit = (self.issues.astype(np.int32) @ incidence) > 0
+        counts = hit.sum(axis=0)
+        n = max(len(self), 1)
+        order = np.argsort(-counts, kind="stable")
+        return {laws[j]: {"count": int(counts[j]), "share": round(float(counts[j]) / n, 4)}
+                for j in order if counts[j]}
+
+    def host_rollup(self, top=20, scores=None, levels=None):
+        """Per host: URL count, mean/max normalized score and level counts; worst mean score first."""
+        scores = self.scores if scores is None else scores
+        levels = self.levels if levels is None else levels
+        n_hosts = len(self.host_names)
+        if not n_hosts:
+            return []
+        urls = np.bincount(self.hosts, minlength=n_hosts)
+        mean = np.bincount(self.hosts, weights=scores, minlength=n_hosts) / np.maximum(urls, 1)
+        worst = np.full(n_hosts, -1, dtype=np.int32)
+        np.maximum.at(worst, self.hosts, scores)
+        by_level = np.zeros((n_hosts, len(LEVELS)), dtype=np.int64)
+        np.add.at(by_level, (self.hosts, levels), 1)
+        order = np.lexsort((-urls, -mean))[:top]
+        return [{"host": self.host_names[h], "urls": int(urls[h]), "mean_score": round(float(mean[h]), 2),
+                 "max_score": int(worst[h]),
+                 "levels": {name: int(by_level[h, c]) for c, name in enumerate(LEVELS)}}
+                for h in order]
+
+    def what_if(self, ratings):
+        """
+        Re-score every result under an alternative rating table.
+        Returns the new level distribution and a from -> to transition table.
+        """
+        rescored = self.score(ratings)
+        transitions = np.bincount(self.levels.astype(np.int64) * len(LEVELS) + rescored["level"],
+                                  minlength=len(LEVELS) ** 2).reshape(len(LEVELS), len(LEVELS))
+        return {
+            "levels": self.level_distribution(rescored["level"]),
+            "transitions": {LEVELS[a]: {LEVELS[b]: int(transitions[a, b]) for b in range(len(LEVELS))}
+                            for a in range(len(LEVELS))},
+            "changed": int(len(self) - np.trace(transitions)),
+            "mean_score": round(float(rescored["normalized_score"].mean()), 3) if len(self) else 0.0,
+        }
+
+    def report(self, ratings=None, top_hosts=20):
+        out = {
+            "results": len(self),
+            "hosts": len(self.host_names),
+            "levels": self.level_distribution(),
+            "mean_score": round(float(self.scores.mean()), 3) if len(self) else 0.0,
+            "issues": self.issue_prevalence(),
+            "laws": self.law_prevalence(),
+            "top_hosts": self.host_rollup(top=top_hosts),
+        }
+        if ratings:
+            out["what_if"] = self.what_if(ratings)
+        return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Portfolio analytics over scan results")
+    ap.add_argument("--dir", help="directory with compliance_summary_*.json (default: . unless --jsonl is given)")
+    ap.add_argument("--jsonl", action="append", default=[], help="JSON Lines results file (repeatable)")
+    ap.add_argument("--records", action="append", default=[], help="binary .wfr results file (repeatable)")
+    ap.add_argument("--ratings", help="alternative likelihood/impact table (JSON) for what-if re-scoring")
+    ap.add_argument("--hosts", type=int, default=20, help="hosts listed in the roll-up")
+    args = ap.parse_args(argv)
+
+    directory = args.dir if args.dir or args.jsonl or args.records else "."
+    portfolio = Portfolio.load(directory, args.jsonl, args.records)
+    ratings = None
+    if args.ratings:
+        with open(args.ratings, "r", encoding="utf-8") as fh:
+            ratings = json.load(fh)
+    json.dump(portfolio.report(ratings, top_hosts=args.hosts), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+# src/records.py
+"""
+Compact scan results: slotted records with interned strings, and a binary format.
+
+A scan_webform() result dict repeats the same text in every result: check
+names, check messages, issue names, and the laws and recommendations that
+compute_risk() copies out of LAW_MAPPING into every breakdown entry.
+ScanRecord keeps one result as small integers:
+
+    checks   (name id, ok, message id) per check
+    issues   issue-name ids
+    risk     raw_total, max_total, normalized_score, level code
+    inline   one JSON document: the check metas and any other keys ("details", ...)
+
+All ids point into a StringTable that a whole batch shares, and each distinct
+string is stored there only once. Only the few-valued strings are interned
+(check names, messages, issue names). Check meta holds per-site data such as
+cookie names and values, so it stays inline with its record and the table
+does not grow with the number of sites. The breakdown,
+laws and recommendations are not stored at all. to_result() rebuilds them
+from LAW_MAPPING and the risk model, so the dict schema is rebuilt exactly
+when it is needed. The one exception is "laws": it comes back in issue order,
+while the original is built from a set and has no stable order.
+
+The binary file format (.wfr) is a stream of frames that a reader can consume
+incrementally:
+
+    b"WFR\\x02"                            magic + version
+    0x01 <varint len> <utf-8>             next string of the table
+    0x02 <varint len> <record payload>    one result; strings it uses come first
+
+    with RecordWriter(open("results.wfr", "wb")) as out:
+        for r in scan_batch(urls):
+            out.write(r)
+    for r in iter_results("results.wfr"):     # dicts in the scan_webform() schema
+        ...
+"""
+import json
+from dataclasses import dataclass
+
+from reporting import GREEN, LAW_MAPPING, RED, YELLOW, calculate_issue_score
+
+MAGIC = b"WFR\x02"
+STRING_FRAME = 0x01
+RECORD_FRAME = 0x02
+LEVELS = ("LOW", "MEDIUM", "HIGH")
+LEVEL_CODES = {name: code for code, name in enumerate(LEVELS)}
+LEVEL_COLORS = {"LOW": GREEN, "MEDIUM": YELLOW, "HIGH": RED}
+_RESULT_KEYS = ("url", "checks", "issues", "recommendations", "laws", "risk")
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+class StringTable:
+    """Bidirectional string <-> id map; ids are dense and start at 1."""
+    __slots__ = ("ids", "strings")
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = [None]
+
+    def intern(self, s):
+        i = self.ids.get(s)
+        if i is None:
+            i = self.ids[s] = len(self.strings)
+            self.strings.append(s)
+        return i
+
+    def __getitem__(self, i):
+        return self.strings[i]
+
+    def __len__(self):
+        return len(self.strings) - 1
+
+
+# explicit __slots__ rather than dataclass(slots=True), which needs Python 3.10
+@dataclass(frozen=True)
+class CheckRecord:
+    __slots__ = ("name", "ok", "msg", "meta")
+    name: int
+    ok: bool
+    msg: int
+    meta: bool       # the check has a meta dict (kept in ScanRecord.inline)
+
+
+@dataclass
+class ScanRecord:
+    __slots__ = ("url", "checks", "issues", "raw_total", "max_total", "normalized_score", "level", "inline")
+    url: str
+    checks: tuple            # CheckRecord per check, in result order
+    issues: tuple            # issue-name ids
+    raw_total: int
+    max_total: int
+    normalized_score: int
+    level: int               # index into LEVELS
+    inline: str              # JSON [check metas in order, remaining keys], None if both are empty
+
+    @classmethod
+    def from_result(cls, result, table):
+        checks = []
+        metas = []
+        for name, check in result["checks"].items():
+            has_meta = "meta" in check
+            if has_meta:
+                metas.append(check["meta"])
+            checks.append(CheckRecord(
+                table.intern(name), bool(check.get("ok")), table.intern(check.get("msg") or ""), has_meta))
+        risk = result["risk"]
+        rest = {k: v for k, v in result.items() if k not in _RESULT_KEYS}
+        return cls(
+            url=result["url"],
+            checks=tuple(checks),
+            issues=tuple(table.intern(issue) for issue in result["issues"]),
+            raw_total=risk["raw_total"],
+            max_total=risk["max_total"],
+            normalized_score=risk["normalized_score"],
+            level=LEVEL_CODES[risk["level"]],
+            inline=_dumps([metas, rest]) if metas or rest else None,
+        )
+
+    def to_result(self, table):
+        """The scan_webform() result dict this record was made from."""
+        metas, rest = json.loads(self.inline) if self.inline else ((), None)
+        metas = iter(metas)
+        checks = {}
+        for c in self.checks:
+            check = {"ok": c.ok, "msg": table[c.msg]}
+            if c.meta:
+                check["meta"] = next(metas)
+            checks[table[c.name]] = check
+        issues = [table[i] for i in self.issues]
+        breakdown = []
+        laws = {}
+        recs = []
+        for issue in issues:
+            mapping = LAW_MAPPING.get(issue, {})
+            likelihood, impact, score = calculate_issue_score(issue)
+            breakdown.append({"issue": issue, "likelihood": likelihood, "impact": impact, "score": score,
+                              "laws": mapping.get("laws", []), "recommendation": mapping.get("recommendation", "")})
+            laws.update(dict.fromkeys(mapping.get("laws", [])))
+            if mapping.get("recommendation"):
+                recs.append(mapping["recommendation"])
+        level = LEVELS[self.level]
+        result = {
+            "url": self.url,
+            "checks": checks,
+            "issues": issues,
+            "recommendations": recs,
+            "laws": list(laws),
+        }
+        if rest:
+            result.update(rest)
+        result["risk"] = {
+            "breakdown": breakdown,
+            "raw_total": self.raw_total,
+            "max_total": self.max_total,
+            "percent": (self.raw_total / self.max_total) if self.max_total > 0 else 0,
+            "normalized_score": self.normalized_score,
+            "level": level,
+            "level_color": LEVEL_COLORS[level],
+        }
+        return result
+
+
+class RecordSet:
+    """An in-memory batch of ScanRecords sharing one StringTable."""
+    def __init__(self, table=None):
+        self.table = StringTable() if table is None else table
+        self.records = []
+
+    def add(self, result):
+        record = ScanRecord.from_result(result, self.table)
+        self.records.append(record)
+        return record
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def results(self):
+        """Yield the records as result dicts, one at a time."""
+        for record in self.records:
+            yield record.to_result(self.table)
+
+    def save(self, filename):
+        with RecordWriter(open(filename, "wb"), table=self.table) as out:
+            for record in self.records:
+                out.write_record(record)
+        return filename
+
+    @classmethod
+    def load(cls, filename):
+        table = StringTable()
+        out = cls(table)
+        out.records.extend(iter_records(filename, table))
+        return out
+
+
+# -----------------------
+# Binary encoding
+# -----------------------
+
+def _varint(n, out):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(buf, pos):
+    shift = result = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _put_bytes(data, out):
+    _varint(len(data), out)
+    out += data
+
+
+def encode_record(record):
+    """
+    Record payload: varints for every number and id, one flags byte per check
+    (bit 0 ok, bit 1 has meta), length-prefixed UTF-8 for url and inline.
+    """
+    out = bytearray()
+    _put_bytes(record.url.encode("utf-8"), out)
+    _varint(record.level, out)
+    _varint(record.raw_total, out)
+    _varint(record.max_total, out)
+    _varint(record.normalized_score, out)
+    _varint(len(record.checks), out)
+    for c in record.checks:
+        _varint(c.name, out)
+        out.append(c.ok | c.meta << 1)
+        _varint(c.msg, out)
+    _varint(len(record.issues), out)
+    for i in record.issues:
+        _varint(i, out)
+    _put_bytes(record.inline.encode("utf-8") if record.inline else b"", out)
+    return bytes(out)
+
+
+def encode_result(result, table, heads):
+    """
+    encode_record(ScanRecord.from_result(result, table)) in one pass, without
+    the intermediate record. `heads` caches the encoded (name, ok, message)
+    part of each check; like the table, it only holds few-valued strings.
+    """
+    out = bytearray()
+    _put_bytes(result["url"].encode("utf-8"), out)
+    risk = result["risk"]
+    numbers = (LEVEL_CODES[risk["level"]], risk["raw_total"], risk["max_total"], risk["normalized_score"])
+    if max(numbers) < 0x80:
+        out += bytes(numbers)
+    else:
+        for n in numbers:
+            _varint(n, out)
+    checks = result["checks"]
+    _varint(len(checks), out)
+    metas = []
+    for name, check in checks.items():
+        has_meta = "meta" in check
+        if has_meta:
+            metas.append(check["meta"])
+        key = (name, bool(check.get("ok")), has_meta, check.get("msg") or "")
+        head = heads.get(key)
+        if head is None:
+            head = bytearray()
+            _varint(table.intern(name), head)
+            head.append(key[1] | has_meta << 1)
+            _varint(table.intern(key[3]), head)
+            head = heads[key] = bytes(head)
+        out += head
+    issues = result["issues"]
+    _varint(len(issues), out)
+    for issue in issues:
+        _varint(table.intern(issue), out)
+    rest = {k: v for k, v in result.items() if k not in _RESULT_KEYS}
+    _put_bytes(_dumps([metas, rest]).encode("utf-8") if metas or rest else b"", out)
+    return bytes(out)
+
+
+def decode_record(buf):
+    pos = 0
+    n, pos = _read_varint(buf, pos)
+    url = buf[pos:pos + n].decode("utf-8")
+    pos += n
+    level, pos = _read_varint(buf, pos)
+    raw_total, pos = _read_varint(buf, pos)
+    max_total, pos = _read_varint(buf, pos)
+    normalized, pos = _read_varint(buf, pos)
+    n, pos = _read_varint(buf, pos)
+    checks = []
+    for _ in range(n):
+        name, pos = _read_varint(buf, pos)
+        flags = buf[pos]
+        pos += 1
+        msg, pos = _read_varint(buf, pos)
+        checks.append(CheckRecord(name, bool(flags & 1), msg, bool(flags & 2)))
+    n, pos = _read_varint(buf, pos)
+    issues = []
+    for _ in range(n):
+        i, pos = _read_varint(buf, pos)
+        issues.append(i)
+    n, pos = _read_varint(buf, pos)
+    inline = buf[pos:pos + n].decode("utf-8") if n else None
+    return ScanRecord(url, tuple(checks), tuple(issues), raw_total, max_total, normalized, level, inline)
+
+
+class RecordWriter:
+    """
+    Writes results to a binary stream; each record is preceded by the table
+    strings it introduced. Usable as a sink (write/close) and context manager.
+    """
+    def __init__(self, fh, table=None):
+        self.fh = fh
+        self.table = StringTable() if table is None else table
+        self.emitted = 0      # table strings already written
+        self.count = 0
+        self._heads = {}
+        fh.write(MAGIC)
+
+    def write(self, result):
+        self._write_payload(encode_result(result, self.table, self._heads))
+
+    def write_record(self, record):
+        self._write_payload(encode_record(record))
+
+    def _write_payload(self, payload):
+        """Write a record with the strings it introduced in one go and flush, like the other sinks."""
+        out = bytearray()
+        while self.emitted < len(self.table):
+            self.emitted += 1
+            out.append(STRING_FRAME)
+            _put_bytes(self.table[self.emitted].encode("utf-8"), out)
+        out.append(RECORD_FRAME)
+        _put_bytes(payload, out)
+        self.fh.write(out)
+        self.fh.flush()
+        self.count += 1
+
+    def close(self):
+        self.fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def iter_records(filename, table):
+    """
+    Yield ScanRecords from a .wfr file, filling `table` as strings arrive.
+    A torn last frame (crash while writing) ends the stream quietly.
+    """
+    with open(filename, "rb") as fh:
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{filename}: not a scan records file")
+        while True:
+            head = fh.read(1)
+            if not head:
+                return
+            n = shift = 0
+            while True:
+                b = fh.read(1)
+                if not b:
+                    return
+                n |= (b[0] & 0x7F) << shift
+                if b[0] < 0x80:
+                    break
+                shift += 7
+            payload = fh.read(n)
+            if len(payload) < n:
+                return
+            if head[0] == STRING_FRAME:
+                table.intern(payload.decode("utf-8"))
+            elif head[0] == RECORD_FRAME:
+                yield decode_record(payload)
+            else:
+                raise ValueError(f"{filename}: unknown frame type {head[0]}")
+
+
+def iter_results(filename):
+    """Yield result dicts (scan_webform() schema) from a .wfr file."""
+    table = StringTable()
+    for record in iter_records(filename, table):
+        yield record.to_result(table)
@@ -0,0 +1,216 @@
+# src/reporting.py
+"""
+Risk model and report rendering.
+
+Everything needed to score a list of issues and to write or print a result
+that is already in hand: colors, LAW_MAPPING, the default likelihood/impact
+ratings, compute_risk() and the JSON / Markdown writers. It only uses the
+standard library, so re-rendering saved results (main.py report) starts
+without loading requests, bs4 or the parsers. scanner.py re-exports all of it.
+"""
+import json
+import re
+from urllib.parse import urlparse
+
+# -----------------------
+# Colors / styling
+# -----------------------
+RESET = "\033[0m"
+BOLD = "\033[1m"
+RED = "\033[1;31m"
+GREEN = "\033[1;32m"
+YELLOW = "\033[1;33m"
+BLUE = "\033[1;34m"
+MAGENTA = "\033[1;35m"
+CYAN = "\033[1;36m"
+WHITE = "\033[1;37m"
+
+# -----------------------
+# Compliance mapping
+# -----------------------
+LAW_MAPPING = {
+    "No HTTPS": {
+        "laws": ["GDPR", "CCPA", "PDPA", "Bangladesh Data Protection Act 2023"],
+        "recommendation": "Enable HTTPS/TLS to secure data in transit."
+    },
+    "Form not secure": {
+        "laws": ["ISO 27001", "GDPR", "Bangladesh Digital Security Act"],
+        "recommendation": "Validate and sanitize form inputs and enforce secure form handling (server-side)."
+    },
+    "Privacy policy missing": {
+        "laws": ["GDPR", "CCPA", "PDPA", "Bangladesh Data Protection Act 2023"],
+        "recommendation": "Add a publicly accessible privacy policy detailing data collection and processing."
+    },
+    "Consent checkbox missing": {
+        "laws": ["GDPR", "CCPA", "PDPA", "COPPA"],
+        "recommendation": "Add explicit consent checkbox for data collection with proper labeling."
+    },
+    "Missing Security Header": {
+        "laws": ["ISO 27001", "GDPR"],
+        "recommendation": "Add recommended security headers (CSP, HSTS, X-Frame-Options, X-Content-Type-Options, Referrer-Policy)."
+    },
+    "Insecure Cookies": {
+        "laws": ["GDPR", "PDPA"],
+        "recommendation": "Set cookies with Secure, HttpOnly and SameSite attributes where appropriate."
+    },
+    "Trackers Detected": {
+        "laws": ["GDPR", "CCPA"],
+        "recommendation": "Disclose trackers and obtain consent where required; consider limiting third-party trackers."
+    },
+    "Missing CSRF Token": {
+        "laws": ["ISO 27001", "GDPR"],
+        "recommendation": "Implement anti-CSRF tokens for form submissions."
+    }
+}
+
+# -----------------------
+# Risk model defaults (per issue values)
+# Each issue gets a default Likelihood (1-5) and Impact (1-5).
+# You can tune these defaults to match your risk model.
+# -----------------------
+DEFAULT_ISSUE_RATINGS = {
+    "No HTTPS":             {"likelihood": 5, "impact": 4},
+    "Form not secure":      {"likelihood": 4, "impact": 3},
+    "Privacy policy missing":{"likelihood": 3, "impact": 3},
+    "Consent checkbox missing":{"likelihood": 3, "impact": 2},
+    "Missing Security Header":{"likelihood": 3, "impact": 3},
+    "Insecure Cookies":     {"likelihood": 3, "impact": 3},
+    "Trackers Detected":    {"likelihood": 4, "impact": 2},
+    "Missing CSRF Token":   {"likelihood": 4, "impact": 3}
+}
+
+# -----------------------
+# Risk calculation & reporting
+# -----------------------
+
+def calculate_issue_score(issue_key, override_rating=None):
+    """
+    Returns (likelihood, impact, score)
+    If override_rating provided, it should be dict {"likelihood":int, "impact":int}
+    """
+    base = DEFAULT_ISSUE_RATINGS.get(issue_key, {"likelihood": 3, "impact": 3})
+    if override_rating:
+        l = override_rating.get("likelihood", base["likelihood"])
+        i = override_rating.get("impact", base["impact"])
+    else:
+        l = base["likelihood"]
+        i = base["impact"]
+    score = l * i  # 5x5 matrix product value
+    return l, i, score
+
+def compute_risk(issues_detected):
+    """
+    issues_detected: list of issue keys, e.g. ["No HTTPS", "Privacy policy missing", ...]
+    Returns a dict with per-issue breakdown and aggregate totals and level.
+    """
+    breakdown = []
+    total_score = 0
+    max_possible = 0
+    for issue in issues_detected:
+        l, i, s = calculate_issue_score(issue)
+        breakdown.append({
+            "issue": issue,
+            "likelihood": l,
+            "impact": i,
+            "score": s,
+            "laws": LAW_MAPPING.get(issue, {}).get("laws", []),
+            "recommendation": LAW_MAPPING.get(issue, {}).get("recommendation", "")
+        })
+        total_score += s
+        max_possible += 5 * 5  # each issue max 25
+
+    # Normalize to percentage of max and then map to a 0-25 like scale for human-friendly labels
+    percent = (total_score / max_possible) if max_possible > 0 else 0
+    normalized_0_25 = round(percent * 25)
+
+    # Determine severity
+    if percent >= 0.66:
+        level = "HIGH"
+        level_color = RED
+    elif percent >= 0.33:
+        level = "MEDIUM"
+        level_color = YELLOW
+    else:
+        level = "LOW"
+        level_color = GREEN
+
+    return {
+        "breakdown": breakdown,
+        "raw_total": total_score,
+        "max_total": max_possible,
+        "percent": percent,
+        "normalized_score": normalized_0_25,
+        "level": level,
+        "level_color": level_color
+    }
+
+def json_report_filename(url):
+    parsed = urlparse(url)
+    safe = parsed.netloc + parsed.path
+    safe = re.sub(r"[^a-zA-Z0-9_\-\.]", "_", safe).strip("_")
+    return f"compliance_summary_{safe}.json"
+
+def generate_json_report(result, filename=None, indent=2):
+    if not filename:
+        filename = json_report_filename(result["url"])
+
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=indent, ensure_ascii=False)
+
+    return filename
+
+def write_markdown_header(f):
+    f.write("# WebForm Privacy Compliance - Combined Report\n\n")
+
+def write_markdown_result(f, r):
+    """Write one result's section of the combined Markdown report to an open file."""
+    f.write(f"## URL: {r['url']}\n\n")
+    f.write(f"### Checks\n")
+    for k, v in r["checks"].items():
+        status = "OK" if v.get("ok") else "⚠ NOT OK"
+        f.write(f"- **{k}**: {status} — {v.get('msg')}\n")
+    redirects = r.get("details", {}).get("redirects")
+    if redirects:
+        f.write("\n### Redirect Chain\n")
+        for i, hop in enumerate(redirects["hops"]):
+            missing = ", ".join(hop["missing_headers"]) or "none"
+            f.write(f"- {i}: {hop['status']} {hop['url']} — missing headers: {missing}, "
+                    f"cookies set: {len(hop['cookies'])}\n")
+    f.write("\n### Issues Detected\n")
+    if r["issues"]:
+        for iss in r["issues"]:
+            f.write(f"- {iss}\n")
+    else:
+        f.write("- None\n")
+
+    f.write("\n### Risk Breakdown\n")
+    f.write(f"- Raw total (sum of Likelihood×Impact per issue): {r['risk']['raw_total']}\n")
+    f.write(f"- Max possible for detected issues: {r['risk']['max_total']}\n")
+    f.write(f"- Normalized (0-25): {r['risk']['normalized_score']}\n")
+    f.write(f"- Risk Level: {r['risk']['level']}\n\n")
+
+    f.write("#### Calculation details:\n")
+    for b in r['risk']['breakdown']:
+        f.write(f"- Issue: {b['issue']}: Likelihood={b['likelihood']} × Impact={b['impact']} = {b['score']}\n")
+        if b.get("laws"):
+            f.write(f"  - Laws: {', '.join(b.get('laws'))}\n")
+        if b.get("recommendation"):
+            f.write(f"  - Recommendation: {b.get('recommendation')}\n")
+
+    f.write("\n### Recommendations (summary)\n")
+    if r['recommendations']:
+        for rec in r['recommendations']:
+            f.write(f"- {rec}\n")
+    else:
+        f.write("- No recommendations (site looks good)\n")
+    f.write("\n---\n\n")
+
+def generate_markdown_report(all_results, filename="report.md"):
+    """
+    all_results: list of result dicts
+    """
+    with open(filename, "w", encoding="utf-8") as f:
+        write_markdown_header(f)
+        for r in all_results:
+            write_markdown_result(f, r)
+    return filename
@@ -0,0 +1,193 @@
+# src/resources.py
+"""
+Deep checks on resources that pages share.
+
+Off by default. With a ResourceCache passed to scan_webform(..., resources=...):
+
+  * the linked privacy policy is fetched, and the check only passes if it
+    resolves (2xx/3xx to an HTML page that mentions privacy);
+  * external <script src> bodies are fetched and run through the tracker
+    signature engine, so trackers that a tag manager or bundle loads are
+    reported even when the src URL itself looks harmless.
+
+Hundreds of pages of a site link the same policy and load the same scripts.
+The cache is shared by the whole batch and deduplicates in-flight work: the
+first page that needs a resource starts the download, and every later page
+waits on that same future. Script bodies are also keyed by content hash, so
+a file served under several URLs is analyzed once.
+"""
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+from analyzer import PrivacyVisitor, ScriptSrcVisitor
+from parsers import analyze_markup
+from scanner import fetch_url
+from signatures import DEFAULT_ENGINE
+
+DEFAULT_RESOURCE_WORKERS = 8
+MAX_SCRIPTS_PER_PAGE = 40
+MAX_SCRIPT_BYTES = 4 * 1024 * 1024
+
+
+def _absolute(href, base):
+    """Absolute http(s) URL without fragment, or None (mailto:, javascript:, ...)."""
+    url, _ = urldefrag(urljoin(base, href.strip()))
+    return url if urlsplit(url).scheme in ("http", "https") else None
+
+
+def _read_capped(response, max_bytes):
+    """Read at most max_bytes of a streamed body; returns (bytes, truncated)."""
+    parts = []
+    size = 0
+    try:
+        for chunk in response.iter_content(64 * 1024):
+            parts.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                break
+    finally:
+        response.close()
+    body = b"".join(parts)
+    return body[:max_bytes], size > max_bytes
+
+
+# -----------------------
+# Resource analyses (run once per URL per batch)
+# -----------------------
+
+def fetch_policy(url, session=None):
+    """Does the privacy policy link resolve to a page that looks like a policy?"""
+    r = fetch_url(url, session=session)
+    if r is None:
+        return {"url": url, "resolved": False, "status": None, "reason": "no response"}
+    info = {"url": url, "final_url": r.url, "status": r.status_code}
+    ctype = (r.headers.get("Content-Type") or "").lower()
+    if not r:
+        info.update(resolved=False, reason=f"HTTP {r.status_code}")
+    elif ctype and "html" not in ctype and "pdf" not in ctype and "text" not in ctype:
+        info.update(resolved=False, reason=f"unexpected content type {ctype.split(';')[0]}")
+    elif "pdf" not in ctype and "privacy" not in r.text.lower():
+        info.update(resolved=False, reason="page does not mention privacy")
+    else:
+        info.update(resolved=True, reason="ok")
+    return info
+
+
+class ResourceCache:
+    """
+    Batch-wide cache of resource analyses with in-flight deduplication.
+    Thread-safe; share one instance across all workers of a run.
+    """
+    def __init__(self, workers=DEFAULT_RESOURCE_WORKERS, session=None, max_script_bytes=MAX_SCRIPT_BYTES):
+        self.session = session
+        self.max_script_bytes = max_script_bytes
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+        self._futures = {}       # (kind, url) -> Future of the analysis dict
+        self._by_digest = {}     # sha256 of a script body -> tracker list
+        self.counters = {"fetches": 0, "hits": 0, "inflight_waits": 0, "content_dups": 0}
+
+    def _get(self, kind, url, loader):
+        key = (kind, url)
+        with self._lock:
+            fut = self._futures.get(key)
+            if fut is None:
+                self.counters["fetches"] += 1
+                fut = self._futures[key] = self._pool.submit(loader, url)
+            elif fut.done():
+                self.counters["hits"] += 1
+            else:
+                self.counters["inflight_waits"] += 1
+        return fut
+
+    def policy(self, url):
+        return self._get("policy", url, lambda u: fetch_policy(u, session=self.session))
+
+    def script(self, url):
+        return self._get("script", url, self._fetch_script)
+
+    def _fetch_script(self, url):
+        r = fetch_url(url, session=self.session, stream=True)
+        if r is None:
+            return {"url": url, "ok": False, "status": None, "trackers": []}
+        if not r:
+            r.close()
+            return {"url": url, "ok": False, "status": r.status_code, "trackers": []}
+        body, truncated = _read_capped(r, self.max_script_bytes)
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            trackers = self._by_digest.get(digest)
+            if trackers is not None:
+                self.counters["content_dups"] += 1
+        if trackers is None:
+            # signatures are ASCII, so decoding errors cannot hide a match
+            trackers = DEFAULT_ENGINE.scan(body.decode("utf-8", errors="replace").lower())
+            with self._lock:
+                self._by_digest[digest] = trackers
+        return {"url": url, "ok": True, "status": r.status_code, "bytes": len(body),
+                "truncated": truncated, "sha256": digest, "trackers": list(trackers)}
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["resources"] = len(self._futures)
+        return stats
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+
+# -----------------------
+# Page integration
+# -----------------------
+
+def analyze_with_resources(url, response, resources, parser="auto", timings=None, names=None):
+    """
+    Run the DOM checks plus the deep resource checks for a fetched page.
+    Returns (dom, info): dom in the analyze_markup() format, with the privacy
+    and tracker entries adjusted, for analyze_response(dom=...), and info for
+    details["resources"]. timings is passed on to analyze_markup().
+    names: the DOM checks to run (default: all); the policy is only fetched
+    for "privacy_policy" and scripts only for "trackers".
+    """
+    extra = {}
+    if names is None or "privacy_policy" in names:
+        privacy = extra["privacy_policy"] = PrivacyVisitor()
+    if names is None or "trackers" in names:
+        extra["script_srcs"] = ScriptSrcVisitor()
+    dom = analyze_markup(response.text, backend=parser, names=names, extra=extra, timings=timings)
+    if timings is not None:
+        timings["dom_checks"].pop("script_srcs", None)
+    srcs = dom.pop("script_srcs", [])
+    base = response.url or url
+    info = {}
+
+    # privacy policy: the link must resolve
+    policy_url = _absolute(privacy.href, base) if "privacy_policy" in extra and privacy.href else None
+    script_urls = [u for u in (_absolute(s, base) for s in srcs[:MAX_SCRIPTS_PER_PAGE]) if u]
+    policy_future = resources.policy(policy_url) if policy_url else None
+    script_futures = [resources.script(u) for u in script_urls]
+
+    if policy_future is not None:
+        policy = policy_future.result()
+        info["privacy_policy"] = policy
+        if not policy["resolved"]:
+            dom["privacy_policy"] = (False, f"⚠ Privacy policy link does not resolve ({policy['reason']})")
+
+    # external scripts: trackers found inside their bodies
+    if script_futures:
+        script_infos = [f.result() for f in script_futures]
+        info["scripts"] = [{k: s[k] for k in ("url", "ok", "status", "trackers")} for s in script_infos]
+        _, _, meta = dom["trackers"]
+        found = list(meta.get("trackers", []))
+        for s in script_infos:
+            for name in s["trackers"]:
+                if name not in found:
+                    found.append(name)
+        if found:
+            meta = {"trackers": found,
+                    "script_trackers": {s["url"]: s["trackers"] for s in script_infos if s["trackers"]}}
+            dom["trackers"] = (True, f"Trackers detected: {', '.join(found)}", meta)
+    return dom, info
@@ -1,75 +1,29 @@
 # src/scanner.py
-import requests
-from bs4 import BeautifulSoup
-import json
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+import codecs
 import re
+import time
 from urllib.parse import urlparse
 
-# -----------------------
-# Colors / styling
-# -----------------------
-RESET = "\033[0m"
-BOLD = "\033[1m"
-RED = "\033[1;31m"
-GREEN = "\033[1;32m"
-YELLOW = "\033[1;33m"
-BLUE = "\033[1;34m"
-MAGENTA = "\033[1;35m"
-CYAN = "\033[1;36m"
-WHITE = "\033[1;37m"
-
-# -----------------------
-# Compliance mapping
-# -----------------------
-LAW_MAPPING = {
-    "No HTTPS": {
-        "laws": ["GDPR", "CCPA", "PDPA", "Bangladesh Data Protection Act 2023"],
-        "recommendation": "Enable HTTPS/TLS to secure data in transit."
-    },
-    "Form not secure": {
-        "laws": ["ISO 27001", "GDPR", "Bangladesh Digital Security Act"],
-        "recommendation": "Validate and sanitize form inputs and enforce secure form handling (server-side)."
-    },
-    "Privacy policy missing": {
-        "laws": ["GDPR", "CCPA", "PDPA", "Bangladesh Data Protection Act 2023"],
-        "recommendation": "Add a publicly accessible privacy policy detailing data collection and processing."
-    },
-    "Consent checkbox missing": {
-        "laws": ["GDPR", "CCPA", "PDPA", "COPPA"],
-        "recommendation": "Add explicit consent checkbox for data collection with proper labeling."
-    },
-    "Missing Security Header": {
-        "laws": ["ISO 27001", "GDPR"],
-        "recommendation": "Add recommended security headers (CSP, HSTS, X-Frame-Options, X-Content-Type-Options, Referrer-Policy)."
-    },
-    "Insecure Cookies": {
-        "laws": ["GDPR", "PDPA"],
-        "recommendation": "Set cookies with Secure, HttpOnly and SameSite attributes where appropriate."
-    },
-    "Trackers Detected": {
-        "laws": ["GDPR", "CCPA"],
-        "recommendation": "Disclose trackers and obtain consent where required; consider limiting third-party trackers."
-    },
-    "Missing CSRF Token": {
-        "laws": ["ISO 27001", "GDPR"],
-        "recommendation": "Implement anti-CSRF tokens for form submissions."
-    }
-}
-
-# -----------------------
-# Risk model defaults (per issue values)
-# Each issue gets a default Likelihood (1-5) and Impact (1-5).
-# You can tune these defaults to match your risk model.
-# -----------------------
-DEFAULT_ISSUE_RATINGS = {
-    "No HTTPS":             {"likelihood": 5, "impact": 4},
-    "Form not secure":      {"likelihood": 4, "impact": 3},
-    "Privacy policy missing":{"likelihood": 3, "impact": 3},
-    "Consent checkbox missing":{"likelihood": 3, "impact": 2},
-    "Missing Security Header":{"likelihood": 3, "impact": 3},
-    "Insecure Cookies":     {"likelihood": 3, "impact": 3},
-    "Trackers Detected":    {"likelihood": 4, "impact": 2},
-    "Missing CSRF Token":   {"likelihood": 4, "impact": 3}
+import instrument
+from analyzer import analyze_html, link_is_resource_hint
+from parsers import analyze_markup
+from reporting import (RESET, BOLD, RED, GREEN, YELLOW, BLUE, MAGENTA, CYAN, WHITE, LAW_MAPPING, DEFAULT_ISSUE_RATINGS,
+                       calculate_issue_score, compute_risk, generate_json_report, generate_markdown_report,
+                       json_report_filename, write_markdown_header, write_markdown_result)
+from signatures import DEFAULT_ENGINE
+from transport import (PooledAdapter, get_default_session, read_connect_timer, read_socket_timer,
+                       reset_connect_timer)
+
+# Recommended security headers -> short label used in results
+SECURITY_HEADERS = {
+    "Content-Security-Policy": "CSP",
+    "Strict-Transport-Security": "HSTS",
+    "X-Frame-Options": "X-Frame-Options",
+    "X-Content-Type-Options": "X-Content-Type-Options",
+    "Referrer-Policy": "Referrer-Policy",
+    "Permissions-Policy": "Permissions-Policy"
 }
 
 # Helper: safe requests.get with headers and timeout
@@ -77,15 +31,142 @@ DEFAULT_HEADERS = {
     "User-Agent": "WebFormPrivacyScanner/1.0 (+https://example.com)"
 }
 
-def fetch_url(url, timeout=7):
+# Upper bound on the HTML downloaded per page in streaming mode
+DEFAULT_MAX_BODY_BYTES = 2 * 1024 * 1024
+STREAM_CHUNK_SIZE = 16 * 1024
+
+def fetch_url(url, timeout=7, session=None, stream=False, headers=None, method="GET"):
+    """
+    GET a URL through a pooled keep-alive session (the shared default one unless
+    `session` is given). The response carries a `fetch_timing` dict splitting
+    connect (TCP+TLS handshake) time from transfer time.
+    stream=True returns as soon as headers arrive; the caller reads and closes the body.
+    headers: extra request headers (e.g. If-None-Match) on top of DEFAULT_HEADERS.
+    method: "HEAD" for the headers-only fast lane (see fetch_headers).
+    """
+    session = session or get_default_session()
+    reset_connect_timer()
+    start = time.perf_counter()
     try:
-        r = requests.get(url, headers=DEFAULT_HEADERS, timeout=timeout, allow_redirects=True)
-        return r
+        r = session.request(method, url, headers=dict(DEFAULT_HEADERS, **headers) if headers else DEFAULT_HEADERS,
+                            timeout=timeout, allow_redirects=True, stream=stream)
     except Exception as e:
         return None
+    total = time.perf_counter() - start
+    connect_time, connects = read_connect_timer()
+    adapter = session.get_adapter(url)
+    if isinstance(adapter, PooledAdapter):
+        adapter.record(connect_time, connects, total)
+    r.fetch_timing = {
+        "total_s": round(total, 4),
+        "connect_s": round(connect_time, 4),
+        "transfer_s": round(total - connect_time, 4),
+        "new_connections": connects,
+        "connection_reused": connects == 0,
+    }
+    if instrument.ENABLED:
+        r.fetch_timing.update(instrument.fetch_details(r, connect_time, read_socket_timer(), stream))
+    return r
+
+def fetch_headers(url, timeout=7, session=None, method="auto"):
+    """
+    Fetch only the status line and headers (for the header-derived checks).
+    method="auto" sends HEAD, and falls back to a GET that is closed as soon as
+    the headers arrive when HEAD fails or gets an error status (405/501 and
+    friends from servers that mishandle HEAD); the session's pooled adapter
+    remembers such hosts for a while (transport.HostMemo), so their next
+    fetches go straight to GET. method="HEAD"/"GET" forces one way.
+    The response's fetch_timing records the "method" that produced it.
+    """
+    host = urlparse(url).netloc.lower()
+    adapter = (session or get_default_session()).get_adapter(url)
+    memo = adapter.head_unsupported if isinstance(adapter, PooledAdapter) else None
+    r = None
+    head_failed = False
+    if method == "HEAD" or (method == "auto" and (memo is None or host not in memo)):
+        r = fetch_url(url, timeout=timeout, session=session, method="HEAD")
+        if method == "auto" and (r is None or not r):
+            head_failed = True
+            r = None
+        elif r is not None:
+            r.fetch_timing["method"] = "HEAD"
+    if r is None and method != "HEAD":
+        r = fetch_url(url, timeout=timeout, session=session, stream=True)
+        if r is not None:
+            r.close()  # drop the body unread
+            r.fetch_timing["method"] = "GET"
+            if head_failed and r and memo is not None:
+                memo.add(host)  # GET works where HEAD did not
+    return r
+
+def text_codec(encoding):
+    """`encoding` if Python knows the codec, else "utf-8" (servers declare charsets like "bogus")."""
+    if encoding:
+        try:
+            codecs.lookup(encoding)
+            return encoding
+        except LookupError:
+            pass
+    return "utf-8"
+
+def iter_body_text(response, max_bytes, info, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield decoded text chunks of a streamed response body, stopping after max_bytes.
+    Updates `info` in place: bytes_read, truncated, and error if the transfer broke off.
+    """
+    decoder = codecs.getincrementaldecoder(text_codec(response.encoding))(errors="replace")
+    try:
+        for chunk in response.iter_content(chunk_size):
+            if not chunk:
+                continue
+            room = max_bytes - info["bytes_read"]
+            if len(chunk) > room:
+                chunk = chunk[:room]
+                info["truncated"] = True
+            info["bytes_read"] += len(chunk)
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+            if info["truncated"]:
+                break
+    except Exception as e:
+        info["error"] = str(e)
+        info["truncated"] = True
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+class FetchedResponse:
+    """
+    Minimal stand-in for requests.Response built from an already downloaded body
+    (async fetches, cached or forwarded responses). Exposes what the checks use:
+    url, status_code, headers, content, text and history (the redirect
+    responses that led here, oldest first).
+    """
+    def __init__(self, url, status_code, headers, content, encoding=None, history=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content or b""
+        self.encoding = encoding or get_encoding_from_headers(self.headers)
+        self.history = list(history or ())
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def __bool__(self):
+        # mirror requests.Response: error statuses are falsy
+        return self.ok
+
+    @property
+    def text(self):
+        return self.content.decode(text_codec(self.encoding), errors="replace")
 
 # -----------------------
 # Scanning functions
+# Each DOM check below walks the tree on its own; scan_webform() runs the
+# equivalent visitors from analyzer.py in a single traversal instead.
 # -----------------------
 
 def check_https(url):
@@ -93,6 +174,34 @@ def check_https(url):
     msg = "HTTPS enabled" if ok else "⚠ Site does NOT use HTTPS"
     return ok, msg
 
+def response_hops(response):
+    """Every response of one fetch: the redirects in response.history, then the final response."""
+    if response is None:
+        return []
+    return list(getattr(response, "history", None) or ()) + [response]
+
+def check_https_chain(url, response):
+    """
+    HTTPS judged on the redirect chain that was actually followed rather than on
+    the URL string: http:// upgraded to https:// passes, a hop that drops from
+    HTTPS back to HTTP fails. Without redirects this is check_https(url).
+    Returns (ok, msg, meta) with meta {"upgraded", "downgraded"}.
+    """
+    hops = response_hops(response)
+    if len(hops) < 2:
+        ok, msg = check_https(url)
+        return ok, msg, {}
+    secure = [h.url.lower().startswith("https://") for h in hops]
+    downgraded = any(a and not b for a, b in zip(secure, secure[1:]))
+    upgraded = not secure[0] and secure[-1]
+    meta = {"upgraded": upgraded, "downgraded": downgraded}
+    if not secure[-1]:
+        msg = "⚠ Redirected from HTTPS to HTTP" if downgraded else "⚠ Site does NOT use HTTPS"
+        return False, msg, meta
+    if downgraded:
+        return False, "⚠ Redirect chain passes through HTTP before reaching HTTPS", meta
+    return True, "HTTPS enabled (HTTP redirects to HTTPS)" if upgraded else "HTTPS enabled", meta
+
 def check_form_security(soup, base_url=None):
     """
     Analyze forms: count forms, look for password fields, CSRF tokens, form action (http vs https)
@@ -158,14 +267,7 @@ def check_security_headers(response):
     headers = response.headers
     missing = []
     found = {}
-    keys = {
-        "Content-Security-Policy": "CSP",
-        "Strict-Transport-Security": "HSTS",
-        "X-Frame-Options": "X-Frame-Options",
-        "X-Content-Type-Options": "X-Content-Type-Options",
-        "Referrer-Policy": "Referrer-Policy",
-        "Permissions-Policy": "Permissions-Policy"
-    }
+    keys = SECURITY_HEADERS
     for k in keys:
         if k in headers:
             found[keys[k]] = headers.get(k)
@@ -216,106 +318,326 @@ def check_cookies(response):
     summary = f"{len(cookies_info)} cookie(s) detected, {insecure_count} cookie(s) missing Secure/HttpOnly"
     return (insecure_count == 0), summary, {"cookies": cookies_info, "insecure_count": insecure_count}
 
+def check_cookies_chain(response):
+    """
+    check_cookies() over every hop of the redirect chain: cookies set by a
+    redirect (often the session cookie) count as well, each tagged with the
+    index of its hop. Same as check_cookies(response) when no redirect set any.
+    """
+    hops = response_hops(response)
+    if not any(h.headers.get("Set-Cookie") for h in hops[:-1]):
+        return check_cookies(response)
+    cookies = []
+    insecure_count = 0
+    for i, hop in enumerate(hops):
+        _, _, meta = check_cookies(hop)
+        cookies.extend(dict(c, hop=i) for c in meta.get("cookies", []))
+        insecure_count += meta.get("insecure_count", 0)
+    summary = (f"{len(cookies)} cookie(s) detected across {len(hops)} responses, "
+               f"{insecure_count} cookie(s) missing Secure/HttpOnly")
+    return (insecure_count == 0), summary, {"cookies": cookies, "insecure_count": insecure_count}
+
+def redirect_chain(url, response):
+    """
+    Per-hop record of a followed redirect chain, built from the responses the
+    fetch already holds (no extra requests). None when there was no redirect.
+    Every hop has its URL, status, Location, time to its headers, whether it
+    was HTTPS, the security headers it lacked and the cookies it set.
+    """
+    hops = response_hops(response)
+    if len(hops) < 2:
+        return None
+    _, _, meta = check_https_chain(url, response)
+    chain = []
+    for i, hop in enumerate(hops):
+        _, _, headers = check_security_headers(hop)
+        _, _, cookies = check_cookies(hop)
+        elapsed = getattr(hop, "elapsed", None)
+        chain.append({
+            "url": hop.url,
+            "status": hop.status_code,
+            "https": hop.url.lower().startswith("https://"),
+            "location": hop.headers.get("Location") if i < len(hops) - 1 else None,
+            "elapsed_s": round(elapsed.total_seconds(), 4) if elapsed is not None else None,
+            "missing_headers": headers.get("missing", []),
+            "cookies": cookies.get("cookies", []),
+        })
+    return {"hops": chain, "final_url": hops[-1].url, **meta}
+
 def detect_js_trackers(soup):
     """
-    Simple heuristic: look for known tracker keywords in script src or inline scripts
+    Look for known tracker signatures (tracker_signatures.json) in inline scripts,
+    script src URLs, <img>/<iframe> pixels and <link> preconnect/prefetch hints.
     """
-    tracker_patterns = {
-        "GoogleAnalytics": [r"google-analytics", r"gtag\(", r"analytics.js", r"ga\("],
-        "GoogleTagManager": [r"googletagmanager", r"gtm.js"],
-        "FacebookPixel": [r"connect.facebook.net", r"fbq\("],
-        "TikTok": [r"tiktok", r"analytics.tiktok"],
-        "DoubleClick": [r"doubleclick", r"googlesyndication"],
-        "Hotjar": [r"hotjar"],
-    }
     found = []
-    # search script src attributes
-    for s in soup.find_all("script"):
-        src = (s.get("src") or "").lower()
-        text = (s.string or "") or ""
-        combined = src + " " + text.lower()
-        for name, pats in tracker_patterns.items():
-            for pat in pats:
-                if pat in combined:
-                    if name not in found:
-                        found.append(name)
+    for el in soup.find_all(["script", "img", "iframe", "link"]):
+        if el.name == "script":
+            DEFAULT_ENGINE.scan((el.get("src") or "").lower(), found)
+            DEFAULT_ENGINE.scan((el.string or "").lower(), found)
+        elif el.name == "link":
+            rel = el.get("rel") or ""
+            if isinstance(rel, list):
+                rel = " ".join(rel)
+            if link_is_resource_hint(rel):
+                DEFAULT_ENGINE.scan((el.get("href") or "").lower(), found)
+        else:
+            DEFAULT_ENGINE.scan((el.get("src") or "").lower(), found)
     if found:
         return True, f"Trackers detected: {', '.join(found)}", {"trackers": found}
     return False, "No common trackers auto-detected", {"trackers": []}
 
 # -----------------------
-# Risk calculation & reporting
+# Rule registry
+# Every entry of result["checks"] comes from a rule. A rule declares the
+# input it needs: "url", "headers" (status + headers, no body) or "dom"
+# (the DOM visitor results, which need the body). compile_plan() turns the
+# enabled rules into an execution plan once; a plan without DOM rules never
+# downloads or parses the body, and only the visitors of enabled DOM rules run.
 # -----------------------
+NO_RESPONSE_MSG = "No response / cannot parse"
+RULE_INPUTS = ("url", "headers", "dom")
+
+# name (key in result["checks"]) -> {"needs", "evaluate", "dom_check"}; insertion order = check order
+RULES = {}
+
+# profile -> inputs its rules may use
+PROFILES = {
+    "full": RULE_INPUTS,
+    "headers": ("url", "headers"),   # header drift monitoring: no body download at all
+}
 
-def calculate_issue_score(issue_key, override_rating=None):
+_PLANS = {}
+
+def register_rule(name, needs, evaluate, dom_check=None):
+    """
+    Add (or replace) a rule. evaluate(url, response, dom) returns
+    (check dict, [issue keys]); response may be None and dom may be None/empty
+    when the page could not be fetched or parsed. dom_check names the
+    analyzer.DOM_CHECKS visitor a "dom" rule reads (defaults to the rule name).
     """
-    Returns (likelihood, impact, score)
-    If override_rating provided, it should be dict {"likelihood":int, "impact":int}
+    if needs not in RULE_INPUTS:
+        raise ValueError(f"Unknown rule input: {needs} (choose from {', '.join(RULE_INPUTS)})")
+    RULES[name] = {"needs": needs, "evaluate": evaluate,
+                   "dom_check": (dom_check or name) if needs == "dom" else None}
+    _PLANS.clear()
+
+def compile_plan(profile="full", enable=None, disable=()):
     """
-    base = DEFAULT_ISSUE_RATINGS.get(issue_key, {"likelihood": 3, "impact": 3})
-    if override_rating:
-        l = override_rating.get("likelihood", base["likelihood"])
-        i = override_rating.get("impact", base["impact"])
+    Execution plan for a run: the rules of `profile`, narrowed to `enable` (if
+    given) and without `disable`. Plans are cached; pass them to scan_webform(plan=...).
+    """
+    key = (profile, tuple(enable) if enable is not None else None, tuple(disable))
+    plan = _PLANS.get(key)
+    if plan is not None:
+        return plan
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown rule profile: {profile} (choose from {', '.join(PROFILES)})")
+    unknown = [n for n in list(enable or ()) + list(disable) if n not in RULES]
+    if unknown:
+        raise ValueError(f"Unknown rule(s): {', '.join(unknown)} (choose from {', '.join(RULES)})")
+    rules = [(name, rule) for name, rule in RULES.items()
+             if rule["needs"] in PROFILES[profile]
+             and (enable is None or name in enable) and name not in disable]
+    plan = {
+        "name": profile if enable is None and not disable else "custom",
+        "rules": rules,
+        "dom_checks": tuple(rule["dom_check"] for _, rule in rules if rule["needs"] == "dom"),
+        "needs_body": any(rule["needs"] == "dom" for _, rule in rules),
+    }
+    _PLANS[key] = plan
+    return plan
+
+def resolve_plan(plan=None):
+    """None -> full plan, a profile name -> that profile's plan, a plan -> itself."""
+    if plan is None:
+        return compile_plan()
+    if isinstance(plan, str):
+        return compile_plan(plan)
+    return plan
+
+def _rule_https(url, response, dom):
+    ok, msg, _ = check_https_chain(url, response)
+    return {"ok": ok, "msg": msg}, ([] if ok else ["No HTTPS"])
+
+def _rule_forms(url, response, dom):
+    if dom:
+        ok, msg, meta = dom["forms"]
     else:
-        l = base["likelihood"]
-        i = base["impact"]
-    score = l * i  # 5x5 matrix product value
-    return l, i, score
-
-def compute_risk(issues_detected):
-    """
-    issues_detected: list of issue keys, e.g. ["No HTTPS", "Privacy policy missing", ...]
-    Returns a dict with per-issue breakdown and aggregate totals and level.
-    """
-    breakdown = []
-    total_score = 0
-    max_possible = 0
-    for issue in issues_detected:
-        l, i, s = calculate_issue_score(issue)
-        breakdown.append({
-            "issue": issue,
-            "likelihood": l,
-            "impact": i,
-            "score": s,
-            "laws": LAW_MAPPING.get(issue, {}).get("laws", []),
-            "recommendation": LAW_MAPPING.get(issue, {}).get("recommendation", "")
-        })
-        total_score += s
-        max_possible += 5 * 5  # each issue max 25
-
-    # Normalize to percentage of max and then map to a 0-25 like scale for human-friendly labels
-    percent = (total_score / max_possible) if max_possible > 0 else 0
-    normalized_0_25 = round(percent * 25)
-
-    # Determine severity
-    if percent >= 0.66:
-        level = "HIGH"
-        level_color = RED
-    elif percent >= 0.33:
-        level = "MEDIUM"
-        level_color = YELLOW
+        ok, msg, meta = False, NO_RESPONSE_MSG, {}
+    if not ok:
+        issues = ["Form not secure"]
     else:
-        level = "LOW"
-        level_color = GREEN
-
-    return {
-        "breakdown": breakdown,
-        "raw_total": total_score,
-        "max_total": max_possible,
-        "percent": percent,
-        "normalized_score": normalized_0_25,
-        "level": level,
-        "level_color": level_color
-    }
-
-def scan_webform(url):
+        # forms without any CSRF token
+        issues = ["Missing CSRF Token"] if meta.get("csrf_tokens", 0) == 0 else []
+    return {"ok": ok, "msg": msg, "meta": meta}, issues
+
+def _rule_privacy_policy(url, response, dom):
+    ok, msg = dom["privacy_policy"] if dom else (False, NO_RESPONSE_MSG)
+    return {"ok": ok, "msg": msg}, ([] if ok else ["Privacy policy missing"])
+
+def _rule_consent(url, response, dom):
+    ok, msg = dom["consent"] if dom else (False, NO_RESPONSE_MSG)
+    return {"ok": ok, "msg": msg}, ([] if ok else ["Consent checkbox missing"])
+
+def _rule_security_headers(url, response, dom):
+    ok, msg, meta = check_security_headers(response)
+    return {"ok": ok, "msg": msg, "meta": meta}, ([] if ok else ["Missing Security Header"])
+
+def _rule_cookies(url, response, dom):
+    ok, msg, meta = check_cookies_chain(response)
+    insecure = not ok and meta.get("insecure_count", 0) > 0
+    return {"ok": ok, "msg": msg, "meta": meta}, (["Insecure Cookies"] if insecure else [])
+
+def _rule_trackers(url, response, dom):
+    ok, msg, meta = dom["trackers"] if dom else (False, "No response", {"trackers": []})
+    return {"ok": ok, "msg": msg, "meta": meta}, (["Trackers Detected"] if meta and meta.get("trackers") else [])
+
+register_rule("https", "url", _rule_https)
+register_rule("forms", "dom", _rule_forms)
+register_rule("privacy_policy", "dom", _rule_privacy_policy)
+register_rule("consent", "dom", _rule_consent)
+register_rule("security_headers", "headers", _rule_security_headers)
+register_rule("cookies", "headers", _rule_cookies)
+register_rule("trackers", "dom", _rule_trackers)
+
+def scan_webform(url, session=None, stream=False, max_bytes=DEFAULT_MAX_BODY_BYTES, parser="auto", cache=None,
+                 resources=None, plan=None):
     """
     Runs all checks for a single URL and returns a structured result dict.
+    session: optional requests.Session (see transport.make_session) to share
+    keep-alive connections; defaults to the process-wide pooled session.
+    stream: parse the body incrementally as it downloads, reading at most
+    max_bytes; details["body"] records whether the page was truncated.
+    parser: HTML parser backend for buffered scans ("auto", "lxml", "selectolax",
+    "html.parser", "bs4"); streaming always uses the incremental stdlib parser.
+    cache: optional cache.ResponseCache; sends conditional requests and reuses the
+    stored result when the page is unchanged (buffered scans only).
+    resources: optional resources.ResourceCache shared by the batch; enables the deep
+    checks (privacy policy must resolve, external scripts fingerprinted for trackers).
+    plan: rules to run, as a profile name ("full", "headers") or a compile_plan()
+    result; plans without DOM rules skip the body download entirely.
+    """
+    plan = resolve_plan(plan)
+    if stream and (cache is not None or resources is not None):
+        raise ValueError("the response cache and deep resource checks need the full body; use stream=False")
+    if cache is not None:
+        if plan["name"] != "full":
+            raise ValueError("the response cache stores full results; use the full rule plan")
+        return _scan_cached(url, cache, session=session, parser=parser, resources=resources)
+
+    if not plan["needs_body"]:
+        # headers are all the rules need: HEAD, or a GET closed before the body arrives
+        return analyze_response(url, fetch_headers(url, session=session), plan=plan)
+
+    if not stream:
+        response = fetch_url(url, session=session)
+        return _analyze_fetched(url, response, parser=parser, resources=resources, plan=plan)
+
+    response = fetch_url(url, session=session, stream=True)
+    dom = {}  # stays empty (-> "cannot parse") unless a body was streamed
+    body = None
+    timings = {} if instrument.ENABLED else None
+    if response is not None:
+        try:
+            if response:
+                body = {"bytes_read": 0, "max_bytes": max_bytes, "truncated": False, "stopped_early": False}
+                start = time.perf_counter()
+                dom, body["stopped_early"] = analyze_html(iter_body_text(response, max_bytes, body),
+                                                          names=plan["dom_checks"], timings=timings)
+                body_time = time.perf_counter() - start
+                response.fetch_timing["total_s"] = round(response.fetch_timing["total_s"] + body_time, 4)
+                response.fetch_timing["transfer_s"] = round(response.fetch_timing["transfer_s"] + body_time, 4)
+                if not body["bytes_read"]:
+                    dom = {}  # empty body: same as the buffered path, nothing to parse
+        finally:
+            response.close()
+    return analyze_response(url, response, dom=dom, body=body, plan=plan, timings=timings)
+
+def _analyze_fetched(url, response, parser="auto", resources=None, plan=None):
+    """analyze_response(), plus the deep resource checks when a ResourceCache is given."""
+    plan = resolve_plan(plan)
+    deep = {"privacy_policy", "trackers"}.intersection(plan["dom_checks"])
+    if resources is None or not deep or not response or not response.text:
+        return analyze_response(url, response, parser=parser, plan=plan)
+    from resources import analyze_with_resources  # resources.py imports this module
+
+    timings = None
+    if instrument.ENABLED:
+        timings = {}
+        start = time.perf_counter()
+    dom, info = analyze_with_resources(url, response, resources, parser=parser, timings=timings,
+                                       names=plan["dom_checks"])
+    if timings is not None:
+        # waiting on the shared policy/script downloads
+        timings["resources_s"] = max(time.perf_counter() - start - timings.get("markup_s", 0.0), 0.0)
+    result = analyze_response(url, response, dom=dom, parser=parser, plan=plan, timings=timings)
+    result["details"]["resources"] = info
+    return result
+
+def _scan_cached(url, cache, session=None, parser="auto", resources=None):
     """
-    response = fetch_url(url)
-    soup = None
-    if response and response.text:
-        soup = BeautifulSoup(response.text, "html.parser")
+    Revalidate against the cache: a 304 behind the same redirect chain or an identical
+    content fingerprint (which covers the chain) reuses the previous result; anything
+    else is analyzed and stored. details["cache"] says which.
+    """
+    from cache import chain_fingerprint, response_fingerprint  # cache.py imports this module
+
+    entry = cache.get(url)
+    response = fetch_url(url, session=session, headers=cache.conditional_headers(entry))
+    fingerprint = None
+    outcome = "miss"
+    if entry is not None and response is not None:
+        if response.status_code == 304:
+            # the page is unchanged, but the redirects in front of it may not be;
+            # if they changed, fetch the body again to analyze the whole chain
+            if chain_fingerprint(response) == entry["chain"]:
+                outcome = "revalidated"
+            else:
+                response = fetch_url(url, session=session)
+        elif response:
+            fingerprint = response_fingerprint(response)
+            if fingerprint == entry["fingerprint"]:
+                outcome = "unchanged"
+    cache.record(outcome)
+
+    if outcome != "miss":
+        cache.touch(url)
+        result = entry["result"]
+        timing = getattr(response, "fetch_timing", None)
+        if timing:
+            result["details"]["fetch"] = timing
+        result["details"]["cache"] = outcome
+        if instrument.ENABLED:
+            result["timings"] = instrument.ScanTimer().finish(response)
+        return result
+
+    result = _analyze_fetched(url, response, parser=parser, resources=resources)
+    if response:
+        stored = dict(result, details={k: v for k, v in result["details"].items() if k not in ("fetch", "cache")})
+        stored.pop("timings", None)
+        cache.put(url, response, stored, fingerprint=fingerprint)
+    result["details"]["cache"] = outcome
+    return result
+
+def analyze_response(url, response, dom=None, body=None, parser="auto", plan=None, timings=None):
+    """
+    Runs the checks of `plan` (default: all rules) against an already fetched
+    response (or None when the fetch failed). Shared by the blocking and async
+    scan entry points so both produce the same result dict.
+    dom:  DOM check results already computed while streaming (skips parsing response.text)
+    body: streaming body info (bytes read, truncation) recorded under details["body"]
+    parser: HTML parser backend for the DOM checks (see parsers.py; "auto" = fastest installed)
+    timings: parse timings of a precomputed `dom` (see instrument.py); only used,
+    and the result only gets a "timings" entry, while instrumentation is enabled.
+    """
+    plan = resolve_plan(plan)
+    timer = instrument.ScanTimer(timings) if instrument.ENABLED else None
+    if dom is None and plan["needs_body"] and response and response.text:
+        if timer is None:
+            dom = analyze_markup(response.text, backend=parser, names=plan["dom_checks"])
+        else:
+            timer.parsed_here = True
+            dom = analyze_markup(response.text, backend=parser, names=plan["dom_checks"], timings=timer.dom)
 
     results = {
         "url": url,
@@ -326,66 +648,34 @@ def scan_webform(url):
         "details": {},
     }
 
-    # HTTPS
-    https_ok, https_msg = check_https(url)
-    results["checks"]["https"] = {"ok": https_ok, "msg": https_msg}
-    if not https_ok:
-        results["issues"].append("No HTTPS")
-
-    # Forms
-    if soup:
-        form_ok, form_msg, form_details = check_form_security(soup, base_url=url)
-    else:
-        form_ok, form_msg, form_details = False, "No response / cannot parse", {}
-    results["checks"]["forms"] = {"ok": form_ok, "msg": form_msg, "meta": form_details}
-    if not form_ok:
-        results["issues"].append("Form not secure")
-    else:
-        # If forms exist but missing CSRF tokens, register issue
-        if form_details.get("csrf_tokens", 0) == 0:
-            results["issues"].append("Missing CSRF Token")
-        # If password fields present but not HTTPS, flag as form not secure
-        if form_details.get("password_fields", 0) > 0 and not https_ok:
-            # but "No HTTPS" already added; this can be an additional detail
-            pass
-
-    # Privacy policy
-    if soup:
-        privacy_ok, privacy_msg = check_privacy_policy(soup)
-    else:
-        privacy_ok, privacy_msg = False, "No response / cannot parse"
-    results["checks"]["privacy_policy"] = {"ok": privacy_ok, "msg": privacy_msg}
-    if not privacy_ok:
-        results["issues"].append("Privacy policy missing")
-
-    # Consent checkbox
-    if soup:
-        consent_ok, consent_msg = check_consent_checkbox(soup)
-    else:
-        consent_ok, consent_msg = False, "No response / cannot parse"
-    results["checks"]["consent"] = {"ok": consent_ok, "msg": consent_msg}
-    if not consent_ok:
-        results["issues"].append("Consent checkbox missing")
-
-    # Security headers
-    sec_ok, sec_msg, sec_meta = check_security_headers(response)
-    results["checks"]["security_headers"] = {"ok": sec_ok, "msg": sec_msg, "meta": sec_meta}
-    if not sec_ok:
-        results["issues"].append("Missing Security Header")
-
-    # Cookies
-    cookie_ok, cookie_msg, cookie_meta = check_cookies(response)
-    results["checks"]["cookies"] = {"ok": cookie_ok, "msg": cookie_msg, "meta": cookie_meta}
-    if not cookie_ok and cookie_meta.get("insecure_count", 0) > 0:
-        results["issues"].append("Insecure Cookies")
-
-    # Trackers
-    trackers_ok, trackers_msg, trackers_meta = (False, "No response", {"trackers": []})
-    if soup:
-        trackers_ok, trackers_msg, trackers_meta = detect_js_trackers(soup)
-    results["checks"]["trackers"] = {"ok": trackers_ok, "msg": trackers_msg, "meta": trackers_meta}
-    if trackers_meta and trackers_meta.get("trackers"):
-        results["issues"].append("Trackers Detected")
+    if timer is not None:
+        timer.lap("dom")
+    for name, rule in plan["rules"]:
+        if timer is None:
+            check, issues = rule["evaluate"](url, response, dom)
+        else:
+            start = time.perf_counter()
+            check, issues = rule["evaluate"](url, response, dom)
+            timer.check(name, time.perf_counter() - start, rule["dom_check"])
+        results["checks"][name] = check
+        results["issues"].extend(issues)
+    if timer is not None:
+        timer.lap("rules")
+
+    # HTTP status of the final response (None: no response at all), so callers
+    # can tell failed fetches apart without reading check messages
+    results["details"]["status"] = response.status_code if response is not None else None
+    # Fetch timing (handshake vs transfer) when the transport recorded it
+    timing = getattr(response, "fetch_timing", None)
+    if timing:
+        results["details"]["fetch"] = timing
+    if body:
+        results["details"]["body"] = body
+    chain = redirect_chain(url, response)
+    if chain:
+        results["details"]["redirects"] = chain
+    if plan["name"] != "full":
+        results["details"]["rules"] = {"plan": plan["name"], "checks": [name for name, _ in plan["rules"]]}
 
     # Compose unique laws & recommendations
     law_set = set()
@@ -404,60 +694,18 @@ def scan_webform(url):
     # Risk computation
     risk = compute_risk(results["issues"])
     results["risk"] = risk
+    if timer is not None:
+        timer.lap("score")
+        results["timings"] = timer.finish(response, body)
 
     # Prepare JSON-friendly result and return
     return results
 
-def generate_json_report(result, filename=None):
-    if not filename:
-        parsed = urlparse(result["url"])
-        safe = parsed.netloc + parsed.path
-        safe = re.sub(r"[^a-zA-Z0-9_\-\.]", "_", safe).strip("_")
-        filename = f"compliance_summary_{safe}.json"
-
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
-
-    return filename
-
-def generate_markdown_report(all_results, filename="report.md"):
-    """
-    all_results: list of result dicts
-    """
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write("# WebForm Privacy Compliance - Combined Report\n\n")
-        for r in all_results:
-            f.write(f"## URL: {r['url']}\n\n")
-            f.write(f"### Checks\n")
-            for k, v in r["checks"].items():
-                status = "OK" if v.get("ok") else "⚠ NOT OK"
-                f.write(f"- **{k}**: {status} — {v.get('msg')}\n")
-            f.write("\n### Issues Detected\n")
-            if r["issues"]:
-                for iss in r["issues"]:
-                    f.write(f"- {iss}\n")
-            else:
-                f.write("- None\n")
-
-            f.write("\n### Risk Breakdown\n")
-            f.write(f"- Raw total (sum of Likelihood×Impact per issue): {r['risk']['raw_total']}\n")
-            f.write(f"- Max possible for detected issues: {r['risk']['max_total']}\n")
-            f.write(f"- Normalized (0-25): {r['risk']['normalized_score']}\n")
-            f.write(f"- Risk Level: {r['risk']['level']}\n\n")
-
-            f.write("#### Calculation details:\n")
-            for b in r['risk']['breakdown']:
-                f.write(f"- Issue: {b['issue']}: Likelihood={b['likelihood']} × Impact={b['impact']} = {b['score']}\n")
-                if b.get("laws"):
-                    f.write(f"  - Laws: {', '.join(b.get('laws'))}\n")
-                if b.get("recommendation"):
-                    f.write(f"  - Recommendation: {b.get('recommendation')}\n")
-
-            f.write("\n### Recommendations (summary)\n")
-            if r['recommendations']:
-                for rec in r['recommendations']:
-                    f.write(f"- {rec}\n")
-            else:
-                f.write("- No recommendations (site looks good)\n")
-            f.write("\n---\n\n")
-    return filename
+def error_result(url, exc, plan=None):
+    """
+    The no-response result for `url`, with "error" naming the exception, for a
+    scan that raised. Batch runners yield it so one bad page cannot end a batch.
+    """
+    result = analyze_response(url, None, plan=plan)
+    result["error"] = f"{type(exc).__name__}: {exc}"
+    return result
@@ -0,0 +1,463 @@
+# src/service.py
+"""
+Long-running scanner service with a local HTTP/JSON API.
+
+One process keeps everything warm between requests: the pooled keep-alive
+session, the selected parser backend, the compiled rule plans and tracker
+signatures. Clients submit jobs, follow them, stream results as they finish
+and query the result store (store.py), where every completed scan is kept.
+
+    python src/service.py [--host 127.0.0.1] [--port 8642] [--store scan_results.sqlite]
+
+Endpoints (JSON in, JSON out):
+
+    POST /scans            {"urls": [...], "profile": "full", "disable": [], "stream": false, "deep": false}
+                           -> 202 {"id", "state", "total", ...}
+    GET  /scans            recent jobs
+    GET  /scans/<id>       job status
+    GET  /scans/<id>/results[?stream=1&limit=&offset=]
+                           results so far from the store, newest first; stream=1
+                           sends one JSON line per result as they complete
+                           (chunked) until the job is done
+    POST /scan             {"url": ...} -> the result, scanned synchronously
+    GET  /results?host=&issue=&level=&url=&job=&latest=1&limit=&offset=
+    GET  /results/<id>
+    GET  /summary          store roll-up (levels, issues, high-risk hosts)
+    GET  /health           liveness and service counters
+    GET  /metrics          Prometheus text (timing histograms with SCAN_TIMINGS=1)
+
+The API has no authentication; it binds to localhost by default.
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import instrument
+from batch import DEFAULT_PER_HOST, DEFAULT_WORKERS, scan_batch
+from parsers import select_backend
+from scanner import PROFILES, compile_plan, scan_webform
+from store import DEFAULT_QUERY_LIMIT, DEFAULT_STORE_PATH, ResultStore
+from transport import make_session, session_stats
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8642
+DEFAULT_MAX_JOBS = 2           # jobs scanned at the same time; later ones queue
+MAX_URLS_PER_JOB = 10000
+MAX_BODY_BYTES = 4 * 1024 * 1024
+JOBS_KEPT = 200                # finished jobs remembered for status/result requests
+JOB_STATES = ("queued", "running", "done", "failed")
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ScanJob:
+    """
+    One submitted batch: its options and progress. The results themselves are
+    in the store; the job only keeps their ids, in completion order.
+    """
+    def __init__(self, job_id, urls, options):
+        self.id = job_id
+        self.urls = urls
+        self.options = options
+        self.state = "queued"
+        self.error = None
+        self.result_ids = []
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.changed = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.state in ("done", "failed")
+
+    def status(self):
+        return {
+            "id": self.id,
+            "state": self.state,
+            "total": len(self.urls),
+            "completed": len(self.result_ids),
+            "options": self.options,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+# -----------------------
+# Service core
+# -----------------------
+
+class ScanService:
+    """
+    Runs scan jobs on a fixed set of job slots and a warm shared session,
+    storing every result. Usable without the HTTP layer.
+    """
+    def __init__(self, store, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, max_jobs=DEFAULT_MAX_JOBS,
+                 parser="auto"):
+        self.store = store
+        self.workers = workers
+        self.per_host = per_host
+        self.parser = select_backend(parser)
+        self.session = make_session(pool_size=max(per_host * max_jobs, 10))
+        self.histograms = instrument.Histograms() if instrument.ENABLED else None
+        self._pool = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="scan-job")
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._ids = itertools.count(1)
+        self.counters = {"jobs": 0, "scans": 0, "started_at": time.time()}
+        for profile in PROFILES:
+            compile_plan(profile)
+
+    def _scan_callable(self, options, resources=None):
+        plan = None
+        if options.get("profile", "full") != "full" or options.get("disable"):
+            plan = compile_plan(options.get("profile", "full"), disable=options.get("disable") or ())
+        return partial(scan_webform, session=self.session, stream=options.get("stream", False),
+                       parser=self.parser, plan=plan, resources=resources)
+
+    def scan_one(self, url, options=None):
+        """Synchronous single-URL scan (stored like any other result)."""
+        return self._run_scans([url], validate_options(options or {}), job_id=None)[0]
+
+    def _run_scans(self, urls, options, job_id, job=None):
+        resources = None
+        if options.get("deep"):
+            from resources import ResourceCache
+            resources = ResourceCache(session=self.session)
+        scan = self._scan_callable(options, resources)
+        out = []
+        try:
+            for result in scan_batch(urls, workers=self.workers, per_host=self.per_host, ordered=False, scan=scan):
+                result_id = self.store.add(result, job=job_id)
+                if self.histograms is not None:
+                    self.histograms.observe(result)
+                with self._lock:
+                    self.counters["scans"] += 1
+                if job is None:
+                    out.append(result)
+                    continue
+                with job.changed:
+                    job.result_ids.append(result_id)
+                    job.changed.notify_all()
+        finally:
+            if resources is not None:
+                resources.close()
+        return out
+
+    def submit(self, urls, options=None):
+        options = validate_options(options or {})
+        job = ScanJob(f"job-{next(self._ids)}-{int(time.time())}", urls, options)
+        with self._lock:
+            self._jobs[job.id] = job
+            self.counters["jobs"] += 1
+            self._forget_old_jobs()
+        self._pool.submit(self._run_job, job)
+        return job
+
+    def _run_job(self, job):
+        with job.changed:
+            job.state = "running"
+            job.started_at = time.time()
+            job.changed.notify_all()
+        try:
+            self._run_scans(job.urls, job.options, job.id, job=job)
+            state, error = "done", None
+        except Exception as e:  # the job fails, the service keeps running
+            state, error = "failed", f"{type(e).__name__}: {e}"
+        with job.changed:
+            job.state = state
+            job.error = error
+            job.finished_at = time.time()
+            job.changed.notify_all()
+
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - JOBS_KEPT, 0)]:
+            del self._jobs[job_id]
+
+    def job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return [job.status() for job in reversed(self._jobs.values())]
+
+    def follow(self, job, timeout=None):
+        """
+        Yield the job's results (read back from the store) as they arrive,
+        until it finishes (or `timeout` seconds pass idle).
+        """
+        sent = 0
+        while True:
+            with job.changed:
+                while sent == len(job.result_ids) and not job.finished:
+                    if not job.changed.wait(timeout):
+                        return
+                batch = job.result_ids[sent:]
+                finished = job.finished
+            for result_id in batch:
+                row = self.store.get(result_id)
+                if row is not None:  # pruned meanwhile
+                    yield row["result"]
+            sent += len(batch)
+            if finished and sent == len(job.result_ids):
+                return
+
+    def health(self):
+        with self._lock:
+            states = {state: 0 for state in JOB_STATES}
+            for job in self._jobs.values():
+                states[job.state] += 1
+            counters = dict(self.counters)
+        counters["uptime_s"] = round(time.time() - counters.pop("started_at"), 1)
+        return {"status": "ok", "parser": self.parser, "jobs_by_state": states, **counters,
+                "connections": session_stats(self.session)}
+
+    def metrics(self):
+        health = self.health()
+        lines = [
+            "# HELP webform_service_jobs_total Scan jobs submitted.",
+            "# TYPE webform_service_jobs_total counter",
+            f"webform_service_jobs_total {health['jobs']}",
+            "# HELP webform_service_scans_total URLs scanned.",
+            "# TYPE webform_service_scans_total counter",
+            f"webform_service_scans_total {health['scans']}",
+        ]
+        text = "\n".join(lines) + "\n"
+        if self.histograms is not None:
+            text += self.histograms.to_prometheus()
+        return text
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self.session.close()
+
+
+def validate_urls(urls):
+    if not isinstance(urls, list) or not urls:
+        raise ApiError(400, '"urls" must be a non-empty list')
+    if len(urls) > MAX_URLS_PER_JOB:
+        raise ApiError(400, f"at most {MAX_URLS_PER_JOB} URLs per job")
+    cleaned = []
+    for u in urls:
+        if not isinstance(u, str) or not u.strip().startswith(("http://", "https://")):
+            raise ApiError(400, f"not an http(s) URL: {u!r}")
+        cleaned.append(u.strip())
+    return list(dict.fromkeys(cleaned))
+
+
+def validate_options(options):
+    profile = options.get("profile", "full")
+    if profile not in PROFILES:
+        raise ApiError(400, f"unknown profile {profile!r} (choose from {', '.join(PROFILES)})")
+    disable = options.get("disable") or []
+    if not isinstance(disable, list):
+        raise ApiError(400, '"disable" must be a list of check names')
+    stream = bool(options.get("stream", False))
+    deep = bool(options.get("deep", False))
+    if stream and deep:
+        raise ApiError(400, "deep checks need the full body; use stream=false")
+    try:
+        compile_plan(profile, disable=disable)
+    except ValueError as e:
+        raise ApiError(400, str(e))
+    return {"profile": profile, "disable": disable, "stream": stream, "deep": deep}
+
+
+def _paging(query):
+    """limit, offset and since from a query string (limit capped at 1000)."""
+    try:
+        limit = min(int(query.get("limit", DEFAULT_QUERY_LIMIT)), 1000)
+        offset = int(query.get("offset", 0))
+        since = float(query["since"]) if "since" in query else None
+    except ValueError:
+        raise ApiError(400, "limit, offset and since must be numbers")
+    return limit, offset, since
+
+
+# -----------------------
+# HTTP layer
+# -----------------------
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        server_version = "WebformScanner/1.0"
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                raise ApiError(413, "request body too large")
+            if not length:
+                return {}
+            try:
+                payload = json.loads(self.rfile.read(length))
+            except ValueError:
+                raise ApiError(400, "request body is not valid JSON")
+            if not isinstance(payload, dict):
+                raise ApiError(400, "request body must be a JSON object")
+            return payload
+
+        def _stream_results(self, job):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for result in service.follow(job):
+                line = (json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _dispatch(self, method):
+            parts = urlsplit(self.path)
+            path = [p for p in parts.path.split("/") if p]
+            query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+
+            if method == "GET" and path == ["health"]:
+                return self._send_json(200, service.health())
+            if method == "GET" and path == ["metrics"]:
+                body = service.metrics().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                return self.wfile.write(body)
+            if method == "GET" and path == ["summary"]:
+                return self._send_json(200, service.store.summary())
+
+            if path[:1] == ["scans"]:
+                if method == "POST" and len(path) == 1:
+                    payload = self._read_json()
+                    job = service.submit(validate_urls(payload.get("urls")), payload)
+                    status = job.status()
+                    status["status_url"] = f"/scans/{job.id}"
+                    status["results_url"] = f"/scans/{job.id}/results"
+                    return self._send_json(202, status)
+                if method == "GET" and len(path) == 1:
+                    return self._send_json(200, {"jobs": service.jobs()})
+                job = service.job(path[1]) if len(path) >= 2 else None
+                if job is None:
+                    raise ApiError(404, "unknown job")
+                if method == "GET" and len(path) == 2:
+                    return self._send_json(200, job.status())
+                if method == "GET" and path[2:] == ["results"]:
+                    if query.get("stream") in ("1", "true"):
+                        return self._stream_results(job)
+                    limit, offset, _ = _paging(query)
+                    with job.changed:
+                        status = job.status()
+                    rows = service.store.query(job=job.id, limit=limit, offset=offset)
+                    return self._send_json(200, {"job": status, "results": [row["result"] for row in rows],
+                                                 "count": len(rows), "offset": offset})
+
+            if method == "POST" and path == ["scan"]:
+                payload = self._read_json()
+                url = validate_urls([payload.get("url")])[0]
+                return self._send_json(200, service.scan_one(url, payload))
+
+            if method == "GET" and path[:1] == ["results"]:
+                if len(path) == 2:
+                    try:
+                        row = service.store.get(int(path[1]))
+                    except ValueError:
+                        row = None
+                    if row is None:
+                        raise ApiError(404, "unknown result")
+                    return self._send_json(200, row)
+                limit, offset, since = _paging(query)
+                rows = service.store.query(host=query.get("host"), issue=query.get("issue"),
+                                           level=query.get("level"), url=query.get("url"), job=query.get("job"),
+                                           since=since, latest=query.get("latest") in ("1", "true"),
+                                           limit=limit, offset=offset,
+                                           with_result=query.get("full", "1") not in ("0", "false"))
+                return self._send_json(200, {"results": rows, "count": len(rows), "offset": offset})
+
+            raise ApiError(404, f"no route for {method} {parts.path}")
+
+        def _handle(self, method):
+            try:
+                self._dispatch(method)
+            except ApiError as e:
+                if e.status == 413:
+                    self.close_connection = True  # the unread body is still on the socket
+                self._send_json(e.status, {"error": str(e)})
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+            except Exception as e:
+                self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+class ServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def start_service(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Serve `service` from a daemon thread. Returns (server, base_url); server.shutdown() stops it."""
+    server = ServiceServer((host, port), make_handler(service))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{server.server_address[0]}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Scanner service with an HTTP/JSON API")
+    ap.add_argument("--host", default=DEFAULT_HOST)
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--store", default=DEFAULT_STORE_PATH, help="result store database file")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent scans per job")
+    ap.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST)
+    ap.add_argument("--jobs", type=int, default=DEFAULT_MAX_JOBS, help="jobs scanned at the same time")
+    ap.add_argument("--parser", default="auto")
+    args = ap.parse_args(argv)
+
+    store = ResultStore(args.store)
+    service = ScanService(store, workers=args.workers, per_host=args.per_host, max_jobs=args.jobs,
+                          parser=args.parser)
+    server = ServiceServer((args.host, args.port), make_handler(service))
+    print(f"Scanner service on http://{args.host}:{server.server_address[1]} (store: {args.store}, "
+          f"parser: {service.parser})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# src/signatures.py
+"""
+Compiled tracker signature engine.
+
+Vendor signatures live in tracker_signatures.json (name -> category + literal,
+case-insensitive patterns) and are compiled once at import into a single
+regex shaped like a trie, so one scan over a string finds every vendor and
+the cost per byte stays nearly flat as signatures are added. Patterns only
+match at the start of a token (not preceded by a letter, digit, "_" or "$"),
+so "omega(" does not count as Google Analytics' "ga(" and "static.hotjar.com"
+still matches "hotjar".
+
+Extra signature files can be merged with load_signatures(..., extra_paths=[...]).
+"""
+import json
+import os
+import re
+
+DEFAULT_SIGNATURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tracker_signatures.json")
+
+
+def load_signatures(path=DEFAULT_SIGNATURES_PATH, extra_paths=()):
+    """
+    Returns {vendor: {"category": str, "patterns": [str, ...]}} merged from
+    the main file and any extra files (later files extend/override vendors).
+    """
+    vendors = {}
+    for p in [path, *extra_paths]:
+        with open(p, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        for name, spec in data.get("vendors", {}).items():
+            entry = vendors.setdefault(name, {"category": spec.get("category", "other"), "patterns": []})
+            if "category" in spec:
+                entry["category"] = spec["category"]
+            for pat in spec.get("patterns", []):
+                if pat.lower() not in entry["patterns"]:
+                    entry["patterns"].append(pat.lower())
+    return vendors
+
+
+def _trie_regex(words):
+    """
+    Build a regex source equivalent to "|".join(words) but factored as a trie,
+    so the regex engine follows one branch per character instead of trying
+    every alternative at every position.
+    """
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node):
+        end = "" in node
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not end:
+            return branches[0]
+        body = "(?:" + "|".join(branches) + ")"
+        return body + "?" if end else body
+
+    return emit(trie)
+
+
+class SignatureEngine:
+    """
+    Multi-pattern matcher over lower-cased text. scan() returns vendor names in
+    order of first appearance.
+    """
+    def __init__(self, vendors):
+        self.vendors = vendors
+        pattern_vendor = {}
+        for name, spec in vendors.items():
+            for pat in spec["patterns"]:
+                pattern_vendor.setdefault(pat, name)
+        # The trie regex reports the longest pattern at each position; every shorter
+        # pattern that is a prefix of it matched there too, so precompute that chain.
+        self.chains = {}
+        for pat in pattern_vendor:
+            self.chains[pat] = [pattern_vendor[pat[:i]] for i in range(1, len(pat) + 1) if pat[:i] in pattern_vendor]
+        self.pattern_count = len(pattern_vendor)
+        # lookahead capture reports overlapping matches (e.g. "analytics.tiktok" and "tiktok")
+        source = _trie_regex(pattern_vendor)
+        self.regex = re.compile(r"(?<![a-z0-9_$])(?=(" + source + "))") if source else None
+
+    def __len__(self):
+        return self.pattern_count
+
+    def scan(self, text, found=None):
+        """
+        Scan lower-cased `text`; appends new vendor names to `found` (a list) and returns it.
+        """
+        if found is None:
+            found = []
+        if not self.regex or not text:
+            return found
+        for m in self.regex.finditer(text):
+            for vendor in self.chains[m.group(1)]:
+                if vendor not in found:
+                    found.append(vendor)
+        return found
+
+    def categories(self, names):
+        return {n: self.vendors[n]["category"] for n in names if n in self.vendors}
+
+
+def compile_signatures(path=DEFAULT_SIGNATURES_PATH, extra_paths=()):
+    return SignatureEngine(load_signatures(path, extra_paths))
+
+
+# built once at import; shared by the DOM visitors and detect_js_trackers()
+DEFAULT_ENGINE = compile_signatures()
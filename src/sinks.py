@@ -0,0 +1,226 @@
+# src/sinks.py
+"""
+Streaming report writers.
+
+Each sink writes a result as soon as its scan finishes and flushes it, so
+memory stays constant however many URLs are scanned and a crash loses at most
+the result being written. JSON Lines output doubles as a resume log:
+completed_urls() tells a restarted run what it can skip.
+
+    with open_sinks(markdown="report.md", jsonl="results.jsonl") as out:
+        for r in scan_batch(urls):
+            out.write(r)
+"""
+import csv
+import json
+import os
+
+from records import RecordWriter
+from reporting import generate_json_report, json_report_filename, write_markdown_header, write_markdown_result
+
+# pyarrow (optional) is imported by ParquetSink itself: it takes longer to
+# import than everything else here, and most runs never write Parquet.
+
+
+def _open_append(filename, resume, newline=None):
+    """Open for writing; resume=True appends to what a previous run left behind."""
+    mode = "a" if resume else "w"
+    f = open(filename, mode, encoding="utf-8", newline=newline)
+    fresh = f.tell() == 0
+    return f, fresh
+
+
+class MarkdownSink:
+    """Append-only version of generate_markdown_report()."""
+    def __init__(self, filename="report.md", resume=False):
+        self.filename = filename
+        self.f, fresh = _open_append(filename, resume)
+        if fresh:
+            write_markdown_header(self.f)
+            self.f.flush()
+
+    def write(self, result):
+        write_markdown_result(self.f, result)
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class JsonlSink:
+    """One compact JSON object per line; fsync=True also survives power loss."""
+    def __init__(self, filename="results.jsonl", resume=False, fsync=False):
+        self.filename = filename
+        self.fsync = fsync
+        torn = False
+        if resume and os.path.exists(filename) and os.path.getsize(filename):
+            with open(filename, "rb") as fh:
+                fh.seek(-1, os.SEEK_END)
+                torn = fh.read(1) != b"\n"
+        self.f, _ = _open_append(filename, resume)
+        if torn:
+            self.f.write("\n")  # terminate the partial line a crash left behind
+
+    def write(self, result):
+        self.f.write(json.dumps(result, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.f.flush()
+        if self.fsync:
+            os.fsync(self.f.fileno())
+
+    def close(self):
+        self.f.close()
+
+
+class JsonSummarySink:
+    """The per-URL compliance_summary_*.json files; indent=None writes them compact."""
+    def __init__(self, directory=".", indent=2):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.indent = indent
+        self.last_filename = None
+
+    def write(self, result):
+        filename = os.path.join(self.directory, json_report_filename(result["url"]))
+        self.last_filename = generate_json_report(result, filename=filename, indent=self.indent)
+
+    def close(self):
+        pass
+
+
+# flat columns shared by the CSV and Parquet sinks
+CHECK_COLUMNS = ("https", "forms", "privacy_policy", "consent", "security_headers", "cookies", "trackers")
+COLUMNS = ["url", "risk_level", "normalized_score", "raw_total", "max_total", "issues", "laws", "trackers"] + \
+          [f"{c}_ok" for c in CHECK_COLUMNS]
+
+
+def flatten_result(result):
+    checks = result.get("checks", {})
+    row = {
+        "url": result["url"],
+        "risk_level": result["risk"]["level"],
+        "normalized_score": result["risk"]["normalized_score"],
+        "raw_total": result["risk"]["raw_total"],
+        "max_total": result["risk"]["max_total"],
+        "issues": ";".join(result.get("issues", [])),
+        "laws": ";".join(sorted(result.get("laws", []))),
+        "trackers": ";".join(checks.get("trackers", {}).get("meta", {}).get("trackers", [])),
+    }
+    for c in CHECK_COLUMNS:
+        row[f"{c}_ok"] = bool(checks.get(c, {}).get("ok"))
+    return row
+
+
+class CsvSink:
+    """One row per URL (see COLUMNS) for spreadsheets and quick filtering."""
+    def __init__(self, filename="results.csv", resume=False):
+        self.filename = filename
+        self.f, fresh = _open_append(filename, resume, newline="")
+        self.writer = csv.DictWriter(self.f, fieldnames=COLUMNS)
+        if fresh:
+            self.writer.writeheader()
+            self.f.flush()
+
+    def write(self, result):
+        self.writer.writerow(flatten_result(result))
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetSink:
+    """
+    Columnar output (requires pyarrow). Rows are buffered and written as one
+    row group every `row_group_size` results, so memory is bounded by that.
+    Parquet files cannot be appended to, so this sink always starts a new file.
+    """
+    def __init__(self, filename="results.parquet", row_group_size=1000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:  # optional dependency
+            raise RuntimeError("ParquetSink requires pyarrow (pip install pyarrow)") from None
+        self.pa, self.pq = pyarrow, pyarrow.parquet
+        self.filename = filename
+        self.row_group_size = row_group_size
+        self.rows = []
+        self.writer = None
+
+    def write(self, result):
+        self.rows.append(flatten_result(result))
+        if len(self.rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.rows:
+            return
+        table = self.pa.Table.from_pylist(self.rows)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.filename, table.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+class MultiSink:
+    """Fan one result out to several sinks; usable as a context manager."""
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+
+    def write(self, result):
+        for s in self.sinks:
+            s.write(result)
+
+    def close(self):
+        for s in self.sinks:
+            s.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def open_sinks(markdown=None, jsonl=None, csv_file=None, parquet=None, summaries_dir=None,
+               summary_indent=2, resume=False, records=None):
+    """Build a MultiSink from the outputs that are set (records: binary .wfr file, see records.py)."""
+    sinks = []
+    if markdown:
+        sinks.append(MarkdownSink(markdown, resume=resume))
+    if jsonl:
+        sinks.append(JsonlSink(jsonl, resume=resume))
+    if csv_file:
+        sinks.append(CsvSink(csv_file, resume=resume))
+    if parquet:
+        sinks.append(ParquetSink(parquet))
+    if summaries_dir is not None:
+        sinks.append(JsonSummarySink(summaries_dir, indent=summary_indent))
+    if records:
+        sinks.append(RecordWriter(open(records, "wb")))
+    return MultiSink(sinks)
+
+
+def iter_jsonl(filename):
+    """Yield results from a JSON Lines file, skipping a torn last line after a crash."""
+    with open(filename, "r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def completed_urls(filename):
+    """URLs already written to a JSONL results file (empty set if it does not exist)."""
+    if not os.path.exists(filename):
+        return set()
+    return {r["url"] for r in iter_jsonl(filename) if "url" in r}
@@ -0,0 +1,222 @@
+# src/store.py
+"""
+Indexed local store for scan results.
+
+Every stored scan is one row in a SQLite file, with the host, risk level and
+score in indexed columns and the issues in a side table. That makes "all HIGH
+results on portal.example.edu" or "every page with Insecure Cookies" index
+lookups instead of a walk over JSON files. Rescans are appended, so the
+history of a URL stays available; latest=True limits queries to the newest
+scan per URL.
+
+    python src/store.py add results.jsonl
+    python src/store.py query --host portal.example.edu --level HIGH --latest
+    python src/store.py summary
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+DEFAULT_STORE_PATH = "scan_results.sqlite"
+DEFAULT_QUERY_LIMIT = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id         INTEGER PRIMARY KEY,
+    url        TEXT NOT NULL,
+    host       TEXT NOT NULL,
+    level      TEXT,
+    score      INTEGER,
+    job        TEXT,
+    scanned_at REAL NOT NULL,
+    result     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_url ON results(url, id);
+CREATE INDEX IF NOT EXISTS results_host ON results(host, id);
+CREATE INDEX IF NOT EXISTS results_level ON results(level, id);
+CREATE INDEX IF NOT EXISTS results_job ON results(job, id);
+CREATE TABLE IF NOT EXISTS result_issues (
+    result_id  INTEGER NOT NULL REFERENCES results(id) ON DELETE CASCADE,
+    issue      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS result_issues_issue ON result_issues(issue, result_id);
+CREATE INDEX IF NOT EXISTS result_issues_result ON result_issues(result_id);
+"""
+
+
+def _row(row, with_result=True):
+    out = {"id": row[0], "url": row[1], "host": row[2], "level": row[3], "score": row[4],
+           "job": row[5], "scanned_at": row[6]}
+    if with_result:
+        out["result"] = json.loads(row[7])
+    return out
+
+
+class ResultStore:
+    """
+    Thread-safe (one connection + lock), so a service can share it across
+    request handlers and scan workers.
+    """
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+
+    # -----------------------
+    # Writing
+    # -----------------------
+
+    def add(self, result, job=None, scanned_at=None):
+        """Store one scan_webform() result; returns its id."""
+        return self.add_many([result], job=job, scanned_at=scanned_at)[0]
+
+    def add_many(self, results, job=None, scanned_at=None):
+        """Store results in one transaction; returns their ids."""
+        now = time.time() if scanned_at is None else scanned_at
+        ids = []
+        with self._lock:
+            try:
+                for r in results:
+                    risk = r.get("risk") or {}
+                    cur = self._conn.execute(
+                        "INSERT INTO results (url, host, level, score, job, scanned_at, result) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (r["url"], urlparse(r["url"]).netloc.lower(), risk.get("level"),
+                         risk.get("normalized_score"), job, now, json.dumps(r, ensure_ascii=False)))
+                    ids.append(cur.lastrowid)
+                    self._conn.executemany("INSERT INTO result_issues (result_id, issue) VALUES (?, ?)",
+                                           [(cur.lastrowid, issue) for issue in dict.fromkeys(r.get("issues", []))])
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return ids
+
+    def prune(self, keep=1):
+        """Drop all but the newest `keep` scans of every URL. Returns #removed."""
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM results WHERE id IN (SELECT id FROM (SELECT id, ROW_NUMBER() OVER "
+                "(PARTITION BY url ORDER BY id DESC) AS n FROM results) WHERE n > ?)", (keep,))
+            self._conn.commit()
+            return cur.rowcount
+
+    # -----------------------
+    # Queries
+    # -----------------------
+
+    def get(self, result_id):
+        with self._lock:
+            row = self._conn.execute("SELECT id, url, host, level, score, job, scanned_at, result "
+                                     "FROM results WHERE id = ?", (result_id,)).fetchone()
+        return _row(row) if row else None
+
+    def query(self, host=None, issue=None, level=None, url=None, job=None, since=None, latest=False,
+              limit=DEFAULT_QUERY_LIMIT, offset=0, with_result=True):
+        """
+        Stored scans matching every given filter, newest first.
+        host/url are exact (host is lower-cased), issue is an issue name
+        ("Insecure Cookies"), level is LOW/MEDIUM/HIGH, since is a Unix time.
+        latest=True only considers the newest scan of each URL.
+        """
+        where, params = [], []
+        if host:
+            where.append("r.host = ?")
+            params.append(host.lower())
+        if url:
+            where.append("r.url = ?")
+            params.append(url)
+        if level:
+            where.append("r.level = ?")
+            params.append(level.upper())
+        if job:
+            where.append("r.job = ?")
+            params.append(job)
+        if since is not None:
+            where.append("r.scanned_at >= ?")
+            params.append(since)
+        if issue:
+            where.append("r.id IN (SELECT result_id FROM result_issues WHERE issue = ?)")
+            params.append(issue)
+        if latest:
+            where.append("r.id = (SELECT MAX(id) FROM results WHERE url = r.url)")
+        sql = ("SELECT r.id, r.url, r.host, r.level, r.score, r.job, r.scanned_at, r.result FROM results r"
+               + (" WHERE " + " AND ".join(where) if where else "")
+               + " ORDER BY r.id DESC LIMIT ? OFFSET ?")
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit, offset]).fetchall()
+        return [_row(row, with_result) for row in rows]
+
+    def summary(self, top=10):
+        """Counts by risk level, the most common issues and the hosts with the most HIGH results (latest scans)."""
+        latest = "SELECT MAX(id) FROM results GROUP BY url"
+        with self._lock:
+            stored, urls = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT url) FROM results").fetchone()
+            levels = self._conn.execute(
+                f"SELECT level, COUNT(*) FROM results WHERE id IN ({latest}) GROUP BY level").fetchall()
+            issues = self._conn.execute(
+                f"SELECT issue, COUNT(*) AS n FROM result_issues WHERE result_id IN ({latest}) "
+                "GROUP BY issue ORDER BY n DESC, issue LIMIT ?", (top,)).fetchall()
+            hosts = self._conn.execute(
+                f"SELECT host, COUNT(*) AS n FROM results WHERE id IN ({latest}) AND level = 'HIGH' "
+                "GROUP BY host ORDER BY n DESC, host LIMIT ?", (top,)).fetchall()
+        return {"stored": stored, "urls": urls, "levels": dict(levels), "issues": dict(issues),
+                "high_risk_hosts": dict(hosts)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Indexed scan result store")
+    ap.add_argument("--store", default=DEFAULT_STORE_PATH, help="store database file")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("add", help="import results from JSON Lines files")
+    p.add_argument("jsonl", nargs="+")
+
+    p = sub.add_parser("query", help="print matching results as JSON Lines")
+    p.add_argument("--host")
+    p.add_argument("--issue")
+    p.add_argument("--level", choices=["LOW", "MEDIUM", "HIGH"])
+    p.add_argument("--url")
+    p.add_argument("--latest", action="store_true", help="newest scan of each URL only")
+    p.add_argument("--limit", type=int, default=DEFAULT_QUERY_LIMIT)
+
+    sub.add_parser("summary", help="levels, common issues and high-risk hosts")
+    p = sub.add_parser("prune", help="keep only the newest scans of every URL")
+    p.add_argument("--keep", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    store = ResultStore(args.store)
+    try:
+        if args.command == "add":
+            from sinks import iter_jsonl
+            total = 0
+            for path in args.jsonl:
+                total += len(store.add_many(iter_jsonl(path)))
+            print(f"Stored {total} result(s)")
+        elif args.command == "query":
+            for row in store.query(host=args.host, issue=args.issue, level=args.level, url=args.url,
+                                   latest=args.latest, limit=args.limit):
+                sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+        elif args.command == "summary":
+            json.dump(store.summary(), sys.stdout, indent=2)
+            sys.stdout.write("\n")
+        elif args.command == "prune":
+            print(f"Removed {store.prune(args.keep)} older scan(s)")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# src/transport.py
+"""
+Pooled HTTP transport for the scanner.
+
+A single requests.Session with keep-alive connection pools per host, retry
+with exponential backoff for transient failures, and connect-time accounting
+so scan results can show how much time went to TCP/TLS handshakes versus the
+actual transfer (and how much connection reuse saved).
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# -----------------------
+# Defaults
+# -----------------------
+DEFAULT_MAX_HOSTS = 32          # number of per-host pools kept alive
+DEFAULT_POOL_SIZE = 10          # keep-alive connections per host
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.3           # seconds; sleeps 0.3, 0.6, 1.2 ...
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+HEAD_MEMO_HOSTS = 1024          # hosts remembered as mishandling HEAD, per session
+HEAD_MEMO_TTL = 3600            # seconds before such a host gets HEAD again
+
+# connect (TCP + TLS handshake) accounting for the request running on this thread
+_local = threading.local()
+
+
+def reset_connect_timer():
+    _local.connect_time = 0.0
+    _local.connects = 0
+    _local.socket_time = 0.0
+
+
+def read_connect_timer():
+    """Returns (seconds spent connecting, new connections opened) since the last reset."""
+    return getattr(_local, "connect_time", 0.0), getattr(_local, "connects", 0)
+
+
+def read_socket_timer():
+    """Seconds of the connect time spent in DNS lookup + TCP connect (the rest is TLS)."""
+    return getattr(_local, "socket_time", 0.0)
+
+
+class _TimedConnectMixin:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            _local.connect_time = getattr(_local, "connect_time", 0.0) + time.perf_counter() - start
+            _local.connects = getattr(_local, "connects", 0) + 1
+
+    def _new_conn(self):
+        # name resolution + TCP handshake; connect() then wraps the socket in TLS
+        start = time.perf_counter()
+        try:
+            return super()._new_conn()
+        finally:
+            _local.socket_time = getattr(_local, "socket_time", 0.0) + time.perf_counter() - start
+
+
+class TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class HostMemo:
+    """
+    Thread-safe bounded set of hosts: the least recently added one is dropped
+    past max_hosts, and an entry is forgotten ttl seconds after it was added.
+    """
+    def __init__(self, max_hosts=HEAD_MEMO_HOSTS, ttl=HEAD_MEMO_TTL):
+        self.max_hosts = max_hosts
+        self.ttl = ttl
+        self._hosts = OrderedDict()   # host -> expiry time, oldest first
+        self._lock = threading.Lock()
+
+    def add(self, host):
+        with self._lock:
+            self._hosts.pop(host, None)
+            self._hosts[host] = time.monotonic() + self.ttl
+            while len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+
+    def __contains__(self, host):
+        with self._lock:
+            expires = self._hosts.get(host)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self._hosts[host]
+                return False
+            return True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._hosts)
+
+    def clear(self):
+        with self._lock:
+            self._hosts.clear()
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose pools time every new connection and keep per-session stats.
+    head_unsupported remembers the hosts whose HEAD answers could not be
+    trusted (see scanner.fetch_headers), for this session only.
+    """
+    def __init__(self, *args, **kwargs):
+        self.stats = {"requests": 0, "new_connections": 0, "connect_time": 0.0, "total_time": 0.0}
+        self._stats_lock = threading.Lock()
+        self.head_unsupported = HostMemo()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+    def record(self, connect_time, connects, total_time):
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["new_connections"] += connects
+            self.stats["connect_time"] += connect_time
+            self.stats["total_time"] += total_time
+
+
+def make_session(pool_size=DEFAULT_POOL_SIZE, max_hosts=DEFAULT_MAX_HOSTS,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, headers=None):
+    """
+    Build a keep-alive session.
+
+    pool_size: connections kept open per host (should be >= the batch per-host cap)
+    max_hosts: how many distinct host pools are cached before the oldest is dropped
+    retries:   retry budget for connect errors, read errors and RETRY_STATUSES
+    backoff:   exponential backoff factor between retries (honours Retry-After)
+    """
+    retry = Retry(
+        total=retries, connect=retries, read=retries, status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = PooledAdapter(pool_connections=max_hosts, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def session_stats(session):
+    """
+    Aggregate connection stats for a session built by make_session().
+    """
+    stats = {"requests": 0, "new_connections": 0, "connect_time": 0.0, "total_time": 0.0}
+    seen = set()
+    for adapter in session.adapters.values():
+        if isinstance(adapter, PooledAdapter) and id(adapter) not in seen:
+            seen.add(id(adapter))
+            for k in stats:
+                stats[k] += adapter.stats[k]
+    stats["reused_requests"] = max(0, stats["requests"] - stats["new_connections"])
+    stats["avg_connect_time"] = (stats["connect_time"] / stats["new_connections"]) if stats["new_connections"] else 0.0
+    # requests that skipped the handshake saved roughly one average handshake each
+    stats["estimated_saved_time"] = stats["reused_requests"] * stats["avg_connect_time"]
+    return stats
+
+
+_default_session = None
+_default_lock = threading.Lock()
+
+
+def get_default_session():
+    """Shared process-wide pooled session (created on first use)."""
+    global _default_session
+    if _default_session is None:
+        with _default_lock:
+            if _default_session is None:
+                _default_session = make_session()
+    return _default_session
@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+# the modules in src/ import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from scanner import FetchedResponse, analyze_response
+
+SECURE_HEADERS = {
+    "Content-Security-Policy": "default-src 'self'",
+    "Strict-Transport-Security": "max-age=31536000",
+    "X-Frame-Options": "DENY",
+    "X-Content-Type-Options": "nosniff",
+    "Referrer-Policy": "no-referrer",
+    "Permissions-Policy": "camera=()",
+}
+# passes every DOM check
+GOOD_PAGE = ('<form method=post action="https://x.example/"><input type=hidden name=csrf_token value=1>'
+             '<input type=checkbox name=consent> I agree</form><a href="/privacy">Privacy policy</a>')
+
+
+@pytest.fixture
+def make_result():
+    """
+    make_result(url, html=..., headers=..., cookies=...) -> a scan result made
+    without a network. The defaults give no issues on https:// (LOW), only
+    "No HTTPS" on http:// (HIGH); headers={} adds "Missing Security Header".
+    """
+    def make(url, html=GOOD_PAGE, headers=SECURE_HEADERS, cookies=()):
+        headers = dict(headers, **{"Content-Type": "text/html; charset=utf-8"})
+        if cookies:
+            headers["Set-Cookie"] = ", ".join(cookies)
+        return analyze_response(url, FetchedResponse(url, 200, headers, html.encode("utf-8")))
+    return make
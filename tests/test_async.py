@@ -0,0 +1,85 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from async_scanner import scan_many_async, scan_webform_async
+from conftest import GOOD_PAGE, SECURE_HEADERS
+from scanner import scan_webform
+
+PAGES = {
+    "/form": ("text/html; charset=utf-8", GOOD_PAGE.encode("utf-8")),
+    "/odd-charset": ("text/html; charset=x-no-such-codec", "<form></form><p>caf\xe9</p>".encode("latin-1")),
+    "/big": ("text/html", b"<form></form>" + b"<p>filler</p>" * 20000),
+}
+
+
+@pytest.fixture(scope="module")
+def base():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = PAGES.get(self.path)
+            if page is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", page[0])
+            self.send_header("Content-Length", str(len(page[1])))
+            for name, value in SECURE_HEADERS.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(page[1])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def _comparable(result):
+    details = {k: v for k, v in result["details"].items() if k != "fetch"}
+    return dict(result, details=details)
+
+
+@pytest.mark.parametrize("path", ["/form", "/odd-charset", "/missing"])
+def test_async_scan_matches_the_blocking_scan(base, path):
+    result = asyncio.run(scan_webform_async(base + path))
+    assert _comparable(result) == _comparable(scan_webform(base + path))
+
+
+def test_async_scan_caps_the_body(base):
+    result = asyncio.run(scan_webform_async(base + "/big", max_bytes=1000))
+    assert result["details"]["body"] == {"bytes_read": 1000, "max_bytes": 1000, "truncated": True,
+                                         "stopped_early": False}
+    assert result["checks"]["forms"]["ok"]
+    assert "body" not in asyncio.run(scan_webform_async(base + "/big"))["details"]
+
+
+def test_scan_many_async_yields_every_url(base):
+    async def urls():
+        for i in range(12):
+            yield base + ("/form" if i % 3 else "/missing")
+        yield "http://127.0.0.1:9/unreachable"
+
+    async def collect():
+        return [r async for r in scan_many_async(urls(), concurrency=4)]
+
+    results = asyncio.run(collect())
+    assert len(results) == 13
+    assert sorted(r["url"] for r in results) == sorted([base + "/form"] * 8 + [base + "/missing"] * 4
+                                                        + ["http://127.0.0.1:9/unreachable"])
+    unreachable = next(r for r in results if r["url"].endswith("/unreachable"))
+    assert unreachable["checks"]["security_headers"]["msg"] == "No HTTP response"
+
+
+def test_scan_many_async_accepts_a_plain_iterable(base):
+    async def collect():
+        return [r["url"] async for r in scan_many_async([base + "/form"], concurrency=0)]
+    assert asyncio.run(collect()) == [base + "/form"]
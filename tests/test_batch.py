@@ -0,0 +1,46 @@
+import threading
+
+from batch import LOOKAHEAD_FACTOR, scan_batch
+
+
+def _echo(url):
+    return {"url": url}
+
+
+def test_ordered_results_follow_input():
+    urls = [f"http://h{i % 3}.example/{i}" for i in range(50)]
+    assert [r["url"] for r in scan_batch(urls, workers=4, per_host=1, scan=_echo)] == urls
+
+
+def test_failed_scan_yields_error_result():
+    def scan(url):
+        if url.endswith("/2"):
+            raise ValueError("boom")
+        return _echo(url)
+
+    urls = [f"http://h{i}.example/{i}" for i in range(5)]
+    results = list(scan_batch(urls, workers=2, scan=scan))
+    assert [r["url"] for r in results] == urls
+    assert results[2]["error"] == "ValueError: boom"
+    assert results[2]["risk"]["level"] in ("LOW", "MEDIUM", "HIGH")
+    assert all("error" not in r for i, r in enumerate(results) if i != 2)
+
+
+def test_ordered_mode_reads_ahead_at_most_lookahead():
+    # everything scanned while the first URL is slow waits in the reorder
+    # buffer, which must stay bounded by the lookahead
+    scanned = []
+    while_blocked = []
+
+    def scan(url):
+        if url.endswith("/0"):
+            threading.Event().wait(0.5)
+            while_blocked.append(len(scanned))
+        else:
+            scanned.append(url)
+        return _echo(url)
+
+    workers = 2
+    urls = [f"http://h{i % 50}.example/{i}" for i in range(2000)]
+    assert [r["url"] for r in scan_batch(urls, workers=workers, per_host=2, scan=scan)] == urls
+    assert while_blocked[0] < workers * LOOKAHEAD_FACTOR
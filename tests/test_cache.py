@@ -0,0 +1,92 @@
+import pytest
+
+import scanner
+from cache import ResponseCache, response_fingerprint
+from conftest import GOOD_PAGE, SECURE_HEADERS
+from scanner import FetchedResponse, scan_webform
+
+
+@pytest.fixture
+def site(monkeypatch):
+    """
+    Fake fetch_url over `site.pages` ({url: (headers, body)}): answers 304 when
+    If-None-Match matches the ETag and records the request headers it got.
+    """
+    class Site:
+        pages = {}
+        requests = []
+
+    def fetch_url(url, timeout=7, session=None, stream=False, headers=None, method="GET"):
+        Site.requests.append(dict(headers or {}))
+        page_headers, body = Site.pages[url]
+        if headers and headers.get("If-None-Match") == page_headers.get("ETag"):
+            response = FetchedResponse(url, 304, page_headers, b"")
+        else:
+            response = FetchedResponse(url, 200, dict(page_headers, **{"Content-Type": "text/html"}), body)
+        response.fetch_timing = {"total_s": 0.001}
+        return response
+
+    monkeypatch.setattr(scanner, "fetch_url", fetch_url)
+    return Site
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    yield cache
+    cache.close()
+
+
+def test_304_reuses_the_stored_result(site, cache):
+    url = "https://a.example/"
+    site.pages[url] = (dict(SECURE_HEADERS, ETag='"v1"'), GOOD_PAGE.encode())
+    first = scan_webform(url, cache=cache)
+    assert first["details"]["cache"] == "miss" and site.requests == [{}]
+    second = scan_webform(url, cache=cache)
+    assert site.requests[1] == {"If-None-Match": '"v1"'}
+    assert second["details"]["cache"] == "revalidated"
+    assert second["checks"] == first["checks"] and second["risk"] == first["risk"]
+    assert cache.stats()["revalidated"] == 1 and cache.stats()["hit_rate"] == 0.5
+
+
+def test_same_fingerprint_is_unchanged_and_a_new_body_is_rescanned(site, cache):
+    url = "https://a.example/"
+    site.pages[url] = (SECURE_HEADERS, GOOD_PAGE.encode())   # no validators: every fetch is a full GET
+    assert scan_webform(url, cache=cache)["details"]["cache"] == "miss"
+    assert scan_webform(url, cache=cache)["details"]["cache"] == "unchanged"
+    site.pages[url] = (SECURE_HEADERS, b"<p>no forms any more</p>")
+    result = scan_webform(url, cache=cache)
+    assert result["details"]["cache"] == "miss"
+    assert not result["checks"]["forms"]["ok"]
+    assert cache.get(url)["result"]["checks"]["forms"]["ok"] is False
+    assert cache.stats()["stores"] == 2
+
+
+def test_fingerprint_ignores_cookie_values_but_not_attributes():
+    def fingerprint(cookie):
+        return response_fingerprint(FetchedResponse("https://a.example/", 200, {"Set-Cookie": cookie}, b"x"))
+    assert fingerprint("sid=1; Secure; Max-Age=60") == fingerprint("sid=2; Secure; Max-Age=90")
+    assert fingerprint("sid=1; Secure") != fingerprint("sid=1")
+
+
+def test_ttl_and_size_eviction(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("cache.time.time", lambda: now[0])
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl=60, max_bytes=0)
+    result = {"url": "https://a.example/", "checks": {}}
+    for i in range(3):
+        cache.put(f"https://a.example/{i}", FetchedResponse(f"https://a.example/{i}", 200, {}, b""), result)
+        now[0] += 10
+    now[0] = 1065                       # entry 0 was last used at 1000
+    assert cache.get("https://a.example/0") is None
+    assert cache.get("https://a.example/1") is not None
+    now[0] = 1075
+    assert cache.evict() == 1 and cache.stats()["entries"] == 1
+
+    cache.ttl = 0
+    size = cache.stats()["bytes"]
+    cache.put("https://a.example/3", FetchedResponse("https://a.example/3", 200, {}, b""), result)
+    cache.max_bytes = size + 1          # room for one entry: the least recently used one goes
+    assert cache.evict() == 1
+    assert cache.get("https://a.example/2") is None and cache.get("https://a.example/3") is not None
+    cache.close()
@@ -0,0 +1,61 @@
+import csv
+import json
+import os
+
+import pytest
+
+import main
+from bench import _imported_modules
+
+SRC = os.path.dirname(os.path.abspath(main.__file__))
+
+
+@pytest.fixture
+def saved(tmp_path, make_result):
+    """A JSON Lines file with one HIGH, one MEDIUM and one LOW result."""
+    path = tmp_path / "results.jsonl"
+    results = [make_result("http://a.example/"), make_result("https://b.example/", headers={}),
+               make_result("https://c.example/")]
+    path.write_text("".join(json.dumps(r) + "\n" for r in results), encoding="utf-8")
+    return str(path), results
+
+
+def test_report_loads_no_heavy_modules(saved, tmp_path):
+    path, _ = saved
+    loaded = _imported_modules(["main.py", "report", path, "--quiet", "--markdown", str(tmp_path / "r.md")], SRC)
+    assert "reporting" in loaded and "sinks" in loaded
+    assert not {"requests", "urllib3", "bs4", "lxml", "scanner"} & loaded
+    assert os.path.exists(tmp_path / "r.md")
+
+
+def test_report_filters_and_writes_outputs(saved, tmp_path, capsys):
+    path, results = saved
+    table = tmp_path / "high.csv"
+    main.main(["report", path, "--level", "HIGH", "--csv", str(table)])
+    out = capsys.readouterr().out
+    assert "http://a.example/" in out and "https://c.example/" not in out
+    with open(table, newline="", encoding="utf-8") as fh:
+        assert [row["url"] for row in csv.DictReader(fh)] == ["http://a.example/"]
+
+    jsonl = tmp_path / "headers.jsonl"
+    main.main(["report", path, "--issue", "Missing Security Header", "--jsonl", str(jsonl), "--quiet"])
+    assert capsys.readouterr().out == ""
+    assert [json.loads(line)["url"] for line in jsonl.read_text().splitlines()] == ["https://b.example/"]
+
+
+def test_iter_urls_reads_files_and_skips_junk(tmp_path, capsys):
+    listing = tmp_path / "urls.txt"
+    listing.write_text("# campus sites\nhttps://a.example/\n\nftp://nope.example/\nhttp://b.example/\n")
+    assert list(main.iter_urls(["https://z.example/", str(listing)])) == [
+        "https://z.example/", "https://a.example/", "http://b.example/"]
+    assert "skipping 'ftp://nope.example/'" in capsys.readouterr().err
+    with pytest.raises(SystemExit, match="no such file"):
+        list(main.iter_urls([str(tmp_path / "missing.txt")]))
+
+
+def test_crawl_subcommand_hands_its_arguments_to_crawl(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main.main(["crawl", "--help"])
+    assert exit_info.value.code == 0
+    assert "--max-pages" in capsys.readouterr().out
+    assert "{scan,rescan,report,crawl,bench}" in main.build_parser().format_help()
@@ -0,0 +1,63 @@
+import threading
+
+import crawl
+
+
+def test_robots_fetch_blocks_only_its_own_origin(monkeypatch):
+    release = threading.Event()
+    fetched = []
+
+    def fetch_url(url, session=None):
+        fetched.append(url)
+        if "slow.example" in url:
+            release.wait(5)
+        return None  # unreachable: everything allowed
+
+    monkeypatch.setattr(crawl, "fetch_url", fetch_url)
+    robots = crawl.RobotsCache()
+    slow = [threading.Thread(target=robots.allowed, args=(f"http://slow.example/{i}",)) for i in range(2)]
+    for t in slow:
+        t.start()
+    # answered while the slow origin's fetch is still running
+    fast = []
+    t = threading.Thread(target=lambda: fast.append(robots.allowed("http://fast.example/page")))
+    t.start()
+    t.join(2)
+    release.set()
+    assert fast == [True]
+    for t in slow:
+        t.join()
+    assert sorted(fetched) == ["http://fast.example/robots.txt", "http://slow.example/robots.txt"]
+
+
+def test_robots_fetch_error_is_retried(monkeypatch):
+    calls = []
+
+    def fetch_url(url, session=None):
+        calls.append(url)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return None
+
+    monkeypatch.setattr(crawl, "fetch_url", fetch_url)
+    robots = crawl.RobotsCache()
+    try:
+        robots.allowed("http://h.example/")
+    except RuntimeError:
+        pass
+    assert robots.allowed("http://h.example/")
+    assert len(calls) == 2
+
+
+def test_frontier_stops_growing_at_max_pages(monkeypatch, make_result):
+    def crawl_page(url, session=None, parser="auto"):
+        links = [f"{url.rstrip('/')}/{i}" for i in range(50)]
+        return make_result(url), url, links
+
+    monkeypatch.setattr(crawl, "crawl_page", crawl_page)
+    crawler = crawl.Crawler("https://site.example/", max_pages=5, max_depth=10, rate=0, respect_robots=False)
+    pages = list(crawler.run())
+    assert len(pages) == 5
+    # only what max_pages could still fetch was queued and hashed, not 50 links per page
+    assert len(crawler.frontier.seen) == 5 and len(crawler.frontier) == 0
+    assert crawler.stats["discovered"] == 5
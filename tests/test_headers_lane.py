@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+import scanner
+from scanner import FetchedResponse, fetch_headers
+from transport import HostMemo, make_session
+
+
+class _Response(FetchedResponse):
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Fake fetch_url: hosts named nohead.* answer HEAD with 405; records every (method, url)."""
+    requests = []
+
+    def fetch_url(url, timeout=7, session=None, stream=False, headers=None, method="GET"):
+        requests.append((method, url))
+        status = 405 if method == "HEAD" and "nohead." in url else 200
+        response = _Response(url, status, {"X-Frame-Options": "DENY"}, b"")
+        response.fetch_timing = {}
+        return response
+
+    monkeypatch.setattr(scanner, "fetch_url", fetch_url)
+    return requests
+
+
+def test_head_is_used_when_it_works(server):
+    r = fetch_headers("http://ok.example/a", session=make_session())
+    assert r.status_code == 200 and r.fetch_timing["method"] == "HEAD"
+    assert server == [("HEAD", "http://ok.example/a")]
+
+
+def test_405_falls_back_to_get_and_the_host_is_remembered(server):
+    session = make_session()
+    r = fetch_headers("http://nohead.example/a", session=session)
+    assert r.status_code == 200 and r.fetch_timing["method"] == "GET"
+    fetch_headers("http://nohead.example/b", session=session)
+    assert server == [("HEAD", "http://nohead.example/a"), ("GET", "http://nohead.example/a"),
+                      ("GET", "http://nohead.example/b")]
+    assert "nohead.example" in session.get_adapter("http://nohead.example/").head_unsupported
+
+    # the memo belongs to the session: another one tries HEAD again
+    server.clear()
+    fetch_headers("http://nohead.example/c", session=make_session())
+    assert server[0] == ("HEAD", "http://nohead.example/c")
+
+
+def test_forced_methods(server):
+    session = make_session()
+    assert fetch_headers("http://nohead.example/", session=session, method="HEAD").status_code == 405
+    assert fetch_headers("http://ok.example/", session=session, method="GET").fetch_timing["method"] == "GET"
+    assert len(session.get_adapter("http://ok.example/").head_unsupported) == 0
+
+
+def test_host_memo_is_bounded_and_expires(monkeypatch):
+    memo = HostMemo(max_hosts=2, ttl=60)
+    for host in ("a", "b", "c"):
+        memo.add(host)
+    assert "a" not in memo and "b" in memo and "c" in memo and len(memo) == 2
+    now = time.monotonic()
+    monkeypatch.setattr("transport.time.monotonic", lambda: now + 61)
+    assert "b" not in memo and len(memo) == 1      # expired entries are dropped when looked up
+    memo.clear()
+    assert len(memo) == 0
+
+
+def test_fixture_server_head_fallback():
+    from fixtures import start_fixture_server
+
+    server, base = start_fixture_server()
+    try:
+        session = make_session()
+        r = fetch_headers(f"{base}/small/1?headers=strict", session=session)
+        assert r.status_code == 200 and r.fetch_timing["method"] == "HEAD"
+        r = fetch_headers(f"{base}/nohead/small/1?headers=strict", session=session)
+        assert r.status_code == 200 and r.fetch_timing["method"] == "GET"
+        assert base.split("//")[1] in session.get_adapter(base).head_unsupported
+        result = scanner.scan_webform(f"{base}/nohead/small/2?headers=strict", session=session, plan="headers")
+        assert result["checks"]["security_headers"]["ok"] and result["details"]["fetch"]["method"] == "GET"
+    finally:
+        server.shutdown()
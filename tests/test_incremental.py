@@ -0,0 +1,172 @@
+import json
+import os
+import time
+
+import pytest
+
+from conftest import SECURE_HEADERS
+from incremental import diff_results, load_baseline, plan_rescan, probe_changed, run_incremental
+from reporting import generate_json_report, json_report_filename
+from scanner import FetchedResponse, analyze_response
+
+NOW = 1_000_000.0
+HOUR = 3600
+
+
+def _summary(directory, result, mtime):
+    path = os.path.join(directory, json_report_filename(result["url"]))
+    generate_json_report(result, filename=path)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_plan_rescan_reasons(make_result):
+    baseline = {
+        "https://fresh.example/": {"result": make_result("https://fresh.example/"), "scanned_at": NOW - HOUR},
+        "https://old.example/": {"result": make_result("https://old.example/"), "scanned_at": NOW - 48 * HOUR},
+        "https://down.example/": {"result": analyze_response("https://down.example/", None), "scanned_at": NOW},
+    }
+    urls = ["https://new.example/", *baseline]
+    to_scan, fresh = plan_rescan(urls, baseline, max_age=24 * HOUR, now=NOW)
+    assert to_scan == [("https://new.example/", "new"), ("https://old.example/", "due"),
+                       ("https://down.example/", "failed")]
+    assert fresh == ["https://fresh.example/"]
+    to_scan, fresh = plan_rescan(urls, baseline, max_age=0, now=NOW)
+    assert fresh == [] and len(to_scan) == 4
+
+
+def test_diff_results(make_result):
+    low = make_result("https://a.example/")
+    high = make_result("http://a.example/")
+    high["url"] = low["url"]
+    assert diff_results(low, make_result("https://a.example/")) is None
+
+    worse = diff_results(low, high)
+    assert worse["new_issues"] == ["No HTTPS"] and worse["resolved_issues"] == []
+    assert worse["risk"]["from"] == "LOW" and worse["risk"]["to"] == "HIGH"
+    assert worse["regression"]
+
+    better = diff_results(high, low)
+    assert better["resolved_issues"] == ["No HTTPS"] and not better["regression"]
+
+    first = diff_results(None, high)
+    assert first["new_issues"] == ["No HTTPS"] and first["risk"]["from"] is None
+    assert not first["regression"]   # first sightings never count as regressions
+
+
+def test_load_baseline_keeps_the_newest_summary(tmp_path, make_result):
+    older = make_result("https://a.example/", headers={})
+    newer = make_result("https://a.example/")
+    _summary(tmp_path, newer, NOW)
+    stale = tmp_path / "compliance_summary_stale_copy.json"
+    stale.write_text(json.dumps(older), encoding="utf-8")
+    os.utime(stale, (NOW - HOUR, NOW - HOUR))
+    (tmp_path / "compliance_summary_broken.json").write_text("{not json", encoding="utf-8")
+
+    baseline = load_baseline(str(tmp_path))
+    assert list(baseline) == ["https://a.example/"]
+    assert baseline["https://a.example/"]["result"] == newer
+    assert baseline["https://a.example/"]["scanned_at"] == NOW
+
+
+@pytest.fixture
+def scans(make_result):
+    """A fake scan callable; `pages` maps URL -> kwargs for make_result (or a cache outcome)."""
+    calls = []
+    pages = {}
+
+    def scan(url):
+        calls.append(url)
+        page = pages.get(url, {})
+        result = make_result(url, **{k: v for k, v in page.items() if k != "cache"})
+        if "cache" in page:
+            result["details"]["cache"] = page["cache"]
+        return result
+
+    scan.calls = calls
+    scan.pages = pages
+    return scan
+
+
+def test_run_incremental_rescans_due_urls_and_writes_the_delta(tmp_path, make_result, scans):
+    directory = str(tmp_path)
+    old = os.path.getmtime(_summary(directory, make_result("https://old.example/"), 1))
+    _summary(directory, make_result("https://fresh.example/"), time.time() - HOUR)
+    scans.pages["https://old.example/"] = {"headers": {}}     # regressed since the last scan
+
+    delta_file = str(tmp_path / "delta.json")
+    report = run_incremental(["https://old.example/", "https://fresh.example/", "https://new.example/"],
+                             directory=directory, max_age=24 * HOUR, scan=scans, delta_filename=delta_file,
+                             probe=None)
+
+    assert sorted(scans.calls) == ["https://new.example/", "https://old.example/"]
+    assert report["reasons"] == {"due": 1, "new": 1}
+    assert (report["rescanned"], report["skipped"]) == (2, 1)
+    assert report["regressions"] == ["https://old.example/"]
+    with open(delta_file, encoding="utf-8") as fh:
+        written = json.load(fh)
+    assert {c["url"]: c["reason"] for c in written["changes"]} == {
+        "https://old.example/": "due", "https://new.example/": "new"}
+    # the rescanned summary was refreshed, the fresh one left alone
+    assert os.path.getmtime(os.path.join(directory, json_report_filename("https://old.example/"))) > old
+    assert load_baseline(directory)["https://old.example/"]["result"]["issues"] == ["Missing Security Header"]
+
+
+def test_run_incremental_revalidates_fresh_urls_with_a_cache(tmp_path, make_result, scans):
+    baseline = {url: {"result": make_result(url), "scanned_at": time.time()}
+                for url in ("https://same.example/", "https://edited.example/")}
+    scans.pages["https://same.example/"] = {"cache": "revalidated"}
+    scans.pages["https://edited.example/"] = {"cache": "miss", "cookies": ("sid=1; Path=/",)}
+    seen = []
+
+    report = run_incremental(None, baseline=baseline, cache=object(), scan=scans, on_result=seen.append,
+                             delta_filename=str(tmp_path / "delta.json"))
+
+    assert report["reasons"] == {"unchanged": 1, "changed": 1}
+    assert report["rescanned"] == 1
+    assert [c["url"] for c in report["changes"]] == ["https://edited.example/"]
+    assert report["changes"][0]["new_issues"] == ["Insecure Cookies"]
+    assert sorted(r["url"] for r in seen) == sorted(baseline)
+    assert not list(tmp_path.glob("compliance_summary_*"))   # on_result replaces the summary files
+
+
+def _probe(url, status=200, headers=SECURE_HEADERS, last_modified=None):
+    headers = dict(headers)
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    result = analyze_response(url, FetchedResponse(url, status, headers, b""), plan="headers")
+    if last_modified:
+        result["details"]["last_modified"] = last_modified
+    return result
+
+
+def test_probe_changed(make_result):
+    url = "https://a.example/"
+    entry = {"result": make_result(url), "scanned_at": NOW}
+    assert not probe_changed(entry, _probe(url))
+    assert not probe_changed(entry, _probe(url, last_modified="Sun, 11 Jan 1970 00:00:00 GMT"))
+    assert probe_changed(entry, _probe(url, last_modified="Mon, 12 Jan 1970 14:00:00 GMT"))   # after NOW
+    assert not probe_changed(entry, _probe(url, last_modified="not a date"))
+    assert probe_changed(entry, _probe(url, headers={}))          # a security header went away
+    assert probe_changed(entry, _probe(url, status=404))
+    assert probe_changed(entry, analyze_response(url, None, plan="headers"))
+
+
+def test_run_incremental_probes_fresh_urls_without_a_cache(tmp_path, make_result, scans):
+    baseline = {url: {"result": make_result(url), "scanned_at": time.time()}
+                for url in ("https://same.example/", "https://edited.example/")}
+    probed = []
+
+    def probe(url):
+        probed.append(url)
+        return _probe(url, headers={} if "edited" in url else SECURE_HEADERS)
+
+    scans.pages["https://edited.example/"] = {"headers": {}}
+    report = run_incremental(None, baseline=baseline, scan=scans, probe=probe, on_result=lambda r: None,
+                             delta_filename=str(tmp_path / "delta.json"))
+
+    assert sorted(probed) == sorted(baseline)
+    assert scans.calls == ["https://edited.example/"]
+    assert report["reasons"] == {"unchanged": 1, "changed": 1}
+    assert (report["rescanned"], report["skipped"]) == (1, 0)
+    assert report["regressions"] == ["https://edited.example/"]
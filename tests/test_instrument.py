@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+import instrument
+from conftest import GOOD_PAGE, SECURE_HEADERS
+from instrument import Histograms, SpanWriter, otel_spans
+from scanner import FetchedResponse, analyze_response
+
+
+@pytest.fixture
+def timed():
+    """Instrumentation on for the test; returns a function making a timed result."""
+    instrument.enable()
+
+    def timed(url="https://a.example/", html=GOOD_PAGE):
+        response = FetchedResponse(url, 200, dict(SECURE_HEADERS, **{"Content-Type": "text/html"}),
+                                   html.encode("utf-8"))
+        response.fetch_timing = {"total_s": 0.05, "transfer_s": 0.03, "wait_s": 0.02, "dns_tcp_s": 0.01,
+                                 "tls_s": 0.0, "header_bytes": 300, "body_bytes": len(response.content), "hops": 1}
+        return analyze_response(url, response)
+    yield timed
+    instrument.enable(False)
+
+
+def test_results_carry_timings_only_when_enabled(timed):
+    timings = timed()["timings"]
+    assert set(timings) == {"total_s", "stages", "checks", "bytes", "hops"}
+    assert list(timings["stages"]) == ["fetch.dns_tcp", "fetch.tls", "fetch.wait", "fetch.transfer",
+                                       "parse", "checks", "score"]
+    assert timings["stages"]["fetch.wait"] == 0.02 and timings["stages"]["fetch.transfer"] == pytest.approx(0.01)
+    assert set(timings["checks"]) == {"https", "forms", "privacy_policy", "consent", "security_headers",
+                                      "cookies", "trackers"}
+    assert timings["bytes"] == {"body": len(GOOD_PAGE), "headers": 300}
+    assert timings["total_s"] >= 0.05
+    instrument.enable(False)
+    assert "timings" not in timed()
+
+
+def test_histograms_count_and_render_prometheus(timed):
+    hist = Histograms(buckets=(0.01, 1.0))
+    for _ in range(3):
+        hist.observe(timed())
+    hist.observe({"url": "https://b.example/"})          # no timings: ignored
+    summary = hist.as_dict()
+    assert summary["scans"] == 3 and summary["bytes"] == {"body": 3 * len(GOOD_PAGE), "headers": 900}
+    assert summary["scan"]["total"]["count"] == 3 and summary["scan"]["total"]["p50_le"] == 1.0
+    assert summary["stage"]["fetch.wait"]["p95_le"] == 1.0 and summary["stage"]["fetch.dns_tcp"]["p50_le"] == 0.01
+
+    text = hist.to_prometheus()
+    lines = text.splitlines()
+    assert "# TYPE webform_scan_seconds histogram" in lines
+    assert 'webform_scan_seconds_bucket{le="0.01"} 0' in lines
+    assert 'webform_scan_seconds_bucket{le="+Inf"} 3' in lines
+    assert "webform_scan_seconds_count 3" in lines
+    assert 'webform_scan_stage_seconds_bucket{stage="fetch.wait",le="1"} 3' in lines
+    assert 'webform_scan_stage_seconds_count{stage="fetch.wait"} 3' in lines
+    assert f'webform_scan_bytes_total{{part="body"}} {3 * len(GOOD_PAGE)}' in lines
+    assert text.endswith("\n")
+
+
+def test_spans_are_laid_end_to_end(timed, tmp_path):
+    result = timed()
+    spans = otel_spans(result, end_ns=10 ** 18, trace_id="ab" * 16)
+    root, children = spans[0], spans[1:]
+    assert root["name"] == "scan" and root["endTimeUnixNano"] == str(10 ** 18)
+    stages = [s for s in children if s["parentSpanId"] == root["spanId"]]
+    assert [s["name"] for s in stages] == list(result["timings"]["stages"])
+    for a, b in zip(stages, stages[1:]):
+        assert a["endTimeUnixNano"] == b["startTimeUnixNano"]
+    checks_span = next(s for s in stages if s["name"] == "checks")
+    checks = [s for s in children if s.get("parentSpanId") == checks_span["spanId"]]
+    assert len(checks) == 7 and all(s["attributes"] == [{"key": "scan.aggregated", "value": {"boolValue": True}}]
+                                    for s in checks)
+    assert otel_spans({"url": "x"}) == []
+
+    path = tmp_path / "spans.jsonl"
+    writer = SpanWriter(str(path))
+    writer.write(result)
+    writer.write({"url": "https://b.example/"})
+    writer.close()
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    request = json.loads(lines[0])["resourceSpans"][0]
+    assert request["resource"]["attributes"][0]["value"]["stringValue"] == instrument.SERVICE_NAME
+    assert len(request["scopeSpans"][0]["spans"]) == len(spans)
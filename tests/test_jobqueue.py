@@ -0,0 +1,130 @@
+import pytest
+
+from jobqueue import JobQueue, retry_delay, run_jobs, transient_failure
+from scanner import FetchedResponse, analyze_response
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return str(tmp_path / "jobs.sqlite")
+
+
+def _queue(path, **kw):
+    kw.setdefault("backoff", 0)
+    return JobQueue(path, **kw)
+
+
+def test_enqueue_ignores_duplicates(queue_path):
+    q = _queue(queue_path)
+    assert q.enqueue(["https://a.example/", " https://b.example/ ", "https://a.example/", ""]) == 2
+    assert q.enqueue(["https://b.example/", "https://c.example/"]) == 1
+    assert q.counts() == {"pending": 3, "in-flight": 0, "done": 0, "failed": 0}
+    q.close()
+
+
+def test_claimed_url_goes_to_one_worker_only(queue_path):
+    first = _queue(queue_path, worker="w1")
+    second = _queue(queue_path, worker="w2")
+    first.enqueue(["https://a.example/", "https://b.example/"])
+    assert first.claim(limit=1) == ["https://a.example/"]
+    assert second.claim(limit=5) == ["https://b.example/"]
+    assert second.claim(limit=5) == []
+    first.close()
+    second.close()
+
+
+def test_complete_round_trips_the_result(queue_path, make_result):
+    q = _queue(queue_path)
+    q.enqueue(["https://a.example/"])
+    [url] = q.claim()
+    result = make_result(url)
+    assert q.complete(url, result)
+    assert list(q.results()) == [result]
+    assert q.counts()["done"] == 1
+    q.close()
+
+
+def test_failures_back_off_then_give_up(queue_path):
+    q = _queue(queue_path, max_attempts=2, backoff=60)
+    q.enqueue(["https://a.example/"])
+    [url] = q.claim()
+    assert q.fail(url, "timeout") == "pending"
+    assert q.claim() == []                   # not before the backoff
+    assert 0 < q.next_due() <= retry_delay(1, backoff=60)
+
+    q._write("UPDATE jobs SET not_before = 0")   # skip the wait
+    [url] = q.claim()
+    assert q.fail(url, "timeout", result={"url": url}) == "failed"
+    assert q.counts()["failed"] == 1
+    assert list(q.results()) == [{"url": url}]
+    assert q.retry_failed() == 1
+    assert q.claim() == [url]
+    q.close()
+
+
+def test_expired_lease_is_taken_over(queue_path, make_result):
+    crashed = _queue(queue_path, worker="crashed", lease=-1)
+    other = _queue(queue_path, worker="other")
+    crashed.enqueue(["https://a.example/"])
+    [url] = crashed.claim()
+    assert other.claim() == [url]
+    assert not crashed.complete(url, make_result(url))   # its lease is gone
+    assert crashed.fail(url, "late") is None
+    assert other.complete(url, make_result(url))
+    crashed.close()
+    other.close()
+
+
+def test_release_hands_back_in_flight_urls(queue_path):
+    q = _queue(queue_path)
+    q.enqueue(["https://a.example/", "https://b.example/"])
+    q.claim(limit=2)
+    assert q.release() == 2
+    assert q.counts()["pending"] == 2
+    q.close()
+
+
+def test_run_jobs_retries_errors_and_reports_results(queue_path, make_result):
+    q = _queue(queue_path, max_attempts=3)
+    urls = ["https://ok.example/", "https://flaky.example/", "https://broken.example/"]
+    q.enqueue(urls)
+    calls = {}
+
+    def scan(url):
+        calls[url] = calls.get(url, 0) + 1
+        if "broken" in url or ("flaky" in url and calls[url] == 1):
+            raise ConnectionError("reset")
+        return make_result(url)
+
+    seen = []
+    stats = run_jobs(q, scan=scan, workers=2, on_result=seen.append)
+    assert stats == {"done": 2, "retried": 3, "failed": 1}
+    assert calls == {"https://ok.example/": 1, "https://flaky.example/": 2, "https://broken.example/": 3}
+    assert sorted(r["url"] for r in seen) == ["https://flaky.example/", "https://ok.example/"]
+    assert q.counts() == {"pending": 0, "in-flight": 0, "done": 2, "failed": 1}
+    q.close()
+
+
+def _status_result(url, status):
+    return analyze_response(url, FetchedResponse(url, status, {"Content-Type": "text/html"}, b"gone"))
+
+
+def test_http_errors_are_final_except_5xx_and_429(queue_path):
+    assert transient_failure(_status_result("https://a.example/", 404)) is None
+    assert transient_failure(_status_result("https://a.example/", 503)) == "HTTP 503"
+    assert transient_failure(_status_result("https://a.example/", 429)) == "HTTP 429"
+    assert transient_failure(analyze_response("https://a.example/", None)) == "No response"
+
+    q = _queue(queue_path, backoff=3600)
+    q.enqueue(["https://a.example/missing"])
+    calls = []
+
+    def scan(url):
+        calls.append(url)
+        return _status_result(url, 404)
+
+    stats = run_jobs(q, scan=scan, workers=1)
+    assert stats == {"done": 1, "retried": 0, "failed": 0}
+    assert calls == ["https://a.example/missing"]          # no retry, no backoff wait
+    assert [r["details"]["status"] for r in q.results()] == [404]
+    q.close()
@@ -0,0 +1,45 @@
+import pytest
+
+from bench import PARITY_CORPUS
+from parsers import DIVERGENT_BACKENDS, PARSER_PREFERENCE, analyze_markup, available_backends, select_backend
+
+# markup where HTML5 tree construction (selectolax, lxml) and bs4 disagree
+DIVERGENT_MARKUP = {
+    "form_in_table": ("<table><form><tr><td><input type=password></td></tr></form></table>",
+                      "forms", lambda r: r[2]["password_fields"] == 1),
+    "nested_forms": ("<form><form><input name=token></form></form>",
+                     "forms", lambda r: r[2]["forms_count"] == 2 and r[2]["csrf_tokens"] == 2),
+    "link_in_title": ("<title><a href=/privacy>Privacy</a></title>", "privacy_policy", lambda r: r[0]),
+    "checkbox_in_textarea": ("<textarea><input type=checkbox name=agree></textarea>", "consent", lambda r: r[0]),
+}
+
+SAFE_BACKENDS = [b for b in available_backends() if b not in DIVERGENT_BACKENDS]
+
+
+@pytest.mark.parametrize("name", sorted(DIVERGENT_MARKUP))
+def test_reference_result(name):
+    html, check, expected = DIVERGENT_MARKUP[name]
+    assert expected(analyze_markup(html, backend="bs4")[check])
+
+
+@pytest.mark.parametrize("backend", SAFE_BACKENDS)
+@pytest.mark.parametrize("name", sorted(PARITY_CORPUS))
+def test_backend_matches_bs4(backend, name):
+    html = PARITY_CORPUS[name]
+    assert analyze_markup(html, backend=backend) == analyze_markup(html, backend="bs4")
+
+
+@pytest.mark.parametrize("name", sorted(DIVERGENT_MARKUP))
+def test_auto_backend_matches_bs4(name):
+    html = DIVERGENT_MARKUP[name][0]
+    assert analyze_markup(html) == analyze_markup(html, backend="bs4")
+
+
+def test_auto_never_picks_a_divergent_backend():
+    assert select_backend("auto") not in DIVERGENT_BACKENDS
+    assert not set(PARSER_PREFERENCE) & set(DIVERGENT_BACKENDS)
+
+
+@pytest.mark.parametrize("backend", [b for b in DIVERGENT_BACKENDS if b in available_backends()])
+def test_divergent_backends_stay_selectable(backend):
+    assert select_backend(backend) == backend
@@ -0,0 +1,86 @@
+from multiprocessing import shared_memory
+
+import pytest
+
+import pipeline
+import scanner
+from conftest import GOOD_PAGE, SECURE_HEADERS
+from pipeline import SHM_MIN_BYTES, analyze_job, make_job, release_job, scan_pipeline
+from scanner import FetchedResponse, scan_webform
+
+FILLER = "<p>" + "x" * 1000 + "</p>"
+
+
+def _page(i):
+    """Every third page is small and goes inline; the rest go through shared memory."""
+    html = GOOD_PAGE if i % 3 == 0 else FILLER * (SHM_MIN_BYTES // 1000 + i) + GOOD_PAGE
+    if i % 2:
+        html = html.replace("/privacy", "/about")
+    return html.encode("utf-8")
+
+
+@pytest.fixture
+def segments(monkeypatch):
+    """Fake fetch_url for https://a.example/<i> pages; returns the shared memory segment names created."""
+    def fetch_url(url, timeout=7, session=None, stream=False, headers=None, method="GET"):
+        if url.endswith("/down"):
+            return None
+        response = FetchedResponse(url, 200, dict(SECURE_HEADERS, **{"Content-Type": "text/html"}),
+                                   _page(int(url.rsplit("/", 1)[1])))
+        response.fetch_timing = {"total_s": 0.001}
+        return response
+
+    names = []
+
+    def recording_make_job(*args, **kwargs):
+        job = make_job(*args, **kwargs)
+        if job["shm"]:
+            names.append(job["shm"])
+        return job
+
+    monkeypatch.setattr(scanner, "fetch_url", fetch_url)
+    monkeypatch.setattr(pipeline, "fetch_url", fetch_url)
+    monkeypatch.setattr(pipeline, "make_job", recording_make_job)
+    return names
+
+
+def _unlinked(name):
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return True
+    shm.close()
+    return False
+
+
+def test_make_job_round_trip():
+    body = b"<form></form>" + b"y" * SHM_MIN_BYTES
+    job = make_job("https://a.example/", 200, {"Content-Type": "text/html"}, body)
+    assert job["shm"] and job["body"] is None and job["size"] == len(body)
+    direct = scanner.analyze_response("https://a.example/",
+                                      FetchedResponse("https://a.example/", 200, {"Content-Type": "text/html"}, body))
+    assert analyze_job(job) == direct
+    name = job["shm"]
+    release_job(job)
+    assert job["shm"] is None and _unlinked(name)
+    release_job(job)                                   # releasing twice is harmless
+
+    small = make_job("https://a.example/", 200, {}, b"<p>")
+    assert small["shm"] is None and small["body"] == b"<p>"
+
+
+def test_pipeline_matches_scan_webform(segments):
+    urls = [f"https://a.example/{i}" for i in range(9)] + ["https://a.example/down"]
+    results = list(scan_pipeline(urls, processes=2, fetch_workers=4))
+    assert [r["url"] for r in results] == urls
+    for url, result in zip(urls, results):
+        assert result == scan_webform(url)
+    assert len(segments) == 6 and all(_unlinked(name) for name in segments)
+
+
+def test_no_segments_leak_when_the_consumer_stops_early(segments):
+    urls = [f"https://a.example/{i}" for i in range(1, 60) if i % 3]
+    results = scan_pipeline(urls, processes=2, fetch_workers=4)
+    assert next(results)["url"] == urls[0]
+    results.close()
+    assert segments and all(_unlinked(name) for name in segments)
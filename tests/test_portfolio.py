@@ -0,0 +1,76 @@
+import itertools
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from portfolio import DEFAULT_ISSUE_RATINGS, LEVELS, Portfolio
+from scanner import calculate_issue_score, compute_risk
+
+ISSUES = list(DEFAULT_ISSUE_RATINGS) + ["Some future issue"]
+
+
+def _results():
+    """One result per subset of up to four issues, spread over a few hosts."""
+    results = []
+    for n in range(5):
+        for i, issues in enumerate(itertools.combinations(ISSUES, n)):
+            url = f"https://host{i % 7}.example/{n}/{i}"
+            results.append({"url": url, "issues": list(issues), "risk": compute_risk(list(issues))})
+    return results
+
+
+def test_score_matches_compute_risk():
+    results = _results()
+    portfolio = Portfolio.from_results(results)
+    assert len(portfolio) == len(results)
+    scored = portfolio.score()
+    for i, r in enumerate(results):
+        risk = r["risk"]
+        assert portfolio.urls[i] == r["url"]
+        assert int(scored["raw_total"][i]) == risk["raw_total"]
+        assert int(scored["max_total"][i]) == risk["max_total"]
+        assert float(scored["percent"][i]) == pytest.approx(risk["percent"])
+        assert int(scored["normalized_score"][i]) == risk["normalized_score"]
+        assert LEVELS[scored["level"][i]] == risk["level"]
+    assert (scored["normalized_score"] == portfolio.scores).all() and (scored["level"] == portfolio.levels).all()
+
+
+def test_what_if_matches_rescoring_each_result():
+    results = _results()
+    portfolio = Portfolio.from_results(results)
+    ratings = {"Trackers Detected": {"likelihood": 5, "impact": 5}, "No HTTPS": {"impact": 1}}
+    expected = {name: 0 for name in LEVELS}
+    changed = 0
+    for r in results:
+        scores = [calculate_issue_score(issue, ratings.get(issue))[2] for issue in r["issues"]]
+        percent = sum(scores) / (25 * len(scores)) if scores else 0
+        level = "HIGH" if percent >= 0.66 else "MEDIUM" if percent >= 0.33 else "LOW"
+        expected[level] += 1
+        changed += level != r["risk"]["level"]
+    what_if = portfolio.what_if(ratings)
+    assert what_if["levels"] == expected and what_if["changed"] == changed > 0
+    assert sum(sum(row.values()) for row in what_if["transitions"].values()) == len(results)
+    assert portfolio.what_if({})["changed"] == 0
+
+
+def test_aggregates_and_loading(tmp_path):
+    results = [
+        {"url": "http://a.example/", "issues": ["No HTTPS"], "risk": compute_risk(["No HTTPS"])},
+        {"url": "https://a.example/x", "issues": [], "risk": compute_risk([])},
+        {"url": "https://b.example/", "issues": ["Trackers Detected"], "risk": compute_risk(["Trackers Detected"])},
+        {"url": "https://b.example/", "issues": [], "risk": compute_risk([])},      # a later scan of the same URL
+        {"url": "https://c.example/", "error": "no risk recorded"},
+    ]
+    path = tmp_path / "results.jsonl"
+    path.write_text("".join(json.dumps(r) + "\n" for r in results))
+    portfolio = Portfolio.load(jsonl_files=[str(path)])
+    assert portfolio.urls == ["http://a.example/", "https://a.example/x", "https://b.example/"]
+    assert portfolio.level_distribution() == {"LOW": 2, "MEDIUM": 0, "HIGH": 1}
+    assert portfolio.issue_prevalence() == {"No HTTPS": {"count": 1, "share": 0.3333}}
+    rollup = portfolio.host_rollup()
+    assert [h["host"] for h in rollup] == ["a.example", "b.example"]
+    assert rollup[0]["urls"] == 2 and rollup[0]["max_score"] == compute_risk(["No HTTPS"])["normalized_score"]
+    report = portfolio.report(ratings={"No HTTPS": {"likelihood": 1, "impact": 1}})
+    assert report["results"] == 3 and report["hosts"] == 2 and report["what_if"]["changed"] == 1
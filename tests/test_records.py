@@ -0,0 +1,79 @@
+import pytest
+
+from records import MAGIC, RecordSet, RecordWriter, iter_results
+
+
+def _without_laws(result):
+    # "laws" is rebuilt in issue order; the original comes from a set
+    return {k: v for k, v in result.items() if k != "laws"}
+
+
+@pytest.fixture
+def results(make_result):
+    out = [
+        make_result("https://a.example/"),
+        make_result("http://b.example/login", cookies=("sid=9f2c; Path=/", "lang=en")),
+        make_result("https://c.example/", headers={}, html="<p>no forms here</p>"),
+    ]
+    out[1]["details"]["note"] = "ünïcode kept"
+    return out
+
+
+def test_round_trip(tmp_path, results):
+    path = str(tmp_path / "r.wfr")
+    with RecordWriter(open(path, "wb")) as out:
+        for r in results:
+            out.write(r)
+    back = list(iter_results(path))
+    assert [_without_laws(r) for r in back] == [_without_laws(r) for r in results]
+    assert [sorted(r["laws"]) for r in back] == [sorted(r["laws"]) for r in results]
+
+
+def test_record_set_save_and_load(tmp_path, results):
+    records = RecordSet()
+    for r in results:
+        records.add(r)
+    path = records.save(str(tmp_path / "set.wfr"))
+    loaded = RecordSet.load(path)
+    assert len(loaded) == 3
+    assert [_without_laws(r) for r in loaded.results()] == [_without_laws(r) for r in results]
+
+
+def test_per_site_meta_stays_out_of_the_table(tmp_path, make_result):
+    writer = RecordWriter(open(tmp_path / "t.wfr", "wb"))
+    for i in range(50):
+        writer.write(make_result(f"https://h{i}.example/", cookies=(f"sid=value{i}; Path=/",)))
+    size = len(writer.table)
+    for i in range(50, 100):
+        writer.write(make_result(f"https://h{i}.example/", cookies=(f"sid=value{i}; Path=/",)))
+    assert len(writer.table) == size
+    writer.close()
+
+
+def test_each_record_is_flushed(tmp_path, results):
+    path = str(tmp_path / "live.wfr")
+    writer = RecordWriter(open(path, "wb"))
+    writer.write(results[0])
+    assert [r["url"] for r in iter_results(path)] == [results[0]["url"]]  # before close
+    writer.close()
+
+
+@pytest.mark.parametrize("cut", [1, 2, 10])
+def test_torn_last_frame_is_dropped(tmp_path, results, cut):
+    path = tmp_path / "torn.wfr"
+    with RecordWriter(open(path, "wb")) as out:
+        for r in results:
+            out.write(r)
+    data = path.read_bytes()
+    path.write_bytes(data[:-cut])
+    assert [r["url"] for r in iter_results(str(path))] == [r["url"] for r in results[:2]]
+
+
+def test_bad_files_are_rejected(tmp_path, results):
+    path = tmp_path / "x.wfr"
+    path.write_bytes(b"{}\n")
+    with pytest.raises(ValueError, match="not a scan records file"):
+        list(iter_results(str(path)))
+    path.write_bytes(MAGIC + bytes([0x7F, 1, 0]))
+    with pytest.raises(ValueError, match="unknown frame type"):
+        list(iter_results(str(path)))
@@ -0,0 +1,105 @@
+import pytest
+
+import scanner
+from cache import ResponseCache, chain_fingerprint
+from conftest import GOOD_PAGE, SECURE_HEADERS
+from fixtures import start_fixture_server
+from scanner import FetchedResponse, check_cookies_chain, check_https_chain, redirect_chain, scan_webform
+
+
+def _chain(*hops, body=b""):
+    """FetchedResponse for the last (url, status, headers) hop, the others as its history."""
+    history = [FetchedResponse(url, status, headers, b"") for url, status, headers in hops[:-1]]
+    url, status, headers = hops[-1]
+    return FetchedResponse(url, status, headers, body, history=history)
+
+
+@pytest.fixture(scope="module")
+def base():
+    server, base = start_fixture_server()
+    yield base
+    server.shutdown()
+
+
+def test_https_is_judged_on_the_followed_chain():
+    upgraded = _chain(("http://a.example/", 301, {"Location": "https://a.example/"}),
+                      ("https://a.example/", 200, {}))
+    assert check_https_chain("http://a.example/", upgraded) == (
+        True, "HTTPS enabled (HTTP redirects to HTTPS)", {"upgraded": True, "downgraded": False})
+
+    downgraded = _chain(("https://a.example/", 302, {"Location": "http://login.example/"}),
+                        ("http://login.example/", 200, {}))
+    ok, msg, meta = check_https_chain("https://a.example/", downgraded)
+    assert not ok and msg == "⚠ Redirected from HTTPS to HTTP" and meta["downgraded"]
+
+    detour = _chain(("https://a.example/", 302, {}), ("http://a.example/x", 302, {}),
+                    ("https://a.example/y", 200, {}))
+    ok, msg, _ = check_https_chain("https://a.example/", detour)
+    assert not ok and "passes through HTTP" in msg
+
+    plain = FetchedResponse("https://a.example/", 200, {}, b"")
+    assert check_https_chain("https://a.example/", plain) == (True, "HTTPS enabled", {})
+    assert redirect_chain("https://a.example/", plain) is None
+
+
+def test_downgrade_shows_in_the_scan_result():
+    url = "https://a.example/"
+    response = _chain((url, 302, {"Location": "http://a.example/form"}),
+                      ("http://a.example/form", 200, dict(SECURE_HEADERS, **{"Content-Type": "text/html"})),
+                      body=GOOD_PAGE.encode())
+    result = scanner.analyze_response(url, response)
+    assert not result["checks"]["https"]["ok"] and "No HTTPS" in result["issues"]
+    hops = result["details"]["redirects"]["hops"]
+    assert [h["status"] for h in hops] == [302, 200] and [h["https"] for h in hops] == [True, False]
+    assert hops[0]["location"] == "http://a.example/form" and result["details"]["redirects"]["downgraded"]
+
+
+def test_cookies_set_by_redirects_count(base):
+    result = scan_webform(f"{base}/redirect/redirect/small/1?rcookies=insecure&cookies=secure")
+    meta = result["checks"]["cookies"]["meta"]
+    assert [(c["cookie"], c["hop"]) for c in meta["cookies"]] == [("track=1", 0), ("track=1", 1), ("sid=s3cr3t", 2)]
+    assert meta["insecure_count"] == 2 and not result["checks"]["cookies"]["ok"]
+    assert result["checks"]["cookies"]["msg"].endswith("across 3 responses, 2 cookie(s) missing Secure/HttpOnly")
+
+    # secure final cookie, redirects set none: same as checking the final response alone
+    result = scan_webform(f"{base}/redirect/small/1?cookies=secure")
+    assert result["checks"]["cookies"]["ok"] and len(result["details"]["redirects"]["hops"]) == 2
+
+
+def test_per_hop_cookies_without_a_redirect_cookie():
+    response = _chain(("http://a.example/", 301, {}), ("https://a.example/", 200, {"Set-Cookie": "sid=1; Secure"}))
+    ok, msg, meta = check_cookies_chain(response)
+    assert not ok and msg.startswith("1 cookie(s) detected,") and "hop" not in meta["cookies"][0]
+
+
+def test_cached_result_is_reused_only_behind_the_same_chain(tmp_path, monkeypatch):
+    url = "http://a.example/"
+    final = "https://a.example/"
+    state = {"target": final, "requests": 0}
+
+    def fetch_url(url, timeout=7, session=None, stream=False, headers=None, method="GET"):
+        state["requests"] += 1
+        target = state["target"]
+        status = 304 if headers and headers.get("If-None-Match") == '"v1"' else 200
+        response = _chain((url, 301, {"Location": target}),
+                          (target, status, dict(SECURE_HEADERS, ETag='"v1"', **{"Content-Type": "text/html"})),
+                          body=b"" if status == 304 else GOOD_PAGE.encode())
+        response.fetch_timing = {"total_s": 0.001}
+        return response
+
+    monkeypatch.setattr(scanner, "fetch_url", fetch_url)
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    first = scan_webform(url, cache=cache)
+    assert first["details"]["cache"] == "miss" and first["checks"]["https"]["ok"]
+    assert cache.get(url)["chain"] == chain_fingerprint(fetch_url(url))
+
+    state["requests"] = 0
+    assert scan_webform(url, cache=cache)["details"]["cache"] == "revalidated"
+    assert state["requests"] == 1
+
+    # same page, but the redirect now lands on plain HTTP: the 304 is not enough
+    state["target"], state["requests"] = "http://a.example/home", 0
+    result = scan_webform(url, cache=cache)
+    assert result["details"]["cache"] == "miss" and state["requests"] == 2
+    assert not result["checks"]["https"]["ok"]
+    cache.close()
@@ -0,0 +1,42 @@
+import pytest
+
+from resources import ResourceCache
+from scanner import FetchedResponse, _analyze_fetched, compile_plan
+
+# nothing listens on port 9 here: a fetch fails fast, but still counts
+PAGE = (b'<a href="http://127.0.0.1:9/privacy">Privacy policy</a>'
+        b'<script src="http://127.0.0.1:9/tag.js"></script><form><input type=password></form>')
+URL = "http://127.0.0.1:9/page"
+
+
+@pytest.fixture
+def resources():
+    cache = ResourceCache()
+    yield cache
+    cache.close()
+
+
+def _scan(resources, disable):
+    response = FetchedResponse(URL, 200, {"Content-Type": "text/html"}, PAGE)
+    return _analyze_fetched(URL, response, resources=resources, plan=compile_plan("full", disable=disable))
+
+
+def test_no_deep_fetches_without_policy_and_tracker_checks(resources):
+    result = _scan(resources, ["privacy_policy", "trackers"])
+    assert resources.stats()["resources"] == 0
+    assert "resources" not in result["details"]
+    assert "trackers" not in result["checks"] and "forms" in result["checks"]
+
+
+def test_scripts_not_fetched_when_trackers_are_off(resources):
+    result = _scan(resources, ["trackers"])
+    assert resources.stats()["resources"] == 1
+    assert list(result["details"]["resources"]) == ["privacy_policy"]
+    assert "trackers" not in result["checks"]
+    assert not result["checks"]["privacy_policy"]["ok"]  # the link does not resolve
+
+
+def test_policy_not_fetched_when_its_check_is_off(resources):
+    result = _scan(resources, ["privacy_policy"])
+    assert list(result["details"]["resources"]) == ["scripts"]
+    assert "privacy_policy" not in result["checks"]
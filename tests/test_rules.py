@@ -0,0 +1,73 @@
+import pytest
+
+import scanner
+from incremental import scan_failed
+from scanner import FetchedResponse, PROFILES, analyze_response, compile_plan, error_result, register_rule
+
+
+@pytest.fixture
+def rules():
+    """Restore the rule registry after a test registers its own rules."""
+    saved = dict(scanner.RULES)
+    yield scanner.RULES
+    scanner.RULES.clear()
+    scanner.RULES.update(saved)
+    scanner._PLANS.clear()
+
+
+def test_profiles_select_rules_by_input():
+    full = compile_plan()
+    assert [name for name, _ in full["rules"]] == list(scanner.RULES)
+    assert full["needs_body"] and full["name"] == "full"
+    headers = compile_plan("headers")
+    assert [name for name, _ in headers["rules"]] == ["https", "security_headers", "cookies"]
+    assert not headers["needs_body"] and headers["dom_checks"] == ()
+    assert compile_plan("headers") is headers          # plans are cached
+
+
+def test_enable_and_disable_narrow_the_plan():
+    plan = compile_plan(disable=("trackers", "consent"))
+    assert plan["name"] == "custom"
+    assert "trackers" not in plan["dom_checks"] and "consent" not in plan["dom_checks"]
+    plan = compile_plan(enable=("https", "forms"))
+    assert [name for name, _ in plan["rules"]] == ["https", "forms"]
+    assert plan["dom_checks"] == ("forms",)
+    with pytest.raises(ValueError, match="Unknown rule"):
+        compile_plan(disable=("nope",))
+    with pytest.raises(ValueError, match="Unknown rule profile"):
+        compile_plan("nope")
+
+
+def test_headers_profile_result(make_result):
+    url = "https://a.example/"
+    response = FetchedResponse(url, 200, {"Set-Cookie": "sid=1; Path=/"}, b"")
+    result = analyze_response(url, response, plan="headers")
+    assert list(result["checks"]) == ["https", "security_headers", "cookies"]
+    assert result["issues"] == ["Missing Security Header", "Insecure Cookies"]
+    assert result["details"]["rules"] == {"plan": "headers", "checks": ["https", "security_headers", "cookies"]}
+    assert "rules" not in make_result(url)["details"]
+
+
+def test_register_rule(rules, make_result):
+    def has_title(url, response, dom):
+        ok = b"<title>" in getattr(response, "content", b"")
+        return {"ok": ok, "msg": "title" if ok else "no title"}, ([] if ok else ["Privacy policy missing"])
+
+    register_rule("title", "headers", has_title)
+    result = make_result("https://a.example/")
+    assert result["checks"]["title"] == {"ok": False, "msg": "no title"}
+    assert result["issues"] == ["Privacy policy missing"]
+    assert "title" in [name for name, _ in compile_plan("headers")["rules"]]
+    with pytest.raises(ValueError, match="Unknown rule input"):
+        register_rule("x", "body", has_title)
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_scan_failed_holds_for_every_profile(profile):
+    url = "https://a.example/"
+    ok = FetchedResponse(url, 200, {"Content-Type": "text/html"}, b"<form></form>")
+    missing = FetchedResponse(url, 404, {"Content-Type": "text/html"}, b"gone")
+    assert not scan_failed(analyze_response(url, ok, plan=profile))
+    assert scan_failed(analyze_response(url, missing, plan=profile))
+    assert scan_failed(analyze_response(url, None, plan=profile))
+    assert scan_failed(error_result(url, OSError("reset"), plan=profile))
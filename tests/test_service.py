@@ -0,0 +1,103 @@
+import http.client
+import json
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+from fixtures import make_small_page, start_fixture_server
+from service import MAX_BODY_BYTES, ScanService, start_service
+from store import ResultStore
+
+
+@pytest.fixture(scope="module")
+def site():
+    server, base = start_fixture_server({"small": make_small_page().encode("utf-8")})
+    yield base
+    server.shutdown()
+
+
+@pytest.fixture(scope="module")
+def api(tmp_path_factory):
+    store = ResultStore(str(tmp_path_factory.mktemp("service") / "results.sqlite"))
+    service = ScanService(store, workers=2, per_host=2, max_jobs=1)
+    server, base = start_service(service, port=0)
+    yield base
+    server.shutdown()
+    service.close()
+    store.close()
+
+
+def test_job_lifecycle(api, site):
+    urls = [f"{site}/small/{i}?headers=strict" for i in range(3)]
+    r = requests.post(f"{api}/scans", json={"urls": urls + urls[:1]})
+    assert r.status_code == 202
+    job = r.json()
+    assert job["total"] == 3 and job["results_url"] == f"/scans/{job['id']}/results"
+
+    streamed = requests.get(f"{api}{job['results_url']}?stream=1", timeout=30)
+    assert streamed.headers["Content-Type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert sorted(r["url"] for r in lines) == sorted(urls)
+
+    status = requests.get(f"{api}/scans/{job['id']}").json()
+    assert (status["state"], status["completed"], status["error"]) == ("done", 3, None)
+    listed = requests.get(f"{api}/scans/{job['id']}/results").json()
+    assert sorted(r["url"] for r in listed["results"]) == sorted(urls)
+    page = requests.get(f"{api}/scans/{job['id']}/results", params={"limit": 2, "offset": 2}).json()
+    assert page["count"] == 1 and page["results"][0] in listed["results"]
+    assert job["id"] in [j["id"] for j in requests.get(f"{api}/scans").json()["jobs"]]
+
+    stored = requests.get(f"{api}/results", params={"job": job["id"], "full": "0"}).json()
+    assert stored["count"] == 3 and "result" not in stored["results"][0]
+    row = requests.get(f"{api}/results/{stored['results'][0]['id']}").json()
+    assert row["result"]["url"] == row["url"]
+
+
+def test_sync_scan_is_stored(api, site):
+    url = f"{site}/small/9?headers=none"
+    result = requests.post(f"{api}/scan", json={"url": url, "profile": "headers"}).json()
+    assert result["url"] == url and "Missing Security Header" in result["issues"]
+    assert "forms" not in result["checks"]
+    rows = requests.get(f"{api}/results", params={"url": url, "latest": "1"}).json()["results"]
+    assert [row["result"] for row in rows] == [result]
+    assert requests.get(f"{api}/summary").json()["issues"]["Missing Security Header"] >= 1
+
+
+def test_health_and_metrics(api):
+    health = requests.get(f"{api}/health").json()
+    assert health["status"] == "ok" and set(health["jobs_by_state"]) == {"queued", "running", "done", "failed"}
+    metrics = requests.get(f"{api}/metrics")
+    assert metrics.headers["Content-Type"].startswith("text/plain")
+    assert f"webform_service_scans_total {health['scans']}" in metrics.text
+
+
+@pytest.mark.parametrize("method, path, payload, status", [
+    ("POST", "/scans", {"urls": []}, 400),
+    ("POST", "/scans", {"urls": ["ftp://a.example/"]}, 400),
+    ("POST", "/scans", {"urls": ["https://a.example/"], "profile": "nope"}, 400),
+    ("POST", "/scans", {"urls": ["https://a.example/"], "disable": ["nope"]}, 400),
+    ("POST", "/scans", {"urls": ["https://a.example/"], "stream": True, "deep": True}, 400),
+    ("POST", "/scan", {}, 400),
+    ("GET", "/scans/job-0", None, 404),
+    ("GET", "/results/abc", None, 404),
+    ("GET", "/results?limit=many", None, 400),
+    ("GET", "/nothing", None, 404),
+])
+def test_bad_requests(api, method, path, payload, status):
+    r = requests.request(method, f"{api}{path}", json=payload)
+    assert r.status_code == status
+    assert r.json()["error"]
+
+
+def test_invalid_json_and_oversized_bodies(api):
+    assert requests.post(f"{api}/scans", data="{not json").status_code == 400
+    assert requests.post(f"{api}/scans", data="[1, 2]").status_code == 400
+    host = urlsplit(api).netloc
+    conn = http.client.HTTPConnection(host, timeout=10)
+    conn.putrequest("POST", "/scans")
+    conn.putheader("Content-Length", str(MAX_BODY_BYTES + 1))
+    conn.endheaders()
+    response = conn.getresponse()
+    assert response.status == 413
+    conn.close()
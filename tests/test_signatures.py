@@ -0,0 +1,51 @@
+import json
+import re
+
+import pytest
+
+from signatures import DEFAULT_ENGINE, SignatureEngine, _trie_regex, compile_signatures, load_signatures
+
+
+@pytest.mark.parametrize("text, vendors", [
+    ("ga('create', 'ua-1');", ["GoogleAnalytics"]),
+    ("window.ym(123, 'init');", ["Yandex"]),
+    ("x=1;ga('send')", ["GoogleAnalytics"]),
+    ("omega(1); mega(2);", []),
+    ("dogma(3) yummy(4) $ga(5) _ym(6)", []),
+    ("https://static.hotjar.com/c/hotjar-1.js", ["Hotjar"]),
+    ("analytics.tiktok.com/i18n/pixel", ["TikTok"]),
+])
+def test_patterns_match_only_at_token_start(text, vendors):
+    assert DEFAULT_ENGINE.scan(text) == vendors
+
+
+def test_trie_regex_matches_like_an_alternation():
+    words = ["ga(", "gtag(", "gtm.js", "g", "tiktok", "analytics.tiktok", "a.b"]
+    trie = re.compile(_trie_regex(words))
+    for text in ["ga(", "gtag(", "g", "gtm.js", "gtmxjs", "tiktok", "analytics.tiktok", "a.b", "axb", "gx"]:
+        expected = max((w for w in words if text.startswith(w)), key=len, default=None)
+        m = trie.match(text)
+        assert (m.group(0) if m else None) == expected, text
+
+
+def test_overlapping_and_prefix_patterns_all_report():
+    engine = SignatureEngine({
+        "Short": {"category": "a", "patterns": ["track"]},
+        "Long": {"category": "b", "patterns": ["tracker.js"]},
+    })
+    assert engine.scan("load tracker.js") == ["Short", "Long"]
+    assert engine.scan("load track") == ["Short"]
+    assert engine.categories(["Long", "Nope"]) == {"Long": "b"}
+
+
+def test_extra_signature_files_extend_vendors(tmp_path):
+    extra = tmp_path / "extra.json"
+    extra.write_text(json.dumps({"vendors": {
+        "Hotjar": {"patterns": ["HJ.Track("]},
+        "Local": {"category": "analytics", "patterns": ["stats.example.edu"]},
+    }}))
+    vendors = load_signatures(extra_paths=[extra])
+    assert vendors["Hotjar"]["patterns"] == ["hotjar", "hj.track("]
+    engine = compile_signatures(extra_paths=[extra])
+    assert len(engine) == len(DEFAULT_ENGINE) + 2
+    assert engine.scan("hj.track('x'); //stats.example.edu/p.js") == ["Hotjar", "Local"]
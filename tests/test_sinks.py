@@ -0,0 +1,57 @@
+import csv
+import json
+import os
+
+from sinks import COLUMNS, CsvSink, JsonlSink, MarkdownSink, completed_urls, iter_jsonl, open_sinks
+
+
+def test_jsonl_resume_recovers_a_torn_line(tmp_path, make_result):
+    path = str(tmp_path / "results.jsonl")
+    sink = JsonlSink(path)
+    sink.write(make_result("https://a.example/"))
+    sink.close()
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write('{"url": "https://b.example/", "chec')     # crash in the middle of a write
+
+    assert completed_urls(path) == {"https://a.example/"}
+    sink = JsonlSink(path, resume=True)
+    sink.write(make_result("https://c.example/"))
+    sink.close()
+    assert [r["url"] for r in iter_jsonl(path)] == ["https://a.example/", "https://c.example/"]
+    with open(path, encoding="utf-8") as fh:
+        assert len(fh.read().splitlines()) == 3
+
+    JsonlSink(path).close()                                     # without resume the log starts over
+    assert os.path.getsize(path) == 0 and completed_urls(str(tmp_path / "missing.jsonl")) == set()
+
+
+def test_markdown_and_csv_write_their_header_once(tmp_path, make_result):
+    md, table = str(tmp_path / "report.md"), str(tmp_path / "results.csv")
+    for resume in (False, True):
+        with open_sinks(markdown=md, csv_file=table, resume=resume) as out:
+            out.write(make_result("http://a.example/", headers={}))
+    with open(md, encoding="utf-8") as fh:
+        report = fh.read()
+    assert report.count("http://a.example/") == 2
+    assert report.count("# WebForm Privacy Compliance") == 1
+    with open(table, newline="", encoding="utf-8") as fh:
+        rows = list(csv.DictReader(fh))
+    assert len(rows) == 2 and list(rows[0]) == COLUMNS
+    assert rows[0]["https_ok"] == "False" and "Missing Security Header" in rows[0]["issues"]
+
+    MarkdownSink(md).close()
+    CsvSink(table).close()
+    with open(table, newline="", encoding="utf-8") as fh:
+        assert list(csv.DictReader(fh)) == []
+
+
+def test_summaries_one_file_per_url(tmp_path, make_result):
+    directory = tmp_path / "summaries"
+    with open_sinks(summaries_dir=str(directory), summary_indent=None) as out:
+        out.write(make_result("https://a.example/form"))
+        out.write(make_result("https://b.example/"))
+    files = sorted(os.listdir(directory))
+    assert len(files) == 2
+    with open(directory / files[0], encoding="utf-8") as fh:
+        text = fh.read()
+    assert "\n" not in text.strip() and json.loads(text)["url"] == "https://a.example/form"
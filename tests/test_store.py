@@ -0,0 +1,64 @@
+import pytest
+
+from store import ResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = ResultStore(str(tmp_path / "results.sqlite"))
+    yield s
+    s.close()
+
+
+def test_add_and_get_round_trip(store, make_result):
+    result = make_result("https://Portal.Example.edu/login")
+    result_id = store.add(result, job="job-1", scanned_at=100.0)
+    row = store.get(result_id)
+    assert row["result"] == result
+    assert row["host"] == "portal.example.edu"
+    assert (row["level"], row["score"], row["job"], row["scanned_at"]) == (
+        "LOW", result["risk"]["normalized_score"], "job-1", 100.0)
+    assert store.get(result_id + 1) is None
+
+
+def test_query_filters(store, make_result):
+    store.add(make_result("https://a.example/"), job="j1", scanned_at=10)
+    store.add(make_result("http://a.example/form"), job="j1", scanned_at=20)
+    store.add(make_result("https://b.example/", cookies=("sid=1; Path=/",)), job="j2", scanned_at=30)
+
+    def urls(**kw):
+        return [row["url"] for row in store.query(**kw)]
+
+    assert urls() == ["https://b.example/", "http://a.example/form", "https://a.example/"]
+    assert urls(host="A.EXAMPLE") == ["http://a.example/form", "https://a.example/"]
+    assert urls(level="high") == ["http://a.example/form"]
+    assert urls(issue="Insecure Cookies") == ["https://b.example/"]
+    assert urls(issue="No HTTPS", host="b.example") == []
+    assert urls(job="j1", since=15) == ["http://a.example/form"]
+    assert urls(url="https://a.example/") == ["https://a.example/"]
+    assert urls(limit=1, offset=1) == ["http://a.example/form"]
+    assert "result" not in store.query(limit=1, with_result=False)[0]
+
+
+def test_latest_and_prune_keep_the_newest_scan(store, make_result):
+    store.add(make_result("https://a.example/", headers={}))     # MEDIUM
+    newest = store.add(make_result("https://a.example/"))        # LOW
+    store.add(make_result("http://b.example/"))                  # HIGH
+
+    latest = store.query(url="https://a.example/", latest=True)
+    assert [row["id"] for row in latest] == [newest]
+    assert store.query(level="MEDIUM", latest=True) == []
+    assert store.summary() == {
+        "stored": 3, "urls": 2, "levels": {"LOW": 1, "HIGH": 1}, "issues": {"No HTTPS": 1},
+        "high_risk_hosts": {"b.example": 1},
+    }
+    assert store.prune(keep=1) == 1
+    assert [row["id"] for row in store.query(url="https://a.example/")] == [newest]
+    assert store.query(issue="Missing Security Header") == []     # its issue rows went with it
+
+
+def test_add_many_is_all_or_nothing(store, make_result):
+    with pytest.raises(KeyError):
+        store.add_many([make_result("https://a.example/"), {"issues": []}])
+    assert store.query() == []
+    assert store.summary()["stored"] == 0
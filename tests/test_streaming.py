@@ -0,0 +1,79 @@
+import io
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+import scanner
+from conftest import GOOD_PAGE, SECURE_HEADERS
+from scanner import scan_webform
+
+FILLER = "<p>" + "lorem ipsum " * 50 + "</p>"
+
+
+class _BrokenBody(io.BytesIO):
+    """Raw body that drops the connection after the first read."""
+    def read(self, size=-1):
+        if self.tell():
+            raise ConnectionResetError("connection reset by peer")
+        return super().read(size)
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """serve(body, content_type=..., raw=io.BytesIO) makes fetch_url answer every URL with that body."""
+    def serve(body, content_type="text/html; charset=utf-8", raw=io.BytesIO):
+        def fetch_url(url, timeout=7, session=None, stream=False, headers=None, method="GET"):
+            r = requests.Response()
+            r.url = url
+            r.status_code = 200
+            r.headers = CaseInsensitiveDict(dict(SECURE_HEADERS, **{"Content-Type": content_type}))
+            r.encoding = get_encoding_from_headers(r.headers)
+            r.raw = raw(body)
+            r.fetch_timing = {"total_s": 0.0, "transfer_s": 0.0}
+            return r
+        monkeypatch.setattr(scanner, "fetch_url", fetch_url)
+    return serve
+
+
+def _checks(result):
+    return {name: (c["ok"], c["msg"]) for name, c in result["checks"].items()}
+
+
+@pytest.mark.parametrize("html", [
+    GOOD_PAGE,
+    FILLER * 40 + GOOD_PAGE,
+    '<form action="http://x.example/"><input type=password name=pw></form>'
+    '<script src="https://www.google-analytics.com/analytics.js"></script>',
+    "<p>no forms here</p>",
+])
+def test_streamed_scan_matches_the_buffered_scan(serve, html):
+    serve(html.encode("utf-8"))
+    url = "https://a.example/"
+    streamed = scan_webform(url, stream=True)
+    assert _checks(streamed) == _checks(scan_webform(url))
+    assert streamed["details"]["body"]["bytes_read"] <= len(html.encode("utf-8"))
+    assert not streamed["details"]["body"]["truncated"]
+
+
+def test_body_is_cut_at_max_bytes(serve):
+    html = GOOD_PAGE + FILLER * 200 + "<a href=/privacy-late>x</a>"
+    serve(html.encode("utf-8"))
+    result = scan_webform("https://a.example/", stream=True, max_bytes=len(GOOD_PAGE) - 20)
+    assert result["details"]["body"] == {"bytes_read": len(GOOD_PAGE) - 20, "max_bytes": len(GOOD_PAGE) - 20,
+                                         "truncated": True, "stopped_early": False}
+    assert result["checks"]["forms"]["ok"] and not result["checks"]["privacy_policy"]["ok"]
+
+    result = scan_webform("https://a.example/", stream=True, max_bytes=1 << 20)
+    assert result["details"]["body"]["bytes_read"] == len(html) and not result["details"]["body"]["truncated"]
+
+
+def test_unknown_charset_and_broken_transfer(serve):
+    serve("<form></form><a href=/privacy>Caf\xe9</a>".encode("latin-1"), content_type="text/html; charset=bogus")
+    result = scan_webform("https://a.example/", stream=True)
+    assert result["checks"]["forms"]["ok"] and result["checks"]["privacy_policy"]["ok"]
+
+    serve((GOOD_PAGE + FILLER * 200).encode("utf-8"), raw=_BrokenBody)
+    body = scan_webform("https://a.example/", stream=True)["details"]["body"]
+    assert body["truncated"] and "reset" in body["error"] and body["bytes_read"] > 0